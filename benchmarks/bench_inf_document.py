@@ -0,0 +1,108 @@
+"""
+Benchmark: InfDocument vs. the per-key regex path on large security templates.
+
+Usage:
+    python benchmarks/bench_inf_document.py [--lines 100000] [--edits 50]
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from core.inf_document import InfDocument  # noqa: E402
+
+
+def make_template(lines: int) -> str:
+    """Synthetic secedit export with `lines` key lines spread over 10 sections."""
+    out = ["[Unicode]", "Unicode=yes", "[Version]", 'signature="$CHICAGO$"', "Revision=1"]
+    per_section = max(1, lines // 10)
+    for s in range(10):
+        out.append("[System Access]" if s == 0 else f"[Section {s}]")
+        for k in range(per_section):
+            out.append(f"Key{s}_{k} = {k}")
+    return "\r\n".join(out) + "\r\n"
+
+
+def regex_path(path: str, edits: dict) -> None:
+    """What BaseModule.update_file_content did once per key."""
+    for (_, key), value in edits.items():
+        try:
+            with open(path, "r", encoding="utf-16") as f:
+                content = f.read()
+                encoding = "utf-16"
+        except UnicodeError:
+            with open(path, "r", encoding="utf-8") as f:
+                content = f.read()
+                encoding = "utf-8"
+        replacement = f"{key} = {value}"
+        if replacement in content:
+            continue
+        content, count = re.subn(rf"^\s*{key}\s*=\s*(.*)$", replacement, content, flags=re.MULTILINE)
+        if count == 0:
+            content += f"\n{replacement}"
+        with open(path, "w", encoding=encoding) as f:
+            f.write(content)
+
+
+def document_path(path: str, edits: dict) -> None:
+    doc = InfDocument.load(path)
+    doc.update(edits)
+    doc.save(path)
+
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--edits", type=int, default=50)
+    args = parser.parse_args()
+
+    text = make_template(args.lines)
+    per_section = max(1, args.lines // 10)
+    # Half the edits hit existing keys spread through the file, half add new keys
+    edits = {}
+    for i in range(args.edits):
+        if i % 2:
+            edits[("System Access", f"NewKey{i}")] = i
+        else:
+            edits[(f"Section {1 + i % 9}", f"Key{1 + i % 9}_{(i * 7919) % per_section}")] = -i
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "policy.inf")
+        results = {}
+        for label, fn in (("regex per key", regex_path), ("InfDocument", document_path)):
+            with open(path, "w", encoding="utf-16") as f:
+                f.write(text)
+            results[label] = timed(fn, path, edits)
+
+        with open(path, "w", encoding="utf-16") as f:
+            f.write(text)
+        parse_time = timed(InfDocument.load, path)
+        doc = InfDocument.load(path)
+        keys = [(f"Section {1 + i % 9}", f"Key{1 + i % 9}_{i % per_section}") for i in range(100_000)]
+        start = time.perf_counter()
+        for section, key in keys:
+            doc.get(section, key)
+        lookup_time = time.perf_counter() - start
+
+    print(f"Template: {args.lines} lines, {args.edits} edits")
+    for label, seconds in results.items():
+        print(f"  {label:<15} {seconds * 1000:10.1f} ms")
+    print(f"  speedup         {results['regex per key'] / results['InfDocument']:10.1f} x")
+    print(f"  parse only      {parse_time * 1000:10.1f} ms")
+    print(f"  100k lookups    {lookup_time * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Benchmark: full hardening runs against the simulated backend.
+
+Generates synthetic catalogs (secedit, user-rights and registry controls in
+equal parts), then runs main.main() on a fresh simulated host ("cold": every
+control is remediated) and again on the same host ("warm": every control is
+already compliant, evaluated with --full). Each run happens in its own child
+process so peak RSS belongs to that run alone.
+
+Usage:
+    python benchmarks/bench_run.py [--sizes 50 500 5000] [--latency 0.002]
+                                   [--save baseline.json] [--compare baseline.json]
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_SIZES = (50, 500, 5000)
+PHASES = ("cold", "warm")
+
+# metric -> True if a larger value is worse
+METRICS = {
+    "wall_s": True,
+    "subprocesses": True,
+    "temp_writes": True,
+    "peak_rss_kb": True,
+    "events_per_s": False,
+}
+
+
+# -------------------------
+# Synthetic workload
+# -------------------------
+def make_catalog(size: int) -> tuple[dict, dict]:
+    """(catalog, config) with `size` enabled controls."""
+    controls = []
+    config = {"general": {"dry_run": False}}
+    registry_keys = max(1, size // 20)
+    for i in range(size):
+        cid = f"B.{i}"
+        kind = ("secedit", "user_rights", "registry")[i % 3]
+        entry = {"id": cid, "title": f"Bench {kind} {i}", "sector": "Benchmark", "backend": kind}
+        if kind == "secedit":
+            entry.update(key=f"BenchSetting{i}", default=i % 7)
+        elif kind == "user_rights":
+            entry.update(key=f"SeBench{i}Privilege", default=["*S-1-5-32-544", "*S-1-5-19"])
+        else:
+            entry.update(key=f"HKLM\\SOFTWARE\\HardeningBench\\Key{i % registry_keys}",
+                         value=f"Value{i}", type="REG_DWORD", default=1)
+        controls.append(entry)
+        config[cid] = {"enabled": True}
+    return {"controls": controls}, config
+
+
+# -------------------------
+# Child: one measured run
+# -------------------------
+def _peak_rss_kb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes elsewhere
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_child(workdir: Path, full: bool) -> dict:
+    """Run main.main() once in this process and return its metrics."""
+    os.environ.update({
+        "HARDENING_BACKEND": "simulated",
+        "HARDENING_SIM_ROOT": str(workdir / "host"),
+        "HARDENING_CACHE_DIR": str(workdir / "cache"),
+        "HARDENING_JSONL_PATH": str(workdir / "events.jsonl"),
+        "HARDENING_CATALOG": str(workdir / "catalog.yaml"),
+    })
+    sys.path.insert(0, str(REPO_ROOT))
+    import main
+    from core import run_context
+
+    backends = []
+    create_backend = run_context.create_backend
+
+    def recording_create_backend(config):
+        backend = create_backend(config)
+        backends.append(backend)
+        return backend
+
+    run_context.create_backend = recording_create_backend
+
+    temp_dir = str(workdir / "host" / "Temp")
+    writes = {"temp": 0, "other": 0}
+
+    def audit(event, args):
+        if event == "open" and isinstance(args[0], (str, bytes, os.PathLike)):
+            mode = args[1] if isinstance(args[1], str) else ""
+            if any(c in mode for c in "wax+"):
+                writes["temp" if os.fspath(args[0]).startswith(temp_dir) else "other"] += 1
+
+    sys.addaudithook(audit)
+
+    events_path = workdir / "events.jsonl"
+    if events_path.exists():
+        events_path.unlink()
+
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        main.main(str(workdir / "config.yaml"), full=full)
+    wall = time.perf_counter() - start
+
+    with events_path.open("r", encoding="utf-8") as f:
+        events = sum(1 for _ in f)
+
+    calls = {}
+    for backend in backends:
+        for op, count in getattr(backend, "calls", {}).items():
+            calls[op] = calls.get(op, 0) + count
+
+    return {
+        "wall_s": round(wall, 4),
+        "subprocesses": sum(calls.values()),
+        "calls": calls,
+        "temp_writes": writes["temp"],
+        "other_writes": writes["other"],
+        "peak_rss_kb": _peak_rss_kb(),
+        "events": events,
+        "events_per_s": round(events / wall, 1) if wall else None,
+    }
+
+
+# -------------------------
+# Parent: scenarios, baselines
+# -------------------------
+def run_size(size: int, latency: float, max_workers: int | None) -> dict:
+    catalog, config = make_catalog(size)
+    if max_workers:
+        config["general"]["max_workers"] = max_workers
+    results = {}
+    with tempfile.TemporaryDirectory(prefix=f"bench-{size}-") as tmp:
+        workdir = Path(tmp)
+        # JSON is valid YAML, and much faster to write for 5000 entries
+        (workdir / "catalog.yaml").write_text(json.dumps(catalog), encoding="utf-8")
+        (workdir / "config.yaml").write_text(json.dumps(config), encoding="utf-8")
+        env = dict(os.environ, HARDENING_SIM_LATENCY=str(latency))
+        for phase in PHASES:
+            proc = subprocess.run(
+                [sys.executable, __file__, "--child", str(workdir)] + (["--full"] if phase == "warm" else []),
+                env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            if proc.returncode != 0:
+                raise RuntimeError(f"{size} controls, {phase} run failed:\n{proc.stderr}")
+            results[phase] = json.loads(proc.stdout.strip().splitlines()[-1])
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_results(results: dict) -> None:
+    print(f"{'controls':>8} {'phase':<5} {'wall s':>9} {'subproc':>8} {'temp wr':>8} "
+          f"{'peak RSS KB':>12} {'events':>7} {'events/s':>10}")
+    for size, phases in results.items():
+        for phase, m in phases.items():
+            print(f"{size:>8} {phase:<5} {m['wall_s']:>9.3f} {m['subprocesses']:>8} {m['temp_writes']:>8} "
+                  f"{m['peak_rss_kb'] if m['peak_rss_kb'] is not None else '-':>12} {m['events']:>7} "
+                  f"{m['events_per_s']:>10}")
+
+
+def compare(baseline: dict, results: dict, threshold: float) -> int:
+    """Print the change of every metric against a saved baseline; returns the number of regressions."""
+    regressions = 0
+    print(f"\nAgainst baseline {baseline.get('meta', {}).get('commit')} (threshold {threshold:.0f}%):")
+    for size, phases in results.items():
+        for phase, m in phases.items():
+            old = baseline.get("results", {}).get(str(size), {}).get(phase)
+            if old is None:
+                print(f"  {size:>6} {phase:<5} no baseline")
+                continue
+            for metric, higher_is_worse in METRICS.items():
+                before, after = old.get(metric), m.get(metric)
+                if not before or after is None:
+                    continue
+                change = (after - before) / before * 100
+                worse = change > threshold if higher_is_worse else change < -threshold
+                regressions += worse
+                print(f"  {size:>6} {phase:<5} {metric:<13} {before:>12} -> {after:<12} {change:+7.1f}%"
+                      f"{'  REGRESSION' if worse else ''}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="seconds added to every simulated secedit/reg call")
+    parser.add_argument("--max-workers", type=int, default=None)
+    parser.add_argument("--save", metavar="PATH", help="write results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="diff results against a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="percent change counted as a regression (default: 10)")
+    parser.add_argument("--child", metavar="WORKDIR", help=argparse.SUPPRESS)
+    parser.add_argument("--full", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(Path(args.child), args.full)))
+        return
+
+    results = {size: run_size(size, args.latency, args.max_workers) for size in args.sizes}
+    print_results(results)
+
+    if args.save:
+        payload = {
+            "meta": {"commit": _git_commit(), "date": datetime.now(timezone.utc).isoformat(),
+                     "python": platform.python_version(), "platform": platform.platform(),
+                     "latency": args.latency, "max_workers": args.max_workers},
+            "results": {str(size): phases for size, phases in results.items()},
+        }
+        Path(args.save).write_text(json.dumps(payload, indent=1), encoding="utf-8")
+        print(f"\nBaseline written to {args.save}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        if compare(baseline, results, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
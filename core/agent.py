@@ -0,0 +1,129 @@
+import os
+import random
+import signal
+import threading
+
+DEFAULT_INTERVAL = 3600.0
+DEFAULT_JITTER = 0.0
+
+
+def file_signature(paths):
+    """(path, mtime_ns, size) of each path; a missing file is (path, None, None)."""
+    signature = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            signature.append((str(path), st.st_mtime_ns, st.st_size))
+        except OSError:
+            signature.append((str(path), None, None))
+    return tuple(signature)
+
+
+class WarmState:
+    """
+    What the resident agent keeps between passes.
+
+    Imported module classes stay until their file's hash changes. The backend
+    (with its executor thread) and the control instances belong to one
+    configuration: begin() drops them when the config, the catalog or the
+    set of module ids changed since the last pass.
+    """
+
+    def __init__(self):
+        self.generation = None
+        self.backend = None
+        self._classes = {}      # module path -> (sha256, class)
+        self._controls = {}     # control key -> (version, instance)
+
+    def begin(self, generation, make_backend):
+        if generation == self.generation:
+            return False
+        self._close_backend()
+        self.generation = generation
+        self.backend = make_backend()
+        self._controls.clear()
+        return True
+
+    def module_class(self, path, sha256, load):
+        """load() imports the file; it runs again only when the file's content changed."""
+        cached = self._classes.get(path)
+        if cached is not None and cached[0] == sha256:
+            return cached[1]
+        cls = load()
+        if cls is None:
+            self._classes.pop(path, None)
+        else:
+            self._classes[path] = (sha256, cls)
+        return cls
+
+    def control(self, key, version, build):
+        """The instance built for key in an earlier pass (reset), or build()'s."""
+        cached = self._controls.get(key)
+        if cached is not None and cached[0] == version:
+            cached[1].reset()
+            return cached[1]
+        task = build()
+        if task is None:
+            self._controls.pop(key, None)
+        else:
+            self._controls[key] = (version, task)
+        return task
+
+    def prune(self, keys):
+        """Forget controls (and classes) that were not loaded in this pass."""
+        keys = set(keys)
+        for key in [k for k in self._controls if k not in keys]:
+            del self._controls[key]
+        for path in [p for p in self._classes if p not in keys]:
+            del self._classes[path]
+
+    def close(self):
+        self._close_backend()
+        self._controls.clear()
+
+    def _close_backend(self):
+        if self.backend is not None:
+            self.backend.close()
+        self.backend = None
+
+
+class AgentSchedule:
+    """
+    Waits between agent passes: interval seconds plus a random 0..jitter,
+    so a fleet started together does not check in lockstep. stop() ends the
+    wait (and the agent); wake() starts the next pass at once.
+    """
+
+    def __init__(self, seed=None):
+        self._rng = random.Random(seed)
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+
+    @property
+    def stopped(self):
+        return self._stop.is_set()
+
+    def delay(self, interval=DEFAULT_INTERVAL, jitter=DEFAULT_JITTER):
+        return max(0.0, float(interval)) + (self._rng.uniform(0, float(jitter)) if jitter else 0.0)
+
+    def wait(self, seconds):
+        """Sleep until the next pass is due; False if the agent was stopped meanwhile."""
+        if not self._stop.is_set():
+            self._wake.wait(seconds)
+        # A SIGHUP during the pass ends this wait at once
+        self._wake.clear()
+        return not self._stop.is_set()
+
+    def stop(self, *_):
+        self._stop.set()
+        self._wake.set()
+
+    def wake(self, *_):
+        self._wake.set()
+
+    def install_signal_handlers(self):
+        """SIGTERM/SIGINT stop after the current pass; SIGHUP (POSIX) runs a pass now."""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, self.wake)
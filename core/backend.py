@@ -0,0 +1,125 @@
+import asyncio
+import base64
+import os
+import tempfile
+
+from core.executor import CommandExecutor
+
+SECEDIT_AREAS = "SECURITYPOLICY USER_RIGHTS"
+
+
+class SystemBackend:
+    """
+    Everything the engine does to the host goes through a backend:
+    policy export/configure, registry read/import and raw commands.
+
+    Every call returns a CommandResult (a subprocess.CompletedProcess) so
+    callers handle real and simulated systems the same way. Subclasses must
+    implement run(); the typed operations default to the stock Windows
+    commands. run_async() is the awaitable form, executed on the backend's
+    CommandExecutor loop; close() stops that loop.
+    """
+    name = "base"
+
+    def __init__(self, temp_dir=None, executor=None):
+        self.temp_dir = temp_dir or (r"C:\Windows\Temp" if os.name == "nt" else tempfile.gettempdir())
+        self._executor = executor
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = CommandExecutor()
+        return self._executor
+
+    def close(self):
+        """Stop the executor's loop thread, if one was started."""
+        if self._executor is not None:
+            self._executor.close()
+
+    def run(self, command):
+        raise NotImplementedError
+
+    async def run_async(self, command):
+        # Backends without native async support run the blocking call in a thread
+        return await asyncio.to_thread(self.run, command)
+
+    # -------------------------
+    # Security policy (secedit)
+    # -------------------------
+    def export_policy(self, path):
+        return self.run(f"secedit /export /cfg {path} /areas {SECEDIT_AREAS} /quiet")
+
+    def configure_policy(self, path, db="secedit.sdb"):
+        return self.run(f"secedit /configure /db {db} /cfg {path} /areas {SECEDIT_AREAS} /quiet")
+
+    # -------------------------
+    # Registry
+    # -------------------------
+    def query_registry(self, key):
+        """`reg query` output for every value directly under key."""
+        return self.run(f'reg query "{key}"')
+
+    def import_registry(self, path):
+        return self.run(f'reg import "{path}"')
+
+    # -------------------------
+    # Accounts
+    # -------------------------
+    def lookup_accounts(self, names):
+        """Translate account names to SIDs in one call; stdout is 'name<TAB>SID' per line (SID empty if unknown)."""
+        quoted = ",".join("'" + name.replace("'", "''") + "'" for name in names)
+        script = (
+            f"foreach ($n in @({quoted})) {{ $s = ''; "
+            "try { $s = (New-Object System.Security.Principal.NTAccount($n))"
+            ".Translate([System.Security.Principal.SecurityIdentifier]).Value } catch {}; "
+            '"$n`t$s" }'
+        )
+        encoded = base64.b64encode(script.encode("utf-16-le")).decode("ascii")
+        return self.run(f"powershell -NoProfile -NonInteractive -EncodedCommand {encoded}")
+
+
+class LocalBackend(SystemBackend):
+    """
+    Runs commands on this machine through the shell, as asyncio subprocesses
+    with a concurrency limit and a per-command timeout (general.commands).
+    """
+    name = "local"
+
+    def run(self, command):
+        return self.executor.run(command)
+
+    async def run_async(self, command):
+        return await self.executor.run_async(command)
+
+
+_default_backend = None
+
+
+def default_backend():
+    """Backend for modules used outside a run (no RunContext attached)."""
+    global _default_backend
+    if _default_backend is None:
+        _default_backend = LocalBackend()
+    return _default_backend
+
+
+def create_backend(config):
+    """
+    Build the backend for a run.
+    HARDENING_BACKEND overrides general.backend so CI can switch without editing config.
+    """
+    general = config.get('general', {})
+    name = os.environ.get("HARDENING_BACKEND") or general.get('backend', 'local')
+    executor = CommandExecutor(**(general.get('commands') or {}))
+
+    if name == "local":
+        return LocalBackend(executor=executor)
+
+    if name == "simulated":
+        from core.simulated_backend import SimulatedBackend
+        sim = general.get('simulation', {}) or {}
+        root = os.environ.get("HARDENING_SIM_ROOT") or sim.get('root') or os.path.join(tempfile.gettempdir(), "hardening-sim")
+        latency = float(os.environ.get("HARDENING_SIM_LATENCY") or sim.get('latency', 0.0))
+        return SimulatedBackend(root, latency=latency, latencies=sim.get('latencies'), executor=executor)
+
+    raise ValueError(f"Unknown backend: {name}")
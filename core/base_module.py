@@ -1,26 +1,51 @@
+import asyncio
 import logging
-import subprocess
-import re
-import os
 import shutil
+import threading
+import time
 from typing import Any, Dict, List, Optional
 
+from core.backend import default_backend
+from core.command_cache import classify as classify_command
+
 
 class BaseModule:
+    # Run-scoped shared state (core.run_context.RunContext); set by the runner.
+    context = None
+
+    # True if apply() only reads system state and stages writes on the run
+    # context, so the runner may check it concurrently with other modules.
+    parallel_safe = False
+
+    # Labels for run selection (`--select tag:...`). Assign a literal list, in
+    # the class body or as self.tags, so the manifest can read it without importing.
+    tags = ()
+
     def __init__(self, name, config):
         self.name = name
         self.config = config
         self.logger = logging.getLogger(name)
 
-        # NEW: store structured events for JSON export
+        # Structured events for JSON export
         self._events: List[Dict[str, Any]] = []
 
+        # Cost of this module's work, exported with its events. duration_ms is
+        # set by the runner; the rest is counted as the module runs.
+        self.metrics: Dict[str, float] = {
+            "duration_ms": 0.0,     # wall time of apply()/audit()
+            "child_ms": 0.0,        # wall time spent waiting on backend calls (child processes)
+            "commands": 0,          # backend calls (run_command and typed operations)
+            "bytes_read": 0,        # file I/O (update_file_content, session commits)
+            "bytes_written": 0,
+        }
+        self._metrics_lock = threading.Lock()
+
     # -------------------------
     # Event capture helpers
     # -------------------------
     def _record_event(self, result: str, message: str, extra: Optional[Dict[str, Any]] = None) -> None:
         evt = {
-            "result": result,   # OK / CHANGED / WARN / ERROR / SKIP
+            "result": result,   # OK / CHANGED / WARN / ERROR / SKIP / COMPLIANT / NON_COMPLIANT
             "message": message,
         }
         if extra:
@@ -34,6 +59,41 @@ class BaseModule:
             self._events.clear()
         return ev
 
+    def reset(self) -> None:
+        """Forget a previous run's events and metrics (the resident agent reuses instances)."""
+        self._events.clear()
+        with self._metrics_lock:
+            for key, value in self.metrics.items():
+                self.metrics[key] = 0.0 if isinstance(value, float) else 0
+
+    def fingerprint(self) -> Optional[str]:
+        """
+        Hash of every input that decides this control's outcome (definition,
+        settings, observed system state), used to skip unchanged controls on
+        incremental runs. None means "unknown": the control is always evaluated.
+        """
+        return None
+
+    def resources(self):
+        """
+        (reads, writes): names of the system state apply() touches, e.g.
+        "policy\\System Access", "registry:hkey_local_machine\\...",
+        "file:/etc/ssh/sshd_config"; "*" means everything. The scheduler runs
+        controls whose resources do not conflict concurrently. The writes of
+        a parallel_safe module are the changes it stages on the run context;
+        they decide the commit plan instead. None means undeclared (see
+        core/scheduler.py).
+        """
+        return None
+
+    def audit(self) -> bool:
+        """
+        Evaluate the control against the run's system snapshot without
+        changing anything, logging COMPLIANT / NON_COMPLIANT. Returns False
+        if the module has no audit support (the runner reports it as SKIP).
+        """
+        return False
+
     # -------------------------
     # Logging (prints + records)
     # -------------------------
@@ -57,61 +117,138 @@ class BaseModule:
         self._record_event("SKIP", message)
         print(f"[SKIP]    [{self.name}]: {message}")
 
+    def log_compliance(self, compliant, setting, expected, actual):
+        """Audit result for one setting; expected/actual are exported with the event."""
+        if compliant:
+            result, message = "COMPLIANT", f"{setting} is set to {actual!r}."
+        elif actual is None:
+            result, message = "NON_COMPLIANT", f"{setting} is not set, expected {expected!r}."
+        else:
+            result, message = "NON_COMPLIANT", f"{setting} is {actual!r}, expected {expected!r}."
+        self._record_event(result, message, {"expected": expected, "actual": actual})
+        print(f"[{result}] [{self.name}]: {message}")
+
     # -------------------------
     # Existing helpers
     # -------------------------
-    def run_command(self, command):
+    @property
+    def backend(self):
+        """System backend of the current run (local shell when used standalone)."""
+        if self.context is not None:
+            return self.context.backend
+        return default_backend()
+
+    def count(self, **amounts):
+        """Add to this module's metrics (thread-safe; sessions are shared by workers)."""
+        with self._metrics_lock:
+            for key, amount in amounts.items():
+                self.metrics[key] = self.metrics.get(key, 0) + amount
+
+    @property
+    def command_memo(self):
+        """Run-scoped memo of read-only backend calls (None when used standalone)."""
+        return self.context.commands if self.context is not None else None
+
+    def run_backend(self, operation, *args, reads=None, writes=None):
+        """
+        Call one backend operation (run, export_policy, ...), timing it as
+        child-process work. Inside a run, repeated reads are served from the
+        command memo and writes invalidate it (see core/command_cache.py);
+        reads/writes name the resource for commands it cannot classify.
+        """
+        def call():
+            start = time.perf_counter()
+            try:
+                return getattr(self.backend, operation)(*args)
+            finally:
+                self.count(commands=1, child_ms=(time.perf_counter() - start) * 1000)
+
+        memo = self.command_memo
+        if memo is None:
+            return call()
+        return memo.call(operation, args, call, reads=reads, writes=writes)
+
+    def run_command(self, command, log_errors=True, reads=None, writes=None):
+        return self.command_output(self.run_backend("run", command, reads=reads, writes=writes), log_errors)
+
+    async def run_command_async(self, command, log_errors=True, writes=None):
+        """Awaitable run_command(), for controls that implement apply_async()."""
+        start = time.perf_counter()
         try:
-            result = subprocess.run(
-                command, shell=True, check=True,
-                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
-            )
-            return result.stdout.strip()
-        except subprocess.CalledProcessError as e:
-            # Keep logger, but also record an event (so runner can export it)
-            err = (e.stderr or "").strip()
+            result = await self.backend.run_async(command)
+        finally:
+            self.count(commands=1, child_ms=(time.perf_counter() - start) * 1000)
+            memo = self.command_memo
+            if memo is not None:
+                # Concurrent reads are not memoized, but writes still invalidate
+                kind, resource = ("write", writes) if writes else classify_command("run", (command,))
+                if kind == "write":
+                    memo.invalidate(resource)
+        return self.command_output(result, log_errors)
+
+    def run_commands(self, commands, log_errors=True):
+        """Run several commands concurrently from synchronous code; outputs in order."""
+        async def gather():
+            return await asyncio.gather(*(self.run_command_async(c, log_errors) for c in commands))
+        return self.backend.executor.call(gather())
+
+    def apply(self):
+        """
+        Enforce the control. Subclasses override this, or implement
+        `async def apply_async(self)` to await several commands at once.
+        """
+        apply_async = getattr(self, "apply_async", None)
+        if apply_async is None:
+            raise NotImplementedError(f"{self.__class__.__name__} implements neither apply() nor apply_async()")
+        return self.backend.executor.call(apply_async())
+
+    def command_output(self, result, log_errors=True):
+        """stdout of a finished backend call, or None (and an ERROR event) if it failed."""
+        if result.returncode == 0:
+            return (result.stdout or "").strip()
+
+        # Keep logger, but also record an event (so runner can export it)
+        err = (result.stderr or "").strip()
+        if log_errors:
             self.logger.error(f"Command failed: {err}")
             self.log_error(f"Command failed: {err}")
-            return None
+        return None
 
     def update_file_content(self, file_path, regex_pattern, replacement_line, backup=True):
-        if not os.path.exists(file_path):
+        """
+        Set the lines regex_pattern matches (line-anchored) to replacement_line,
+        appending it if nothing matches. Returns True if the file needs the change.
+
+        Inside a run the file is read once and the edit is staged on the
+        shared FileEditBatch, which writes every edit of the file in one
+        atomic write at commit (and reports CHANGED then). Used on its own,
+        the module edits through a private batch immediately.
+        """
+        # Imported here: file_editor builds on BaseModule
+        from core.file_editor import FileEditBatch, is_set
+
+        batch = self.context.file_edits if self.context is not None else FileEditBatch(self.config)
+        document = batch.read(file_path)
+        if document is None:
             self.log_error(f"File {file_path} not found.")
             return False
 
-        # 1. Read File (Handle Windows UTF-16LE encoding if necessary)
-        try:
-            with open(file_path, 'r', encoding='utf-16') as f:
-                content = f.read()
-                encoding = 'utf-16'
-        except UnicodeError:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                encoding = 'utf-8'
-
-        # 2. Check if change is needed
-        if replacement_line in content:
+        # 1. Check if change is needed
+        if is_set(document.content, regex_pattern, replacement_line):
             self.log_ok(f"Setting '{replacement_line.strip()}' is already set.")
             return False
 
-        # 3. Dry Run Check
+        # 2. Dry Run Check
         if self.config.get('general', {}).get('dry_run'):
             self.log_change(f"(DRY RUN) Would replace pattern '{regex_pattern}' with '{replacement_line}'")
             return True
 
-        # 4. Create Backup
-        if backup:
-            shutil.copy2(file_path, f"{file_path}.bak")
-
-        # 5. Perform Regex Substitution
-        new_content, count = re.subn(regex_pattern, replacement_line, content, flags=re.MULTILINE)
-        if count == 0:
-            self.logger.warning(f"Pattern '{regex_pattern}' not found. Appending to end.")
-            new_content += f"\n{replacement_line}"
-
-        # 6. Write Back
-        with open(file_path, 'w', encoding=encoding) as f:
-            f.write(new_content)
-
-        self.log_change(f"Updated file to: {replacement_line.strip()}")
+        # 3. Stage; the write happens in the batch commit
+        batch.stage(self, file_path, regex_pattern, replacement_line)
+        if self.context is None:
+            # Inside a run the transaction snapshot keeps the original instead
+            if backup:
+                shutil.copy2(file_path, f"{file_path}.bak")
+                self.count(bytes_written=len(document.raw))
+            batch.commit()
         return True
@@ -0,0 +1,246 @@
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+import json
+import os
+
+from core.state import fingerprint
+from core.user_rights import UserRightsModule
+from core.windows_registry import RegistryModule, normalize_key
+from core.windows_secedit import SeceditModule
+
+REQUIRED_FIELDS = ("id", "title", "backend", "key")
+OPTIONAL_FIELDS = ("sector", "section", "value", "type", "setting", "default", "tags")
+
+
+class CatalogError(ValueError):
+    pass
+
+
+class ControlSpec:
+    """One catalog entry: everything needed to enforce a control, as data."""
+    __slots__ = REQUIRED_FIELDS + OPTIONAL_FIELDS
+
+    def __init__(self, id, title, backend, key, sector=None, section=None, value=None,
+                 type=None, setting=None, default=None, tags=None):
+        self.id = id
+        self.title = title
+        self.backend = backend
+        self.key = key
+        self.sector = sector
+        self.section = section
+        self.value = value
+        self.type = type
+        self.setting = setting
+        self.default = default
+        self.tags = list(tags or [])
+
+    @property
+    def name(self):
+        return f"CIS {self.id} ({self.title})"
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, raw, position):
+        if not isinstance(raw, dict):
+            raise CatalogError(f"Catalog entry #{position} must be a mapping")
+        missing = [f for f in REQUIRED_FIELDS if not raw.get(f)]
+        if missing:
+            raise CatalogError(f"Catalog entry #{position} ({raw.get('id', '?')}) is missing: {', '.join(missing)}")
+        unknown = set(raw) - set(REQUIRED_FIELDS) - set(OPTIONAL_FIELDS)
+        if unknown:
+            raise CatalogError(f"Catalog entry {raw['id']} has unknown fields: {', '.join(sorted(unknown))}")
+
+        spec = cls(**{k: raw[k] for k in raw})
+        spec.id = str(spec.id)
+        if spec.backend not in CONTROL_CLASSES:
+            raise CatalogError(f"Catalog entry {spec.id}: unknown backend '{spec.backend}'")
+        if spec.backend == "registry" and not spec.value:
+            raise CatalogError(f"Catalog entry {spec.id}: registry controls need a 'value' name")
+        return spec
+
+
+def _read_entries(path, cache_path=None, pending=None):
+    """
+    Raw catalog entries. YAML parsing dominates load time, so the parsed list
+    is cached as JSON next to the module manifest and reused while the
+    catalog's mtime and size are unchanged. With a `pending` list the cache
+    write is appended to it instead of done (read-only runs never call it).
+    """
+    st = os.stat(path)
+    stamp = [str(os.path.abspath(path)), st.st_mtime_ns, st.st_size]
+    if cache_path:
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("stamp") == stamp:
+                return cached["controls"]
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    if yaml is None:
+        raise CatalogError("PyYAML is not installed. Install it with: pip install pyyaml")
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with open(path, "r", encoding="utf-8") as f:
+        controls = (yaml.load(f, Loader=loader) or {}).get("controls") or []
+
+    if cache_path:
+        def save():
+            try:
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                tmp = f"{cache_path}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump({"stamp": stamp, "controls": controls}, f)
+                os.replace(tmp, cache_path)
+            except (OSError, TypeError):
+                pass
+
+        if pending is None:
+            save()
+        else:
+            pending.append(save)
+    return controls
+
+
+def load_catalog(path, cache_path=None, pending=None):
+    """
+    Parse the catalog file into ControlSpecs, in file order. With a
+    `pending` list, writing the parse cache is deferred to the caller.
+    """
+    try:
+        entries = _read_entries(path, cache_path, pending)
+    except FileNotFoundError:
+        raise CatalogError(f"Catalog file not found: {path}")
+
+    specs = [ControlSpec.from_dict(raw, i + 1) for i, raw in enumerate(entries)]
+    seen = set()
+    for spec in specs:
+        if spec.id in seen:
+            raise CatalogError(f"Duplicate control id in catalog: {spec.id}")
+        seen.add(spec.id)
+    return specs
+
+
+# -------------------------
+# Generic controls
+# -------------------------
+# observed_state() result when the system could not be read at all
+UNAVAILABLE = object()
+
+
+class CatalogControl:
+    """Mixin that turns a ControlSpec into a runnable BaseModule."""
+
+    def __init__(self, spec, config, settings=None):
+        super().__init__(name=spec.name, config=config)
+        self.id = spec.id
+        self.spec = spec
+        self.tags = spec.tags
+        # Validated, typed settings (core.settings.ControlSettings); read from
+        # the raw config when the control is used on its own
+        self.settings = settings
+
+    def enabled(self):
+        if self.settings is not None:
+            return self.settings.enabled
+        return self.config.get(self.id, {}).get('enabled', False)
+
+    def setting_value(self):
+        if self.settings is not None:
+            return self.settings.value
+        return self.config.get(self.id, {}).get(self.spec.setting, self.spec.default)
+
+    def apply(self):
+        if not self.enabled():
+            return
+        self.enforce(self.setting_value())
+
+    def audit(self):
+        if self.enabled():
+            self.verify(self.setting_value())
+        return True
+
+    def fingerprint(self):
+        if self.context is None:
+            return None
+        observed = self.observed_state()
+        if observed is UNAVAILABLE:
+            return None
+        dry_run = bool(self.config.get('general', {}).get('dry_run'))
+        return fingerprint(self.spec.to_dict(), self.config.get(self.id, {}), dry_run, observed)
+
+
+class SeceditControl(CatalogControl, SeceditModule):
+    def resources(self):
+        # The write is staged on the PolicySession and committed after the check phase
+        section = "policy\\" + (self.spec.section or "System Access")
+        return [section], [section + "\\" + self.spec.key]
+
+    def enforce(self, target_value):
+        self.apply_secedit_policy(self.spec.key, target_value, self.spec.section or "System Access")
+
+    def verify(self, target_value):
+        self.audit_secedit_policy(self.spec.key, target_value, self.spec.section or "System Access")
+
+    def observed_state(self):
+        policy = self.context.policy.snapshot()
+        if policy is None:
+            return UNAVAILABLE
+        return policy.get(self.spec.section or "System Access", self.spec.key)
+
+
+class UserRightsControl(CatalogControl, UserRightsModule):
+    def setting_value(self):
+        if self.settings is not None:
+            return self.settings.value
+        return self.config.get(self.id, {}).get(self.spec.setting or 'users', self.spec.default or [])
+
+    def resources(self):
+        return ["policy\\Privilege Rights", "accounts"], ["policy\\Privilege Rights\\" + self.spec.key]
+
+    def enforce(self, users):
+        self.apply_user_right(self.spec.key, users)
+
+    def verify(self, users):
+        self.audit_user_right(self.spec.key, users)
+
+    def observed_state(self):
+        policy = self.context.policy.snapshot()
+        if policy is None:
+            return UNAVAILABLE
+        return policy.get("Privilege Rights", self.spec.key)
+
+
+class RegistryControl(CatalogControl, RegistryModule):
+    def resources(self):
+        # The write is staged on the RegistryWriteBatch
+        key = "registry:" + normalize_key(self.spec.key)
+        return [key], [key]
+
+    def enforce(self, target_data):
+        self.apply_registry_value(self.spec.key, self.spec.value, target_data, self.spec.type or "REG_DWORD")
+
+    def verify(self, target_data):
+        self.audit_registry_value(self.spec.key, self.spec.value, target_data, self.spec.type or "REG_DWORD")
+
+    def observed_state(self):
+        current = self.context.registry.get(self.spec.key, self.spec.value)
+        if current is None:
+            return None
+        data = current.data.hex() if isinstance(current.data, bytes) else current.data
+        return [current.type, data]
+
+
+CONTROL_CLASSES = {
+    "secedit": SeceditControl,
+    "user_rights": UserRightsControl,
+    "registry": RegistryControl,
+}
+
+
+def build_control(spec, config, settings=None):
+    return CONTROL_CLASSES[spec.backend](spec, config, settings)
@@ -0,0 +1,153 @@
+import re
+import threading
+
+ALL = "*"
+_TOKEN = re.compile(r'"[^"]*"|\S+')
+
+
+def _tokens(command):
+    return [t.strip('"') for t in _TOKEN.findall(str(command))]
+
+
+def _registry(key):
+    # Imported here: windows_registry builds on BaseModule, which uses this module
+    from core.windows_registry import normalize_key
+    return "registry:" + normalize_key(key)
+
+
+def classify(operation, args):
+    """
+    What a backend call does to which resource: ("read", resource),
+    ("write", resource) or ("none", None) for calls that are neither cached
+    nor invalidating. Raw commands that are not recognised count as a write
+    to everything, so a module shelling out to an unknown tool can never be
+    served a stale read.
+    """
+    if operation == "query_registry":
+        return "read", _registry(args[0])
+    if operation == "import_registry":
+        return "write", "registry:" + ALL
+    if operation == "configure_policy":
+        return "write", "policy"
+    if operation == "lookup_accounts":
+        return "read", "accounts"
+    if operation == "export_policy":
+        # The result is the exported file, which the caller deletes
+        return "none", None
+    if operation != "run":
+        return "write", ALL
+
+    tokens = _tokens(args[0])
+    lowered = [t.lower() for t in tokens]
+    verb = lowered[:2]
+    if verb[:1] == ["reg"] and len(tokens) > 2:
+        if verb[1] == "query":
+            return "read", _registry(tokens[2])
+        if verb[1] in ("add", "delete", "copy"):
+            return "write", _registry(tokens[2])
+        return "write", "registry:" + ALL
+    if verb[:1] == ["auditpol"]:
+        return ("read", "auditpol") if "/get" in lowered or "/list" in lowered else ("write", "auditpol")
+    if verb == ["net", "accounts"]:
+        return ("write", "accounts") if any(t.startswith("/") for t in lowered[2:]) else ("read", "accounts")
+    if verb[:1] == ["secedit"]:
+        return ("none", None) if "/export" in lowered or "/analyze" in lowered else ("write", "policy")
+    return "write", ALL
+
+
+def affects(written, resource):
+    """A write to `written` invalidates reads of the same resource, its parents and its children."""
+    if written == ALL:
+        return True
+    if written.endswith(":" + ALL):
+        return resource.startswith(written[:-1])
+    return resource == written or resource.startswith(written + "\\") or written.startswith(resource + "\\")
+
+
+class CommandMemo:
+    """
+    Run-scoped memo of read-only backend calls.
+
+    Reads are keyed by operation, normalized arguments and resource; the
+    first caller runs the command and concurrent duplicates wait for its
+    result. Any write to a resource drops the cached reads it could have
+    changed. Modules can mark raw commands explicitly with
+    run_command(..., reads=resource) / run_command(..., writes=resource).
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.uncached = 0
+        self._entries = {}      # key -> (resource, CompletedProcess)
+        self._key_locks = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(operation, args, resource):
+        """
+        Canonical form of a read: quoting, case and hive spelling do not
+        matter, and query_registry(key) shares entries with `reg query key`.
+        """
+        if operation == "query_registry":
+            return ("reg query", resource) + tuple(str(a).casefold() for a in args[1:] if a is not None)
+        tokens = [t.casefold() for a in args for t in _tokens(a)]
+        if operation == "run" and tokens[:2] == ["reg", "query"]:
+            return ("reg query", resource) + tuple(tokens[3:])
+        return (operation, resource) + tuple(tokens)
+
+    def call(self, operation, args, run, reads=None, writes=None):
+        """Return run()'s result, from the memo when it is a cacheable read seen before."""
+        if reads is not None:
+            kind, resource = "read", reads
+        elif writes is not None:
+            kind, resource = "write", writes
+        else:
+            kind, resource = classify(operation, args)
+
+        if kind == "write":
+            try:
+                return run()
+            finally:
+                self.invalidate(resource)
+        if kind != "read":
+            with self._lock:
+                self.uncached += 1
+            return run()
+
+        key = self._key(operation, args, resource)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                cached = self._entries.get(key)
+                if cached is not None:
+                    self.hits += 1
+                    return cached[1]
+                self.misses += 1
+                generation = self._generation
+
+            result = run()
+            # Killed or timed-out commands say nothing about the resource
+            if result.returncode is not None and not getattr(result, "interrupted", False):
+                with self._lock:
+                    # A write that finished while we were reading may have changed the answer
+                    if generation == self._generation:
+                        self._entries[key] = (resource, result)
+            return result
+
+    def invalidate(self, resource=ALL):
+        with self._lock:
+            self._generation += 1
+            stale = [k for k, (res, _) in self._entries.items() if affects(resource, res)]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "invalidations": self.invalidations,
+                    "uncached": self.uncached, "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0}
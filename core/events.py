@@ -0,0 +1,177 @@
+import atexit
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+DURABILITY_MODES = ("none", "batch", "run")
+
+
+class JsonlEventSink:
+    """
+    Run-scoped JSONL writer for the Wazuh event log.
+
+    The file is opened once and events are buffered until `buffer_events`
+    lines are pending or `flush_interval` seconds have passed since the last
+    write; a timer flushes a buffer that is still pending after
+    `flush_interval` even if no further event arrives. Durability:
+      - none:  hand batches to Python's file buffer, flush only on close
+      - batch: flush every batch to the OS (default)
+      - run:   like batch, plus fsync when the run ends
+    With max_bytes set the file is rotated by rename (path -> path.1 ...),
+    which Wazuh's logcollector follows like any logrotate-style rotation.
+
+    The sink is also registered with atexit, so buffered events are written
+    even if the run dies with an exception. Like the old per-event writer,
+    it never raises to the caller; failed rotations and writes are printed
+    as warnings and counted in `events_dropped`.
+    """
+
+    def __init__(self, path, buffer_events=100, flush_interval=1.0, durability="batch",
+                 max_bytes=0, backups=5):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"durability must be one of {', '.join(DURABILITY_MODES)}")
+        self.path = Path(path)
+        self.buffer_events = max(1, int(buffer_events))
+        self.flush_interval = float(flush_interval)
+        self.durability = durability
+        self.max_bytes = int(max_bytes or 0)
+        self.backups = max(1, int(backups))
+
+        self.events_written = 0
+        self.events_dropped = 0
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._file = None
+        self._size = 0
+        self._closed = False
+        self._timer = None
+        self._lock = threading.RLock()
+        atexit.register(self.close)
+
+    @classmethod
+    def from_config(cls, path, config):
+        opts = config.get('general', {}).get('events', {}) or {}
+        return cls(path, **{k: v for k, v in opts.items()
+                            if k in ("buffer_events", "flush_interval", "durability", "max_bytes", "backups")})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    # -------------------------
+    # Writing
+    # -------------------------
+    def emit(self, event):
+        try:
+            line = json.dumps(event, ensure_ascii=False) + "\n"
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            if self._closed:
+                return
+            self._buffer.append(line)
+            if (len(self._buffer) >= self.buffer_events
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self.flush()
+            elif self._timer is None:
+                # A quiet phase (a long check, an agent waiting) must not hold events back
+                self._timer = threading.Timer(self.flush_interval, self._timed_flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            self._cancel_timer()
+            if not self._buffer:
+                return
+            data = "".join(self._buffer)
+            count = len(self._buffer)
+            self._buffer.clear()
+            self._last_flush = time.monotonic()
+            try:
+                self._write(data)
+                self.events_written += count
+            except Exception as e:
+                # Never break hardening execution because logging failed
+                self.events_dropped += count
+                print(f"[WARN] Could not write {count} events to {self.path}: {e}")
+
+    def checkpoint(self):
+        """End of one run for a sink that outlives it (agent mode): flush, and fsync with durability run."""
+        with self._lock:
+            self.flush()
+            if self.durability != "run" or self._file is None:
+                return
+            try:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except Exception:
+                pass
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self.flush()
+            self._closed = True
+            atexit.unregister(self.close)
+            if self._file is None:
+                return
+            try:
+                if self.durability == "run":
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+                self._file.close()
+            except Exception:
+                pass
+            self._file = None
+
+    # -------------------------
+    # Internals
+    # -------------------------
+    def _timed_flush(self):
+        with self._lock:
+            self._timer = None
+            if not self._closed:
+                self.flush()
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("a", encoding="utf-8")
+        self._size = self._file.tell()
+
+    def _write(self, data):
+        encoded_size = len(data.encode("utf-8"))
+        if self._file is None:
+            self._open()
+        if self.max_bytes and self._size and self._size + encoded_size > self.max_bytes:
+            self._rotate()
+
+        self._file.write(data)
+        self._size += encoded_size
+        if self.durability != "none":
+            self._file.flush()
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        try:
+            for i in range(self.backups - 1, 0, -1):
+                src = self.path.with_name(f"{self.path.name}.{i}")
+                if src.exists():
+                    os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        except OSError as e:
+            # e.g. the file is held open by another process: keep appending to it
+            print(f"[WARN] Could not rotate {self.path}: {e}")
+        self._open()
@@ -0,0 +1,189 @@
+import asyncio
+import atexit
+import locale
+import os
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_TIMEOUT = 300.0
+
+
+class CommandResult(subprocess.CompletedProcess):
+    """
+    CompletedProcess plus `interrupted`: True when the executor killed the
+    command (timeout) or something else killed it (negative return code).
+    Its output then says nothing about the system, whatever the exit code.
+    """
+
+    def __init__(self, args, returncode, stdout=None, stderr=None, interrupted=False):
+        super().__init__(args, returncode, stdout, stderr)
+        self.interrupted = bool(interrupted) or (returncode is not None and returncode < 0)
+
+
+class CommandExecutor:
+    """
+    asyncio subprocess runner shared by a backend.
+
+    Commands run on an event loop in a background thread, at most
+    `max_concurrency` at a time. A command that outlives its timeout is
+    killed and returned as a failed, interrupted CommandResult; a cancelled
+    call kills its child too. Synchronous callers (every existing module)
+    use run(), which blocks the calling thread only; coroutines use
+    run_async() and can gather several commands at once.
+    """
+
+    def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY, timeout=DEFAULT_TIMEOUT, history=100):
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.timeout = float(timeout) if timeout else None
+
+        # Latency instrumentation: running totals plus the most recent calls
+        self.calls = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.recent = deque(maxlen=history)   # (command, seconds, returncode)
+
+        self._loop = None
+        self._thread = None
+        self._semaphore = None
+        self._lock = threading.Lock()
+
+    # -------------------------
+    # Event loop thread
+    # -------------------------
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                ready = threading.Event()
+
+                def serve():
+                    self._loop = asyncio.new_event_loop()
+                    asyncio.set_event_loop(self._loop)
+                    self._semaphore = asyncio.Semaphore(self.max_concurrency)
+                    ready.set()
+                    self._loop.run_forever()
+
+                self._thread = threading.Thread(target=serve, name="command-executor", daemon=True)
+                self._thread.start()
+                ready.wait()
+                atexit.register(self.close)
+            return self._loop
+
+    def close(self):
+        """Cancel whatever is still running and stop the loop thread."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        atexit.unregister(self.close)
+
+        async def shutdown():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        try:
+            asyncio.run_coroutine_threadsafe(shutdown(), loop).result(timeout=10)
+        except Exception:
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=10)
+
+    def call(self, coro):
+        """Run a coroutine on the executor loop and wait for it (the sync facade)."""
+        loop = self._ensure_loop()
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("Blocking call from inside the executor loop; await the coroutine instead")
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result()
+        except BaseException:
+            # KeyboardInterrupt and friends: cancelling the task kills its child
+            future.cancel()
+            raise
+
+    # -------------------------
+    # Commands
+    # -------------------------
+    def run(self, command, timeout=None):
+        return self.call(self.run_async(command, timeout))
+
+    async def run_async(self, command, timeout=None):
+        """Run one shell command; returns a CommandResult (a CompletedProcess, as from subprocess.run())."""
+        if self._semaphore is None:
+            self._ensure_loop()
+        timeout = self.timeout if timeout is None else timeout
+        async with self._semaphore:
+            start = time.perf_counter()
+            # Own process group, so a timeout kills the shell and everything it started
+            proc = await asyncio.create_subprocess_shell(
+                command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                **({} if os.name == "nt" else {"start_new_session": True}))
+            try:
+                stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+                result = CommandResult(command, proc.returncode, _decode(stdout), _decode(stderr))
+            except asyncio.TimeoutError:
+                await _kill(proc)
+                self.timeouts += 1
+                # taskkill leaves a non-negative exit code, so the flag is set explicitly
+                result = CommandResult(
+                    command, proc.returncode if proc.returncode is not None else -1, "",
+                    f"Command timed out after {timeout:g}s and was killed", interrupted=True)
+            except asyncio.CancelledError:
+                await _kill(proc)
+                self.cancelled += 1
+                raise
+            finally:
+                self._record(command, time.perf_counter() - start, proc.returncode)
+        return result
+
+    async def gather(self, commands, timeout=None):
+        """Run several commands concurrently (still bounded by the semaphore); results in order."""
+        return await asyncio.gather(*(self.run_async(c, timeout) for c in commands))
+
+    def _record(self, command, seconds, returncode):
+        self.calls += 1
+        self.total_s += seconds
+        self.max_s = max(self.max_s, seconds)
+        self.recent.append((command, seconds, returncode))
+
+    def stats(self):
+        return {"calls": self.calls, "timeouts": self.timeouts, "cancelled": self.cancelled,
+                "total_s": round(self.total_s, 6), "max_s": round(self.max_s, 6),
+                "mean_s": round(self.total_s / self.calls, 6) if self.calls else 0.0}
+
+
+def _decode(data):
+    # What subprocess.run(text=True) returned: locale code page, universal
+    # newlines; never fail on odd bytes
+    text = (data or b"").decode(locale.getpreferredencoding(False), errors="replace")
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+async def _kill(proc):
+    """Kill a command's whole process tree (the shell alone would leave its children holding the pipes)."""
+    if proc.returncode is None:
+        try:
+            if os.name == "nt":
+                killer = await asyncio.create_subprocess_exec(
+                    "taskkill", "/F", "/T", "/PID", str(proc.pid),
+                    stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+                await killer.wait()
+            else:
+                os.killpg(proc.pid, signal.SIGKILL)
+        except (OSError, ProcessLookupError):
+            pass
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            pass
+    # Collect the child and close its pipes so nothing lingers
+    await proc.communicate()
@@ -0,0 +1,175 @@
+import os
+import re
+import shutil
+import tempfile
+import threading
+from functools import lru_cache
+
+from core.base_module import BaseModule
+from core.inf_document import sniff_encoding
+
+
+@lru_cache(maxsize=512)
+def compile_pattern(pattern):
+    """Edit patterns are line-oriented (^/$ match at every line), compiled once per process."""
+    return re.compile(pattern, re.MULTILINE)
+
+
+class TextFile:
+    """A text file decoded once: its content plus how to write it back byte-for-byte compatible."""
+
+    def __init__(self, path, raw):
+        self.path = path
+        self.raw = raw
+        self.encoding, self.bom = sniff_encoding(raw)
+        self.content = raw[len(self.bom):].decode(self.encoding)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls(path, f.read())
+
+    def encode(self, content):
+        return self.bom + content.encode(self.encoding)
+
+
+def is_set(content, pattern, replacement):
+    """True if pattern matches and every line it matches already equals the replacement."""
+    # (a plain substring check would treat "Size = 24" as set when the file says "Size = 240")
+    matches = [m.group(0).strip() for m in compile_pattern(pattern).finditer(content)]
+    return bool(matches) and all(m == replacement.strip() for m in matches)
+
+
+def apply_edits(content, edits):
+    """
+    Apply [(pattern, replacement)] to content in order, each edit seeing the
+    text the previous ones produced (exactly what one update_file_content
+    call per edit did); returns (new content, [number of matches per edit]).
+    Edits whose pattern matches nothing are appended as a new line.
+    """
+    counts = []
+    for pattern, replacement in edits:
+        content, count = compile_pattern(pattern).subn(replacement, content)
+        if count == 0:
+            content += f"\n{replacement}"
+        counts.append(count)
+    return content, counts
+
+
+def atomic_write(path, data):
+    """Replace path with data via a temp file in the same directory and a rename."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        shutil.copymode(path, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class FileEditBatch(BaseModule):
+    """
+    Run-scoped collector for text file edits.
+
+    Each file is read and decoded once per run. Controls stage
+    (pattern, replacement) edits; commit() applies every edit of a file in
+    one pass and writes it back once, atomically, then reports per edit on
+    the control that staged it.
+    """
+
+    def __init__(self, config):
+        super().__init__(name="File Editor", config=config)
+        self.id = "file-edits"
+        self._files = {}        # abspath -> TextFile (as read this run)
+        self._pending = {}      # abspath -> [(pattern, replacement, module)]
+        self._committed = set() # abspaths written by commit() this run
+        self._lock = threading.RLock()
+
+    def read(self, path):
+        """The file as of the start of this run (read once); None if it does not exist."""
+        path = os.path.abspath(path)
+        with self._lock:
+            if path not in self._files:
+                try:
+                    self._files[path] = TextFile.load(path)
+                except FileNotFoundError:
+                    return None
+                self.count(bytes_read=len(self._files[path].raw))
+            return self._files[path]
+
+    def stage(self, module, path, pattern, replacement):
+        compile_pattern(pattern)    # a bad pattern fails in the staging control, not the commit
+        with self._lock:
+            self._pending.setdefault(os.path.abspath(path), []).append((pattern, replacement, module))
+
+    def pending(self):
+        """{path: [(pattern, replacement, module)]} staged for commit()."""
+        with self._lock:
+            return {path: list(edits) for path, edits in self._pending.items()}
+
+    def originals(self):
+        """[(path, original bytes)] of every file with staged edits."""
+        with self._lock:
+            return [(path, self._files[path].raw) for path in self._pending]
+
+    def committed(self):
+        """Paths commit() has written this run."""
+        with self._lock:
+            return set(self._committed)
+
+    def discard(self, reason):
+        """Drop every staged edit without writing it."""
+        with self._lock:
+            for path, edits in self._pending.items():
+                for _, replacement, module in edits:
+                    module.log_warn(f"{path}: '{replacement.strip()}' not applied: {reason}")
+            self._pending.clear()
+
+    def commit_units(self):
+        """[(commit, name, writes)] for the apply-phase plan: one unit per file, so files are written in parallel."""
+        with self._lock:
+            paths = list(self._pending)
+        return [(lambda path=path: self.commit_file(path), "file:" + path, {"file:" + path}) for path in paths]
+
+    def commit(self):
+        with self._lock:
+            paths = list(self._pending)
+        ok = True
+        for path in paths:
+            ok = self.commit_file(path) and ok
+        return ok
+
+    def commit_file(self, path):
+        """Apply one file's staged edits in one atomic write."""
+        with self._lock:
+            edits = self._pending.pop(path, None)
+            document = self._files.get(path)
+        if not edits:
+            return True
+
+        content, counts = apply_edits(document.content, [(p, r) for p, r, _ in edits])
+        data = document.encode(content)
+        try:
+            atomic_write(path, data)
+        except OSError as e:
+            for _, replacement, module in edits:
+                module.log_error(f"Failed to update {path} to '{replacement.strip()}': {e}")
+            return False
+
+        self.count(bytes_written=len(data))
+        with self._lock:
+            self._files[path] = TextFile(path, data)
+            self._committed.add(path)
+        for (pattern, replacement, module), count in zip(edits, counts):
+            if count == 0:
+                module.logger.warning(f"Pattern '{pattern}' not found. Appending to end.")
+            module.log_change(f"Updated file to: {replacement.strip()}")
+        if len(edits) > 1:
+            self.log_change(f"Applied {len(edits)} edit(s) to {path} in one write")
+        return True
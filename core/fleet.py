@@ -0,0 +1,340 @@
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+
+from core.events import JsonlEventSink
+
+MAIN_SCRIPT = Path(__file__).resolve().parent.parent / "main.py"
+DEFAULT_MAX_PARALLEL = 16
+DEFAULT_TIMEOUT = 900.0
+
+
+def _iso_utc_now():
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class FleetHost:
+    """One inventory target and how to run the engine on it."""
+
+    def __init__(self, name, transport="local", config=None, args=None, env=None,
+                 timeout=DEFAULT_TIMEOUT, retries=0):
+        self.name = str(name)
+        self.transport = transport
+        self.config = config
+        self.args = list(args or [])
+        self.env = {str(k): str(v) for k, v in (env or {}).items()}
+        self.timeout = float(timeout)
+        self.retries = int(retries)
+
+    @classmethod
+    def from_inventory(cls, raw, defaults):
+        if isinstance(raw, str):
+            raw = {"name": raw}
+        if not isinstance(raw, dict) or not raw.get("name"):
+            raise ValueError(f"Inventory host entries need a name, got {raw!r}")
+        merged = dict(defaults, **raw)
+        merged["env"] = dict(defaults.get("env") or {}, **(raw.get("env") or {}))
+        unknown = set(merged) - {"name", "transport", "config", "args", "env", "timeout", "retries"}
+        if unknown:
+            raise ValueError(f"Host {raw['name']}: unknown fields: {', '.join(sorted(unknown))}")
+        return cls(**merged)
+
+
+class HostResult:
+    """Outcome of one host: final status plus per-result event counts (never the events)."""
+
+    def __init__(self, name, status, attempts, duration_s, detail=None, results=None):
+        self.name = name
+        self.status = status        # OK / FAILED / TIMEOUT
+        self.attempts = attempts
+        self.duration_s = duration_s
+        self.detail = detail
+        self.results = results or Counter()
+
+
+# -------------------------
+# Transports
+# -------------------------
+class Transport:
+    """
+    Runs the hardening engine on one host. run() writes the host's JSONL
+    events to spool_path and returns (status, detail): status is OK, FAILED
+    or TIMEOUT. It must stop (and clean up) once timeout seconds have passed.
+    """
+    name = "base"
+
+    def run(self, host, spool_path, timeout, attempt, run_id):
+        raise NotImplementedError
+
+
+class LocalProcessTransport(Transport):
+    """Runs main.py in a child process on this machine, with the host's config, args and env."""
+    name = "local"
+
+    def __init__(self, python=None, script=MAIN_SCRIPT):
+        self.python = python or sys.executable
+        self.script = str(script)
+
+    def run(self, host, spool_path, timeout, attempt, run_id):
+        command = [self.python, self.script] + ([host.config] if host.config else []) + host.args
+        env = dict(os.environ, **host.env)
+        env.update(HARDENING_JSONL_PATH=spool_path, HARDENING_RUN_ID=run_id)
+        try:
+            # subprocess.run kills the child when the timeout expires
+            proc = subprocess.run(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                  text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return "TIMEOUT", f"No result after {timeout:g}s"
+        except OSError as e:
+            return "FAILED", str(e)
+        if proc.returncode != 0:
+            lines = (proc.stderr or "").strip().splitlines()
+            return "FAILED", f"Exit code {proc.returncode}" + (f": {lines[-1]}" if lines else "")
+        return "OK", None
+
+
+class SimulatedTransport(Transport):
+    """
+    Stand-in host for exercising the orchestrator: writes `events` synthetic
+    control events after `latency` seconds, failing or hanging at the given
+    rates. Results are seeded by host name and attempt, so runs repeat.
+    """
+    name = "simulated"
+    RESULTS = ("OK", "OK", "OK", "CHANGED", "WARN", "ERROR")
+
+    def __init__(self, events=50, latency=0.0, failure_rate=0.0, hang_rate=0.0, seed=0):
+        self.events = int(events)
+        self.latency = float(latency)
+        self.failure_rate = float(failure_rate)
+        self.hang_rate = float(hang_rate)
+        self.seed = seed
+
+    def run(self, host, spool_path, timeout, attempt, run_id):
+        rng = random.Random(f"{self.seed}:{host.name}:{attempt}")
+        roll = rng.random()
+        if roll < self.hang_rate:
+            time.sleep(timeout)
+            return "TIMEOUT", f"No result after {timeout:g}s"
+        time.sleep(min(self.latency, timeout))
+        if roll < self.hang_rate + self.failure_rate:
+            return "FAILED", "Simulated engine failure"
+
+        with open(spool_path, "w", encoding="utf-8") as f:
+            for i in range(self.events):
+                event = {"timestamp": _iso_utc_now(),
+                         "hardening": {"repo": "simulated", "os": "windows", "run_id": run_id, "mode": "enforce",
+                                       "cis_id": f"S.{i}", "title": f"Simulated control {i}",
+                                       "result": rng.choice(self.RESULTS), "message": "simulated",
+                                       "dry_run": False}}
+                f.write(json.dumps(event) + "\n")
+        return "OK", None
+
+
+TRANSPORTS = {
+    "local": LocalProcessTransport,
+    "simulated": SimulatedTransport,
+}
+
+
+# -------------------------
+# Orchestration
+# -------------------------
+class FleetRunner:
+    """
+    Runs the engine on many hosts with at most `max_parallel` at a time.
+
+    Each attempt spools the host's events to a temporary file; only the
+    final attempt's events are streamed, line by line, into the merged sink
+    with the host name added. The runner keeps per-host counters, never the
+    events, so memory does not grow with the number of events.
+    """
+
+    def __init__(self, hosts, sink, transports=None, max_parallel=DEFAULT_MAX_PARALLEL, retry_delay=1.0,
+                 run_id=None, spool_dir=None):
+        self.hosts = list(hosts)
+        self.sink = sink
+        self.transports = transports or {name: cls() for name, cls in TRANSPORTS.items()}
+        self.max_parallel = max(1, int(max_parallel))
+        self.retry_delay = float(retry_delay)
+        self.run_id = run_id or f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.spool_dir = spool_dir
+        self._print_lock = threading.Lock()
+
+    def run(self):
+        """Run every host; returns the list of HostResults in inventory order."""
+        unknown = {h.transport for h in self.hosts} - set(self.transports)
+        if unknown:
+            raise ValueError(f"Unknown transport(s): {', '.join(sorted(unknown))}")
+
+        started = time.perf_counter()
+        results = {}
+        with tempfile.TemporaryDirectory(prefix="hardening-fleet-", dir=self.spool_dir) as spool_dir:
+            with ThreadPoolExecutor(max_workers=self.max_parallel) as pool:
+                futures = {pool.submit(self._run_host, host, spool_dir): host for host in self.hosts}
+                for future in as_completed(futures):
+                    result = future.result()
+                    results[result.name] = result
+                    self._report(result)
+
+        ordered = [results[h.name] for h in self.hosts]
+        self._emit_summary(ordered, time.perf_counter() - started)
+        return ordered
+
+    def _run_host(self, host, spool_dir):
+        transport = self.transports[host.transport]
+        spool_path = os.path.join(spool_dir, f"{uuid.uuid4().hex}.jsonl")
+        host_run_id = f"{self.run_id}-{host.name}"
+        started = time.perf_counter()
+        status, detail, attempt = "FAILED", None, 0
+
+        for attempt in range(1, host.retries + 2):
+            if os.path.exists(spool_path):
+                os.remove(spool_path)
+            try:
+                status, detail = transport.run(host, spool_path, host.timeout, attempt, host_run_id)
+            except Exception as e:
+                status, detail = "FAILED", f"Transport error: {e}"
+            if status == "OK":
+                break
+            if attempt <= host.retries:
+                time.sleep(self.retry_delay * attempt)
+
+        counts = self._merge(host, spool_path)
+        if os.path.exists(spool_path):
+            os.remove(spool_path)
+        return HostResult(host.name, status, attempt, time.perf_counter() - started, detail, counts)
+
+    def _merge(self, host, spool_path):
+        """Stream one host's spooled events into the merged sink; returns result counts."""
+        counts = Counter()
+        if not os.path.exists(spool_path):
+            return counts
+        with open(spool_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                hardening = event.setdefault("hardening", {})
+                hardening["host"] = host.name
+                counts[hardening.get("result", "SUCCESS")] += 1
+                self.sink.emit(event)
+        return counts
+
+    def _report(self, result):
+        self.sink.emit({
+            "timestamp": _iso_utc_now(),
+            "hardening": {"run_id": self.run_id, "host": result.name, "cis_id": "host", "title": "Fleet host",
+                          "result": result.status, "message": result.detail or f"{sum(result.results.values())} events",
+                          "attempts": result.attempts, "duration_ms": round(result.duration_s * 1000, 3),
+                          "results": dict(result.results)},
+        })
+        with self._print_lock:
+            print(f"[{result.status}] [{result.name}]: {result.attempts} attempt(s), "
+                  f"{result.duration_s:.1f}s{' - ' + result.detail if result.detail else ''}")
+
+    def _emit_summary(self, results, duration_s):
+        statuses = Counter(r.status for r in results)
+        events = Counter()
+        for r in results:
+            events.update(r.results)
+        failed = [r.name for r in results if r.status != "OK"]
+        message = (f"{len(results)} hosts in {duration_s:.1f}s: "
+                   + ", ".join(f"{n} {s}" for s, n in sorted(statuses.items()))
+                   + f"; {sum(events.values())} events")
+        print(f"[INFO] {message}")
+        self.sink.emit({
+            "timestamp": _iso_utc_now(),
+            "hardening": {"run_id": self.run_id, "cis_id": "fleet", "title": "Fleet summary", "result": "SUMMARY",
+                          "message": message, "hosts": dict(statuses), "results": dict(events),
+                          "failed_hosts": failed, "duration_ms": round(duration_s * 1000, 3)},
+        })
+
+
+# -------------------------
+# Inventory + CLI
+# -------------------------
+def load_inventory(path):
+    """
+    Read an inventory file (YAML or JSON):
+
+        fleet:    {max_parallel: 16, retry_delay: 2}
+        defaults: {transport: local, config: config.yaml, timeout: 900, retries: 1, args: [--audit]}
+        transports:
+          simulated: {events: 50, latency: 0.5}
+        hosts:
+          - web01
+          - {name: db01, env: {HARDENING_BACKEND: simulated}}
+
+    Returns (hosts, fleet options, transport options).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if str(path).endswith(".json"):
+            data = json.load(f)
+        elif yaml is None:
+            raise ValueError("PyYAML is not installed. Install it with: pip install pyyaml")
+        else:
+            data = yaml.safe_load(f) or {}
+    defaults = data.get("defaults") or {}
+    hosts = [FleetHost.from_inventory(raw, defaults) for raw in data.get("hosts") or []]
+    names = [h.name for h in hosts]
+    if len(set(names)) != len(names):
+        raise ValueError("Inventory host names must be unique")
+    return hosts, data.get("fleet") or {}, data.get("transports") or {}
+
+
+def build_transports(options):
+    transports = {}
+    for name, cls in TRANSPORTS.items():
+        transports[name] = cls(**(options.get(name) or {}))
+    return transports
+
+
+def cli(argv=None):
+    """`main.py fleet`: run an inventory and write one merged JSONL stream."""
+    parser = argparse.ArgumentParser(prog="main.py fleet", description=cli.__doc__)
+    parser.add_argument("inventory", nargs="?", help="inventory file (YAML or JSON)")
+    parser.add_argument("--output", help="merged JSONL event stream (default: fleet-<run id>.jsonl)")
+    parser.add_argument("--max-parallel", type=int, help=f"hosts run at once (default: {DEFAULT_MAX_PARALLEL})")
+    parser.add_argument("--simulate", type=int, metavar="N", help="add N simulated hosts (for testing)")
+    args = parser.parse_args(argv)
+
+    hosts, fleet_opts, transport_opts = [], {}, {}
+    try:
+        if args.inventory:
+            hosts, fleet_opts, transport_opts = load_inventory(args.inventory)
+        if args.simulate:
+            hosts += [FleetHost(f"sim-{i:05d}", transport="simulated") for i in range(args.simulate)]
+        transports = build_transports(transport_opts)
+    except (OSError, ValueError, TypeError) as e:
+        print(f"CRITICAL: Invalid inventory: {e}")
+        return 1
+    if not hosts:
+        parser.error("no hosts: pass an inventory and/or --simulate N")
+
+    run_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    output = args.output or f"fleet-{run_id}.jsonl"
+    max_parallel = args.max_parallel or fleet_opts.get("max_parallel", DEFAULT_MAX_PARALLEL)
+    print(f"[INFO] Fleet run {run_id}: {len(hosts)} hosts, {max_parallel} at a time -> {output}")
+
+    with JsonlEventSink(output) as sink:
+        runner = FleetRunner(hosts, sink, transports, max_parallel=max_parallel,
+                             retry_delay=fleet_opts.get("retry_delay", 1.0), run_id=run_id)
+        results = runner.run()
+    return 0 if all(r.status == "OK" for r in results) else 2
@@ -0,0 +1,206 @@
+import codecs
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# BOMs we recognise, longest first so UTF-32 is not mistaken for UTF-16.
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32-le"),
+    (codecs.BOM_UTF32_BE, "utf-32-be"),
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+
+
+def sniff_encoding(data: bytes) -> Tuple[str, bytes]:
+    """
+    Return (encoding, bom) for raw file bytes.
+    secedit writes UTF-16LE with a BOM; hand-written templates are usually UTF-8.
+    """
+    for bom, encoding in _BOMS:
+        if data.startswith(bom):
+            return encoding, bom
+    # BOM-less UTF-16LE still has a NUL in every second byte of ASCII text
+    if len(data) >= 4 and data[1] == 0 and data[3] == 0:
+        return "utf-16-le", b""
+    return "utf-8", b""
+
+
+class InfDocument:
+    """
+    Parsed security template (INF) with indexed section/key access.
+
+    The file is parsed once into its original lines plus an index of
+    {section: {key: line number}}, so lookups and in-place edits are O(1).
+    New keys are queued per section and spliced in on serialization, which
+    keeps any number of edits to a single pass over the document.
+    Section and key names are matched case-insensitively like secedit does.
+    """
+
+    def __init__(self, lines: Optional[List[str]] = None, encoding: str = "utf-16-le",
+                 bom: bytes = codecs.BOM_UTF16_LE, newline: str = "\r\n"):
+        self.encoding = encoding
+        self.bom = bom
+        self.newline = newline
+        self._lines: List[str] = []
+        self._sections: Dict[str, Dict[str, int]] = {}   # folded section -> folded key -> line
+        self._section_names: Dict[str, str] = {}          # folded section -> original name
+        self._section_end: Dict[str, int] = {}            # folded section -> last line index
+        self._appended: Dict[str, List[str]] = {}         # folded section -> new "key = value" lines
+        self._appended_keys: Dict[str, Dict[str, int]] = {}
+        self._new_sections: List[str] = []
+        self._current: Optional[str] = None
+        self.dirty = False
+        for line in lines or []:
+            self._add_line(line)
+
+    # -------------------------
+    # Parsing / serialization
+    # -------------------------
+    @classmethod
+    def parse(cls, data: bytes) -> "InfDocument":
+        encoding, bom = sniff_encoding(data)
+        text = data[len(bom):].decode(encoding)
+        newline = "\r\n" if "\r\n" in text else "\n"
+        return cls(text.splitlines(), encoding=encoding, bom=bom, newline=newline)
+
+    @classmethod
+    def load(cls, path) -> "InfDocument":
+        with open(path, "rb") as f:
+            return cls.parse(f.read())
+
+    def serialize(self) -> bytes:
+        return self.bom + self.to_text().encode(self.encoding)
+
+    def save(self, path) -> int:
+        data = self.serialize()
+        with open(path, "wb") as f:
+            f.write(data)
+        self.dirty = False
+        return len(data)
+
+    def to_text(self) -> str:
+        if not self._appended:
+            out = self._lines
+        else:
+            # Splice queued keys after the last line of their section
+            inserts = {self._section_end[s]: extra for s, extra in self._appended.items()
+                       if s in self._section_end}
+            out = []
+            for i, line in enumerate(self._lines):
+                out.append(line)
+                if i in inserts:
+                    out.extend(inserts[i])
+            for folded in self._new_sections:
+                out.append(f"[{self._section_names[folded]}]")
+                out.extend(self._appended.get(folded, []))
+        return self.newline.join(line for line in out if line is not None) + self.newline
+
+    # -------------------------
+    # Lookup
+    # -------------------------
+    def sections(self) -> List[str]:
+        return list(self._section_names.values())
+
+    def has_section(self, section: str) -> bool:
+        return section.casefold() in self._section_names
+
+    def get(self, section: str, key: str, default: Optional[str] = None) -> Optional[str]:
+        folded = section.casefold()
+        fkey = key.casefold()
+        idx = self._sections.get(folded, {}).get(fkey)
+        if idx is not None:
+            return self._split(self._lines[idx])[1]
+        pending = self._appended_keys.get(folded, {}).get(fkey)
+        if pending is not None:
+            return self._split(self._appended[folded][pending])[1]
+        return default
+
+    def items(self, section: str) -> Iterable[Tuple[str, str]]:
+        folded = section.casefold()
+        for idx in self._sections.get(folded, {}).values():
+            yield self._split(self._lines[idx])
+        for line in self._appended.get(folded, []):
+            if line is not None:
+                yield self._split(line)
+
+    def section_dict(self, section: str) -> Dict[str, str]:
+        return dict(self.items(section))
+
+    # -------------------------
+    # Editing
+    # -------------------------
+    def set(self, section: str, key: str, value) -> bool:
+        """Set one key. Returns True if the document changed."""
+        value = str(value).strip()
+        if self.get(section, key) == value:
+            return False
+
+        folded = section.casefold()
+        fkey = key.casefold()
+        idx = self._sections.get(folded, {}).get(fkey)
+        if idx is not None:
+            original_key = self._split(self._lines[idx])[0]
+            self._lines[idx] = f"{original_key} = {value}"
+        else:
+            if folded not in self._section_names:
+                self._section_names[folded] = section
+                self._sections[folded] = {}
+                self._new_sections.append(folded)
+            extra = self._appended.setdefault(folded, [])
+            keys = self._appended_keys.setdefault(folded, {})
+            if fkey in keys:
+                extra[keys[fkey]] = f"{key} = {value}"
+            else:
+                keys[fkey] = len(extra)
+                extra.append(f"{key} = {value}")
+        self.dirty = True
+        return True
+
+    def delete(self, section: str, key: str) -> bool:
+        """Remove one key. Returns True if it existed."""
+        folded = section.casefold()
+        fkey = key.casefold()
+        idx = self._sections.get(folded, {}).pop(fkey, None)
+        if idx is not None:
+            self._lines[idx] = None
+        else:
+            pending = self._appended_keys.get(folded, {}).pop(fkey, None)
+            if pending is None:
+                return False
+            self._appended[folded][pending] = None
+        self.dirty = True
+        return True
+
+    def update(self, edits: Dict[Tuple[str, str], object]) -> List[Tuple[str, str]]:
+        """Apply many {(section, key): value} edits; returns the keys that changed."""
+        return [(section, key) for (section, key), value in edits.items()
+                if self.set(section, key, value)]
+
+    # -------------------------
+    # Internals
+    # -------------------------
+    @staticmethod
+    def _split(line: str) -> Tuple[str, str]:
+        key, _, value = line.partition("=")
+        return key.strip(), value.strip()
+
+    def _add_line(self, line: str) -> None:
+        idx = len(self._lines)
+        self._lines.append(line)
+        stripped = line.strip()
+        if stripped.startswith("[") and stripped.endswith("]"):
+            name = stripped[1:-1]
+            folded = name.casefold()
+            self._section_names.setdefault(folded, name)
+            self._sections.setdefault(folded, {})
+            self._current = folded
+            self._section_end[folded] = idx
+            return
+
+        current = self._current
+        if current is None or not stripped:
+            return
+        self._section_end[current] = idx
+        if "=" in stripped and not stripped.startswith(";"):
+            key = stripped.partition("=")[0].strip()
+            self._sections[current].setdefault(key.casefold(), idx)
@@ -0,0 +1,154 @@
+import ast
+import hashlib
+import json
+import os
+from pathlib import Path
+
+MANIFEST_VERSION = 2
+
+
+class ManifestEntry:
+    """What the runner needs to know about a module file without importing it."""
+
+    def __init__(self, path, mtime_ns, size, sha256, cis_id=None, class_name=None, tags=None):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.sha256 = sha256
+        self.cis_id = cis_id
+        self.class_name = class_name
+        self.tags = list(tags or [])
+
+    def to_dict(self):
+        return {"mtime_ns": self.mtime_ns, "size": self.size, "sha256": self.sha256,
+                "cis_id": self.cis_id, "class_name": self.class_name, "tags": self.tags}
+
+
+def cis_id_from_filename(module_path):
+    """Control id implied by a module's file name: "1_1_1" -> "1.1.1" (numeric ids only)."""
+    stem = Path(module_path).stem
+    if any(ch.isdigit() for ch in stem):
+        return stem.replace("_", ".")
+    return stem
+
+
+def _literal_tags(node):
+    try:
+        value = ast.literal_eval(node)
+    except (ValueError, TypeError):
+        return None
+    if isinstance(value, (list, tuple)) and all(isinstance(tag, str) for tag in value):
+        return list(value)
+    return None
+
+
+def scan_module_source(source):
+    """
+    Find the control class, its id and its tags in module source, without
+    executing it. Looks for the first class deriving from a *Module base, a
+    literal `self.id = "..."` assignment inside it and a literal list of
+    strings assigned to `tags` (class attribute) or `self.tags`.
+    Returns (cis_id, class_name, tags).
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return None, None, []
+
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        bases = [b.id if isinstance(b, ast.Name) else getattr(b, "attr", "") for b in node.bases]
+        if not any(base.endswith("Module") for base in bases):
+            continue
+
+        cis_id = tags = None
+        for sub in ast.walk(node):
+            if not (isinstance(sub, ast.Assign) and len(sub.targets) == 1):
+                continue
+            target = sub.targets[0]
+            if (isinstance(target, ast.Attribute) and isinstance(target.value, ast.Name)
+                    and target.value.id == "self"):
+                name = target.attr
+            elif isinstance(target, ast.Name) and sub in node.body:
+                name = target.id
+            else:
+                continue
+            if (name == "id" and cis_id is None and isinstance(target, ast.Attribute)
+                    and isinstance(sub.value, ast.Constant) and isinstance(sub.value.value, str)):
+                cis_id = sub.value.value
+            elif name == "tags" and tags is None:
+                tags = _literal_tags(sub.value)
+        return cis_id, node.name, tags or []
+    return None, None, []
+
+
+class ModuleManifest:
+    """
+    Persisted index of module files keyed by path.
+
+    An entry is reused while the file's mtime and size are unchanged; otherwise
+    the file is hashed, and only re-scanned (with `ast`, never executed) when
+    the hash differs. The runner uses it to check `enabled` before importing.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._entries = {}
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != MANIFEST_VERSION:
+            return
+        for module_path, raw in data.get("modules", {}).items():
+            self._entries[module_path] = ManifestEntry(module_path, **raw)
+
+    def save(self):
+        if not self._dirty:
+            return
+        payload = {"version": MANIFEST_VERSION,
+                   "modules": {p: e.to_dict() for p, e in sorted(self._entries.items())}}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(payload, f, indent=1)
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except OSError:
+            # A read-only install just pays for the scan again next run
+            pass
+
+    def entry_for(self, module_path):
+        module_path = str(module_path)
+        st = os.stat(module_path)
+        cached = self._entries.get(module_path)
+        if cached and cached.mtime_ns == st.st_mtime_ns and cached.size == st.st_size:
+            return cached
+
+        with open(module_path, "rb") as f:
+            source = f.read()
+        digest = hashlib.sha256(source).hexdigest()
+
+        if cached and cached.sha256 == digest:
+            cached.mtime_ns, cached.size = st.st_mtime_ns, st.st_size
+        else:
+            cis_id, class_name, tags = scan_module_source(source)
+            cached = ManifestEntry(module_path, st.st_mtime_ns, st.st_size, digest, cis_id, class_name, tags)
+        self._entries[module_path] = cached
+        self._dirty = True
+        return cached
+
+    def prune(self, module_paths):
+        """Forget files that no longer exist."""
+        keep = {str(p) for p in module_paths}
+        for module_path in list(self._entries):
+            if module_path not in keep:
+                del self._entries[module_path]
+                self._dirty = True
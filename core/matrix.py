@@ -0,0 +1,291 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import argparse
+import json
+import sys
+from array import array
+from collections import Counter
+
+from core.report import (DRIFT_RESULTS, FAIL_RESULTS, NON_CONTROL_IDS, PASS_RESULTS, _id_key, iter_events,
+                         parse_time, rotated)
+
+# Cell codes, ordered so that the worst result of a control in a run wins
+MISSING, SKIPPED, PASS, DRIFT, FAIL = range(5)
+CODE_NAMES = ("", "SKIP", "PASS", "DRIFT", "FAIL")
+# Events buffered before they are folded into the matrix
+DEFAULT_CHUNK = 65536
+DEFAULT_TOP = 10
+
+
+def result_code(result):
+    if result in PASS_RESULTS:
+        return PASS
+    if result in DRIFT_RESULTS:
+        return DRIFT
+    if result in FAIL_RESULTS:
+        return FAIL
+    return SKIPPED
+
+
+def _grown(have, need):
+    return have if need <= have else max(need, have * 2, 4)
+
+
+class ComplianceMatrix:
+    """
+    Fleet results as a dense hosts x controls x runs array of int8 codes.
+
+    Runs are numbered per host in the order they appear (logs oldest first),
+    so a host's 3rd run is [h, :, 2] whatever its run_id. A cell holds the
+    worst result of that control in that run, MISSING if it was not
+    reported. Events are buffered as index triples and folded into the
+    array a chunk at a time; memory is the array plus one chunk, however
+    many events the logs hold.
+    """
+
+    def __init__(self, chunk=DEFAULT_CHUNK):
+        if np is None:
+            raise RuntimeError("NumPy is not installed. Install it with: pip install numpy")
+        self.chunk = max(1, int(chunk))
+        self.hosts = []
+        self.controls = []
+        self.titles = {}
+        self.run_ids = []           # host index -> [run_id, ...] in run order
+        self.events = 0
+        self._host_index = {}
+        self._control_index = {}
+        self._run_index = {}        # (host index, run_id) -> run number
+        self._array = np.zeros((0, 0, 0), dtype=np.int8)
+        self._pending = self._buffers()
+
+    # -------------------------
+    # Loading
+    # -------------------------
+    def add(self, record):
+        cis_id = str(record.get("cis_id", ""))
+        if cis_id in NON_CONTROL_IDS:
+            return
+
+        host = str(record.get("host") or "")
+        h = self._host_index.get(host)
+        if h is None:
+            h = self._host_index[host] = len(self.hosts)
+            self.hosts.append(host)
+            self.run_ids.append([])
+        run_id = record.get("run_id")
+        r = self._run_index.get((h, run_id))
+        if r is None:
+            r = self._run_index[(h, run_id)] = len(self.run_ids[h])
+            self.run_ids[h].append(run_id)
+        c = self._control_index.get(cis_id)
+        if c is None:
+            c = self._control_index[cis_id] = len(self.controls)
+            self.controls.append(cis_id)
+            self.titles[cis_id] = record.get("title", "")
+
+        hosts, controls, runs, codes = self._pending
+        hosts.append(h)
+        controls.append(c)
+        runs.append(r)
+        codes.append(result_code(record.get("result")))
+        self.events += 1
+        if len(codes) >= self.chunk:
+            self._fold()
+
+    def _fold(self):
+        hosts, controls, runs, codes = self._pending
+        if not codes:
+            return
+        shape = self._array.shape
+        need = (len(self.hosts), len(self.controls), max(map(len, self.run_ids)))
+        if any(n > s for n, s in zip(need, shape)):
+            # Grow geometrically, so a month of logs is copied a handful of times
+            grown = np.zeros(tuple(_grown(s, n) for s, n in zip(shape, need)), dtype=np.int8)
+            grown[:shape[0], :shape[1], :shape[2]] = self._array
+            self._array = grown
+        index = tuple(np.frombuffer(a, dtype=np.intc) for a in (hosts, controls, runs))
+        np.maximum.at(self._array, index, np.frombuffer(codes, dtype=np.int8))
+        self._pending = self._buffers()
+
+    @staticmethod
+    def _buffers():
+        # (host, control, run) indices and codes of events not folded in yet
+        return array("i"), array("i"), array("i"), array("b")
+
+    @property
+    def data(self):
+        """The hosts x controls x runs code array (a view)."""
+        self._fold()
+        runs = max(map(len, self.run_ids), default=0)
+        return self._array[:len(self.hosts), :len(self.controls), :runs]
+
+    # -------------------------
+    # Aggregates
+    # -------------------------
+    @staticmethod
+    def _rates(passed, evaluated):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(evaluated > 0, passed / evaluated, np.nan)
+
+    def control_pass_rates(self):
+        """Per control: PASS cells / evaluated (PASS, DRIFT or FAIL) cells; NaN if never evaluated."""
+        data = self.data
+        return self._rates((data == PASS).sum(axis=(0, 2)), (data >= PASS).sum(axis=(0, 2)))
+
+    def host_pass_rates(self):
+        data = self.data
+        return self._rates((data == PASS).sum(axis=(1, 2)), (data >= PASS).sum(axis=(1, 2)))
+
+    def latest(self):
+        """hosts x controls: each control's result in the newest run that evaluated it."""
+        data = self.data
+        evaluated = data >= PASS
+        if not data.size:
+            return np.zeros(data.shape[:2], dtype=np.int8)
+        last = data.shape[2] - 1 - np.argmax(evaluated[..., ::-1], axis=2)
+        newest = np.take_along_axis(data, last[..., None], axis=2)[..., 0]
+        return np.where(evaluated.any(axis=2), newest, MISSING).astype(np.int8)
+
+    def drifts(self):
+        """
+        hosts x controls: how often a control went from PASS to DRIFT or FAIL
+        between consecutive runs that evaluated it (runs that skipped it,
+        e.g. with --select, are bridged).
+        """
+        data = self.data
+        if data.shape[2] < 2:
+            return np.zeros(data.shape[:2], dtype=np.int64)
+        evaluated = data >= PASS
+        dtype = np.int16 if data.shape[2] < 2 ** 15 else np.int32
+        # Index of the latest evaluated run at or before each run, carried forward
+        carried = np.where(evaluated, np.arange(data.shape[2], dtype=dtype), 0).astype(dtype)
+        np.maximum.accumulate(carried, axis=2, out=carried)
+        previous = np.take_along_axis(data, carried, axis=2)[..., :-1]
+        return ((previous == PASS) & evaluated[..., 1:] & (data[..., 1:] > PASS)).sum(axis=2)
+
+    def offenders(self, top=DEFAULT_TOP, latest=None, drifts=None):
+        """
+        Worst hosts and controls: ranked by controls (hosts) that are not
+        passing in their latest result, then by drift count.
+        """
+        failing = (self.latest() if latest is None else latest) > PASS
+        drifts = self.drifts() if drifts is None else drifts
+        hosts = self._ranked(failing.sum(axis=1), drifts.sum(axis=1), top)
+        controls = self._ranked(failing.sum(axis=0), drifts.sum(axis=0), top)
+        return ([{"host": self.hosts[i] or "(local)", "failing": int(failing[i].sum()),
+                  "drifts": int(drifts[i].sum()), "runs": len(self.run_ids[i])} for i in hosts],
+                [{"cis_id": self.controls[j], "title": self.titles[self.controls[j]],
+                  "failing_hosts": int(failing[:, j].sum()), "drifts": int(drifts[:, j].sum())} for j in controls])
+
+    @staticmethod
+    def _ranked(failing, drifts, top):
+        order = np.lexsort((-drifts, -failing))
+        order = order[(failing[order] > 0) | (drifts[order] > 0)]
+        return order[:top].tolist()
+
+    # -------------------------
+    # Output
+    # -------------------------
+    def summary(self, top=DEFAULT_TOP):
+        rates = self.control_pass_rates()
+        latest = self.latest()
+        drifts = self.drifts()
+        failing = (latest > PASS).sum(axis=0)
+        evaluated = (latest >= PASS).sum(axis=0)
+        data = self.data
+        cells = int((data >= PASS).sum())
+        worst_hosts, worst_controls = self.offenders(top, latest, drifts)
+        order = sorted(range(len(self.controls)), key=lambda j: _id_key(self.controls[j]))
+        return {
+            "shape": {"hosts": data.shape[0], "controls": data.shape[1], "runs": data.shape[2],
+                      "bytes": int(data.nbytes)},
+            "events": self.events,
+            "fleet_pass_rate": float((data == PASS).sum() / cells) if cells else None,
+            "controls": [{"cis_id": self.controls[j], "title": self.titles[self.controls[j]],
+                          "pass_rate": None if np.isnan(rates[j]) else round(float(rates[j]), 4),
+                          "hosts": int(evaluated[j]), "failing_hosts": int(failing[j]),
+                          "drifts": int(drifts[:, j].sum())} for j in order],
+            "worst_hosts": worst_hosts,
+            "worst_controls": worst_controls,
+        }
+
+
+def _rate(value):
+    return "-" if value is None else f"{value * 100:.1f}%"
+
+
+def render_text(summary, out):
+    shape = summary["shape"]
+    out.write(f"Fleet matrix: {shape['hosts']} host(s) x {shape['controls']} control(s) x {shape['runs']} run(s), "
+              f"{summary['events']} events, pass rate {_rate(summary['fleet_pass_rate'])}\n\n")
+    out.write(f"{'control':<12} {'pass rate':>9} {'hosts':>6} {'failing':>8} {'drifts':>7}  title\n")
+    for row in summary["controls"]:
+        out.write(f"{row['cis_id']:<12} {_rate(row['pass_rate']):>9} {row['hosts']:>6} {row['failing_hosts']:>8} "
+                  f"{row['drifts']:>7}  {row['title']}\n")
+    out.write("\nWorst hosts (failing controls in their latest run, then drifts):\n")
+    for row in summary["worst_hosts"]:
+        out.write(f"  {row['host']:<30} {row['failing']:>4} failing {row['drifts']:>5} drifts  ({row['runs']} runs)\n")
+    out.write("\nWorst controls (hosts failing in their latest run, then drifts):\n")
+    for row in summary["worst_controls"]:
+        out.write(f"  {row['cis_id']:<12} {row['failing_hosts']:>4} hosts {row['drifts']:>5} drifts  {row['title']}\n")
+
+
+def render_json(summary, out):
+    json.dump(summary, out, indent=1)
+    out.write("\n")
+
+
+RENDERERS = {"text": render_text, "json": render_json}
+
+
+def cli(argv=None, default_log=None):
+    """`main.py matrix`: per-control pass rates, drift and worst offenders across a fleet's JSONL logs."""
+    parser = argparse.ArgumentParser(prog="main.py matrix", description=cli.__doc__)
+    parser.add_argument("logs", nargs="*", help=f"JSONL logs, oldest first (default: {default_log})")
+    parser.add_argument("--cis-id", action="append", help="only these controls; glob patterns allowed (repeatable)")
+    parser.add_argument("--since", help="only events at or after this ISO time (UTC unless it has an offset)")
+    parser.add_argument("--until", help="only events at or before this ISO time")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help=f"offenders listed (default: {DEFAULT_TOP})")
+    parser.add_argument("--format", choices=sorted(RENDERERS), default="text")
+    parser.add_argument("--output", help="write the summary here instead of stdout")
+    parser.add_argument("--rotated", action="store_true", help="include the logs' rotated backups (.1, .2, ...)")
+    parser.add_argument("--no-index", action="store_true", help="scan without reading or writing the .idx sidecar")
+    args = parser.parse_args(argv)
+
+    if np is None:
+        print("CRITICAL: NumPy is not installed. Install it with: pip install numpy", file=sys.stderr)
+        return 1
+    logs = args.logs or ([default_log] if default_log else [])
+    if not logs:
+        parser.error("no log given")
+    if args.rotated:
+        logs = [p for log in logs for p in rotated(log)]
+    try:
+        since = parse_time(args.since) if args.since else None
+        until = parse_time(args.until) if args.until else None
+    except ValueError as e:
+        parser.error(f"invalid time: {e}")
+
+    matrix = ComplianceMatrix()
+    stats = Counter()
+    try:
+        for record in iter_events(logs, cis_patterns=args.cis_id, since=since, until=until,
+                                  use_index=not args.no_index, stats=stats):
+            matrix.add(record)
+    except (OSError, ValueError) as e:
+        print(f"CRITICAL: {e}", file=sys.stderr)
+        return 1
+
+    summary = matrix.summary(args.top)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as out:
+            RENDERERS[args.format](summary, out)
+    else:
+        RENDERERS[args.format](summary, sys.stdout)
+    print(f"[INFO] {stats['events']} events from {len(logs)} log(s), {stats['bytes_read']} bytes read; "
+          f"matrix {summary['shape']['bytes']} bytes"
+          + (f", {stats['bad_lines']} unreadable lines skipped" if stats["bad_lines"] else ""), file=sys.stderr)
+    return 0
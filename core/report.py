@@ -0,0 +1,458 @@
+import argparse
+import csv
+import fnmatch
+import hashlib
+import html
+import json
+import os
+import re
+import sys
+from collections import Counter
+from datetime import datetime, timezone
+
+INDEX_VERSION = 1
+# Bytes hashed to recognise a log that was rotated or truncated under the index
+HEAD_BYTES = 4096
+DEFAULT_FLAP_THRESHOLD = 2
+
+# SUCCESS: a module that ran without emitting events (legacy modules, older logs)
+PASS_RESULTS = frozenset(("OK", "UNCHANGED", "COMPLIANT", "SUCCESS"))
+DRIFT_RESULTS = frozenset(("CHANGED", "NON_COMPLIANT"))
+FAIL_RESULTS = frozenset(("ERROR", "FAILED", "WARN"))
+# Runner records and shared sessions, not controls
+NON_CONTROL_IDS = frozenset(("run", "fleet", "host", "secedit", "sids", "registry", "registry-writes",
+                             "file-edits", "transaction"))
+
+_RUN_ID = re.compile(rb'"run_id":\s*"((?:[^"\\]|\\.)*)"')
+_TIMESTAMP = re.compile(rb'"timestamp":\s*"([^"]*)"')
+_ORCHESTRATOR = re.compile(rb'"cis_id":\s*"(?:fleet|host)"')
+
+
+def _ts_key(ts):
+    """ISO timestamps as comparable strings (isoformat() drops a zero microsecond part)."""
+    if len(ts) > 19 and ts[19] != ".":
+        return ts[:19] + ".000000" + ts[19:]
+    return ts
+
+
+def parse_time(value):
+    """Command-line time bound -> comparable UTC timestamp string; naive times are UTC."""
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+# -------------------------
+# Sidecar run index
+# -------------------------
+class RunIndex:
+    """
+    Byte-offset index of one JSONL log, kept next to it as <log>.idx.
+
+    For every run_id it stores the byte spans its events occupy and its
+    first/last timestamps, so a query for one run (or a time range) seeks
+    straight to those spans. Updating is incremental: only bytes appended
+    since the last update are scanned, and only complete lines are indexed.
+    If the start of the file no longer matches (rotation, truncation) the
+    index is rebuilt.
+    """
+
+    def __init__(self, log_path, index_path=None):
+        self.log_path = str(log_path)
+        self.index_path = str(index_path or f"{log_path}.idx")
+        self.size = 0
+        self.head = None
+        self.runs = {}      # run_id -> {"spans": [[start, end], ...], "first": ts, "last": ts}
+        self.latest = None
+
+    def load(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get("version") != INDEX_VERSION:
+            return False
+        self.size, self.head = data.get("size", 0), data.get("head")
+        self.runs, self.latest = data.get("runs", {}), data.get("latest")
+        return True
+
+    def save(self):
+        tmp = self.index_path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": INDEX_VERSION, "size": self.size, "head": self.head,
+                           "runs": self.runs, "latest": self.latest}, f, separators=(",", ":"))
+            os.replace(tmp, self.index_path)
+        except OSError:
+            # Read-only log directory: the index is rebuilt in memory next time
+            pass
+
+    @staticmethod
+    def _head_digest(f, size):
+        f.seek(0)
+        return hashlib.sha1(f.read(min(size, HEAD_BYTES))).hexdigest()
+
+    def update(self):
+        """Bring the index up to date with the log; returns the number of bytes scanned."""
+        self.load()
+        with open(self.log_path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            # The indexed prefix is only trusted while it is still there unchanged
+            if size < self.size or self.size and self._head_digest(f, self.size) != self.head:
+                self.size, self.runs, self.latest = 0, {}, None
+            start = self.size
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break   # a line still being written; picked up next time
+                end = offset + len(line)
+                self._add(line, offset, end)
+                offset = end
+            self.size, self.head = offset, self._head_digest(f, offset)
+        scanned = offset - start
+        if scanned:
+            self.save()
+        return scanned
+
+    def _add(self, line, start, end):
+        match = _RUN_ID.search(line)
+        if not match:
+            return
+        run_id = match.group(1).decode("utf-8", "replace")
+        ts = _TIMESTAMP.search(line)
+        ts = _ts_key(ts.group(1).decode("ascii", "replace")) if ts else None
+        run = self.runs.get(run_id)
+        if run is None:
+            run = self.runs[run_id] = {"spans": [], "first": ts, "last": ts}
+        spans = run["spans"]
+        # Consecutive lines of a run extend one span; interleaved runs get several
+        if spans and spans[-1][1] == start:
+            spans[-1][1] = end
+        else:
+            spans.append([start, end])
+        if ts:
+            run["first"] = min(run["first"] or ts, ts)
+            run["last"] = max(run["last"] or ts, ts)
+        if not _ORCHESTRATOR.search(line):
+            self.latest = run_id
+
+    def spans_for(self, run_ids=None, since=None, until=None):
+        """Sorted byte spans of the matching runs (every run when no filter is given)."""
+        spans = []
+        for run_id, run in self.runs.items():
+            if run_ids is not None and run_id not in run_ids:
+                continue
+            if since and run["last"] and run["last"] < since:
+                continue
+            if until and run["first"] and run["first"] > until:
+                continue
+            spans.extend(run["spans"])
+        return sorted(spans)
+
+
+# -------------------------
+# Streaming
+# -------------------------
+def iter_lines(path, spans=None):
+    """Raw lines of a log, optionally only within byte spans; memory stays constant."""
+    with open(path, "rb") as f:
+        if spans is None:
+            yield from f
+            return
+        for start, end in spans:
+            f.seek(start)
+            while f.tell() < end:
+                line = f.readline()
+                if not line:
+                    break
+                yield line
+
+
+def iter_events(paths, run_ids=None, cis_patterns=None, since=None, until=None, latest=False,
+                use_index=True, stats=None):
+    """
+    Stream the `hardening` records of one or more logs (oldest first) that
+    match every filter. With the index, run and time filters seek to the
+    matching runs; without one (or with no such filter) the logs are
+    scanned line by line. `latest` selects the newest run of the last log.
+    """
+    stats = stats if stats is not None else Counter()
+    if latest:
+        if not use_index:
+            raise ValueError("--latest needs the run index")
+        newest = RunIndex(paths[-1])
+        newest.update()
+        if newest.latest is None:
+            return
+        run_ids = {newest.latest}
+
+    for path in paths:
+        spans = None
+        if use_index and (run_ids is not None or since or until):
+            index = RunIndex(path)
+            stats["index_bytes_scanned"] += index.update()
+            spans = index.spans_for(run_ids, since, until)
+        for line in iter_lines(path, spans):
+            stats["bytes_read"] += len(line)
+            try:
+                event = json.loads(line)
+                record = event["hardening"]
+                record["timestamp"] = _ts_key(event.get("timestamp") or "")
+            except (ValueError, KeyError, TypeError):
+                stats["bad_lines"] += 1
+                continue
+            if run_ids is not None and record.get("run_id") not in run_ids:
+                continue
+            if cis_patterns and not any(fnmatch.fnmatchcase(str(record.get("cis_id", "")), p)
+                                        for p in cis_patterns):
+                continue
+            if since and record["timestamp"] < since or until and record["timestamp"] > until:
+                continue
+            stats["events"] += 1
+            yield record
+
+
+# -------------------------
+# Summaries
+# -------------------------
+class RunSummary:
+    __slots__ = ("run_id", "host", "mode", "first", "last", "results", "duration_ms")
+
+    def __init__(self, run_id, host, mode):
+        self.run_id = run_id
+        self.host = host
+        self.mode = mode
+        self.first = self.last = None
+        self.results = Counter()
+        self.duration_ms = None
+
+    @property
+    def evaluated(self):
+        return sum(n for r, n in self.results.items() if r in PASS_RESULTS | DRIFT_RESULTS | FAIL_RESULTS)
+
+    @property
+    def passed(self):
+        return sum(self.results[r] for r in PASS_RESULTS)
+
+    @property
+    def pass_rate(self):
+        return self.passed / self.evaluated if self.evaluated else None
+
+
+class ControlSummary:
+    __slots__ = ("cis_id", "title", "results", "last_result", "last_seen", "last_change", "flaps")
+
+    def __init__(self, cis_id, title):
+        self.cis_id = cis_id
+        self.title = title
+        self.results = Counter()
+        self.last_result = self.last_seen = self.last_change = None
+        self.flaps = 0          # times it drifted again after being compliant
+
+    @property
+    def evaluated(self):
+        return sum(self.results[r] for r in PASS_RESULTS | DRIFT_RESULTS | FAIL_RESULTS)
+
+    @property
+    def pass_rate(self):
+        return sum(self.results[r] for r in PASS_RESULTS) / self.evaluated if self.evaluated else None
+
+
+class ReportBuilder:
+    """
+    Folds a stream of records into per-run and per-control summaries.
+    Memory grows with the number of runs and controls, never with events.
+    """
+
+    def __init__(self, flap_threshold=DEFAULT_FLAP_THRESHOLD):
+        self.flap_threshold = flap_threshold
+        self.runs = {}
+        self.controls = {}
+        self._compliant = {}    # (host, cis_id) -> last outcome was compliant
+
+    def add(self, record):
+        result = record.get("result", "SUCCESS")
+        cis_id = str(record.get("cis_id", ""))
+        host = record.get("host", "")
+        ts = record.get("timestamp")
+        if cis_id in ("fleet", "host"):
+            return      # the orchestrator's own records; each host's run is reported instead
+        key = (record.get("run_id"), host)
+
+        run = self.runs.get(key)
+        if run is None:
+            run = self.runs[key] = RunSummary(key[0], host, record.get("mode"))
+        if ts:
+            run.first = min(run.first or ts, ts)
+            run.last = max(run.last or ts, ts)
+        if cis_id == "run" and result == "SUMMARY":
+            run.duration_ms = (record.get("metrics") or {}).get("duration_ms")
+        if cis_id in NON_CONTROL_IDS:
+            return
+        run.results[result] += 1
+
+        control = self.controls.get(cis_id)
+        if control is None:
+            control = self.controls[cis_id] = ControlSummary(cis_id, record.get("title", ""))
+        control.results[result] += 1
+        control.last_result, control.last_seen = result, ts or control.last_seen
+        if result == "CHANGED":
+            control.last_change = ts or control.last_change
+
+        if result in PASS_RESULTS or result in DRIFT_RESULTS:
+            compliant = result in PASS_RESULTS
+            if not compliant and self._compliant.get((host, cis_id)):
+                control.flaps += 1
+            self._compliant[(host, cis_id)] = compliant
+
+    def flapping(self):
+        return sorted((c for c in self.controls.values() if c.flaps >= self.flap_threshold),
+                      key=lambda c: -c.flaps)
+
+    def run_rows(self):
+        rows = []
+        for run in sorted(self.runs.values(), key=lambda r: (r.first or "", r.host)):
+            rows.append({"run_id": run.run_id, "host": run.host, "mode": run.mode or "",
+                         "first": run.first or "", "last": run.last or "", "evaluated": run.evaluated,
+                         "passed": run.passed, "pass_rate": _rate(run.pass_rate),
+                         "changed": run.results["CHANGED"],
+                         "non_compliant": run.results["NON_COMPLIANT"],
+                         "errors": sum(run.results[r] for r in FAIL_RESULTS),
+                         "duration_ms": run.duration_ms if run.duration_ms is not None else ""})
+        return rows
+
+    def control_rows(self):
+        rows = []
+        for control in sorted(self.controls.values(), key=lambda c: _id_key(c.cis_id)):
+            rows.append({"cis_id": control.cis_id, "title": control.title, "evaluated": control.evaluated,
+                         "pass_rate": _rate(control.pass_rate), "changed": control.results["CHANGED"],
+                         "last_result": control.last_result or "", "last_change": control.last_change or "",
+                         "flaps": control.flaps,
+                         "flapping": "yes" if control.flaps >= self.flap_threshold else ""})
+        return rows
+
+
+def _rate(value):
+    return "" if value is None else f"{value * 100:.1f}%"
+
+
+def _id_key(cis_id):
+    # "1.10" after "1.9"
+    return [(0, int(p), "") if p.isdigit() else (1, 0, p) for p in cis_id.split(".")]
+
+
+# -------------------------
+# Output
+# -------------------------
+def render_text(builder, out):
+    for title, rows in (("Runs", builder.run_rows()), ("Controls", builder.control_rows())):
+        out.write(f"{title} ({len(rows)})\n")
+        if not rows:
+            out.write("  (none)\n\n")
+            continue
+        columns = list(rows[0])
+        widths = {c: min(40, max(len(c), *(len(str(r[c])) for r in rows))) for c in columns}
+        out.write("  ".join(c.ljust(widths[c]) for c in columns).rstrip() + "\n")
+        for row in rows:
+            out.write("  ".join(str(row[c])[:widths[c]].ljust(widths[c]) for c in columns).rstrip() + "\n")
+        out.write("\n")
+    flapping = builder.flapping()
+    out.write(f"Flapping controls (drifted again after compliance >= {builder.flap_threshold}x): "
+              + (", ".join(f"{c.cis_id} ({c.flaps})" for c in flapping) or "none") + "\n")
+
+
+def render_csv(builder, out):
+    """Run table, a blank line, then the control table."""
+    for i, rows in enumerate((builder.run_rows(), builder.control_rows())):
+        if i:
+            out.write("\n")
+        if rows:
+            writer = csv.DictWriter(out, fieldnames=list(rows[0]), lineterminator="\n")
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+def render_html(builder, out):
+    out.write("<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>Hardening compliance report</title>\n"
+              "<style>body{font-family:sans-serif}table{border-collapse:collapse;margin-bottom:2em}"
+              "td,th{border:1px solid #ccc;padding:2px 6px;text-align:left}"
+              "tr.flapping{background:#fde2e2}</style></head><body>\n"
+              "<h1>Hardening compliance report</h1>\n")
+    for title, rows in (("Runs", builder.run_rows()), ("Controls", builder.control_rows())):
+        out.write(f"<h2>{title} ({len(rows)})</h2>\n")
+        if not rows:
+            continue
+        out.write("<table><tr>" + "".join(f"<th>{html.escape(c)}</th>" for c in rows[0]) + "</tr>\n")
+        for row in rows:
+            css = ' class="flapping"' if row.get("flapping") else ""
+            out.write(f"<tr{css}>" + "".join(f"<td>{html.escape(str(v))}</td>" for v in row.values()) + "</tr>\n")
+        out.write("</table>\n")
+    out.write("</body></html>\n")
+
+
+RENDERERS = {"text": render_text, "csv": render_csv, "html": render_html}
+
+
+# -------------------------
+# CLI
+# -------------------------
+def rotated(path):
+    """path's rotated backups (oldest first) followed by path itself."""
+    backups = []
+    i = 1
+    while os.path.exists(f"{path}.{i}"):
+        backups.append(f"{path}.{i}")
+        i += 1
+    return backups[::-1] + [path]
+
+
+def cli(argv=None, default_log=None):
+    """`main.py report`: summarize a JSONL event log without loading it into memory."""
+    parser = argparse.ArgumentParser(prog="main.py report", description=cli.__doc__)
+    parser.add_argument("logs", nargs="*", help=f"JSONL logs, oldest first (default: {default_log})")
+    parser.add_argument("--run-id", action="append", help="only this run (repeatable)")
+    parser.add_argument("--latest", action="store_true", help="only the newest run in the log")
+    parser.add_argument("--cis-id", action="append", help="only these controls; glob patterns allowed (repeatable)")
+    parser.add_argument("--since", help="only events at or after this ISO time (UTC unless it has an offset)")
+    parser.add_argument("--until", help="only events at or before this ISO time")
+    parser.add_argument("--format", choices=sorted(RENDERERS), default="text")
+    parser.add_argument("--output", help="write the report here instead of stdout")
+    parser.add_argument("--flap-threshold", type=int, default=DEFAULT_FLAP_THRESHOLD,
+                        help=f"re-drifts that mark a control as flapping (default: {DEFAULT_FLAP_THRESHOLD})")
+    parser.add_argument("--rotated", action="store_true", help="include the logs' rotated backups (.1, .2, ...)")
+    parser.add_argument("--no-index", action="store_true", help="scan without reading or writing the .idx sidecar")
+    args = parser.parse_args(argv)
+
+    logs = args.logs or ([default_log] if default_log else [])
+    if not logs:
+        parser.error("no log given")
+    if args.rotated:
+        logs = [p for log in logs for p in rotated(log)]
+    try:
+        since = parse_time(args.since) if args.since else None
+        until = parse_time(args.until) if args.until else None
+    except ValueError as e:
+        parser.error(f"invalid time: {e}")
+
+    builder = ReportBuilder(args.flap_threshold)
+    stats = Counter()
+    try:
+        for record in iter_events(logs, run_ids=set(args.run_id) if args.run_id else None,
+                                  cis_patterns=args.cis_id, since=since, until=until, latest=args.latest,
+                                  use_index=not args.no_index, stats=stats):
+            builder.add(record)
+    except (OSError, ValueError) as e:
+        print(f"CRITICAL: {e}", file=sys.stderr)
+        return 1
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as out:
+            RENDERERS[args.format](builder, out)
+    else:
+        RENDERERS[args.format](builder, sys.stdout)
+    print(f"[INFO] {stats['events']} events from {len(logs)} log(s), {stats['bytes_read']} bytes read"
+          + (f", {stats['bad_lines']} unreadable lines skipped" if stats["bad_lines"] else ""), file=sys.stderr)
+    return 0
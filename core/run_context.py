@@ -0,0 +1,62 @@
+import time
+
+from core.backend import create_backend
+from core.command_cache import CommandMemo
+from core.file_editor import FileEditBatch
+from core.scheduler import build_commit_plan, execute
+from core.sid_resolver import SidResolver
+from core.windows_registry import RegistryReader, RegistryWriteBatch
+from core.windows_secedit import PolicySession
+
+
+class RunContext:
+    """
+    State shared by every module during one hardening run.
+
+    The runner attaches it to each loaded module as `module.context` so that
+    controls touching the same system resource can batch their work.
+    """
+
+    def __init__(self, config, backend=None, transaction=None):
+        self.config = config
+        self.backend = backend or create_backend(config)
+        self.commands = CommandMemo()
+        self.policy = PolicySession(config)
+        self.sids = SidResolver(config)
+        self.registry = RegistryReader(config)
+        self.registry_writes = RegistryWriteBatch(config, self.registry)
+        self.file_edits = FileEditBatch(config)
+        # core.transaction.RunTransaction when the apply phase is transactional
+        self.transaction = transaction
+        # Set by commit(): the apply-phase plan and each unit's wall time
+        self.commit_plan = None
+        self.commit_ms = {}
+        for session in self.sessions():
+            session.context = self
+
+    def commit(self, max_workers=None, estimates=None):
+        """
+        Apply everything the modules staged during the run; False if a commit failed.
+
+        Each session commit (one secedit /configure, one reg import, one
+        write per file) is a unit of the apply-phase plan; units whose
+        resources do not overlap run concurrently (core/scheduler.py).
+        """
+        units = self.policy.commit_units() + self.registry_writes.commit_units() + self.file_edits.commit_units()
+        self.commit_plan = build_commit_plan(units, estimates)
+        results = execute(self.commit_plan, max_workers or len(units), self._timed_commit)
+        return all(results.values())
+
+    def _timed_commit(self, commit, name):
+        start = time.perf_counter()
+        try:
+            return commit()
+        finally:
+            self.commit_ms[name] = (time.perf_counter() - start) * 1000
+
+    def sessions(self):
+        """Pseudo-modules whose own events the runner should export."""
+        sessions = [self.policy, self.sids, self.registry, self.registry_writes, self.file_edits]
+        if self.transaction is not None:
+            sessions.append(self.transaction)
+        return sessions
@@ -0,0 +1,232 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from core.command_cache import ALL, affects
+
+# Assumed cost of a control without a timing from a previous run
+DEFAULT_ESTIMATE_MS = 1.0
+
+
+def _overlap(a, b):
+    """True if two resource names can refer to the same state (equal, parent/child or wildcard)."""
+    return affects(a, b) or affects(b, a)
+
+
+def _declared(task):
+    return task.resources() if hasattr(task, "resources") else None
+
+
+def claims_of(task):
+    """
+    (reads, writes) resource names a control touches while it is checked.
+
+    Controls declare them through resources(). A parallel_safe control only
+    stages its writes on the run context, so they are not check-phase
+    writes (see staged_writes). Undeclared ones keep their old scheduling:
+    parallel_safe modules read everything, others are exclusive.
+    """
+    declared = _declared(task)
+    if declared is None:
+        if getattr(task, "parallel_safe", False):
+            return frozenset((ALL,)), frozenset()
+        return frozenset(), frozenset((ALL,))
+    reads, writes = declared
+    if getattr(task, "parallel_safe", False):
+        return frozenset(reads), frozenset()
+    return frozenset(reads), frozenset(writes)
+
+
+def staged_writes(task):
+    """Resources a parallel_safe control stages on the run context, written by the commit."""
+    declared = _declared(task)
+    if declared is None or not getattr(task, "parallel_safe", False):
+        return frozenset()
+    return frozenset(declared[1])
+
+
+def commit_unit(resource):
+    """
+    Name of the session commit that writes a staged resource: every policy
+    key goes into one secedit /configure, every registry value into one
+    reg import, and each file is written on its own.
+    """
+    if resource == "policy" or resource.startswith("policy\\"):
+        return "secedit"
+    if resource.startswith("registry:"):
+        return "registry"
+    return resource
+
+
+def conflicts(a, b):
+    """Two claims conflict when either one writes something the other reads or writes."""
+    (reads_a, writes_a), (reads_b, writes_b) = a, b
+    return (any(_overlap(w, r) for w in writes_a for r in reads_b | writes_b)
+            or any(_overlap(w, r) for w in writes_b for r in reads_a))
+
+
+class Plan:
+    """
+    Conflict graph of one phase's work items, in schedule order.
+
+    For the check phase the items are controls: those that only read come
+    first (as parallel_safe modules always did), then writers, each group
+    in module order. For the apply phase they are session commits. An item
+    waits for every earlier item it conflicts with; everything else runs
+    concurrently. waves() groups items by dependency depth, and
+    critical_path() is the longest chain of conflicting items by estimated
+    duration, i.e. the lower bound on the phase's wall time.
+    """
+
+    def __init__(self, loaded, labels, claims, estimates, staged_by=None):
+        self.loaded = loaded
+        self.labels = labels
+        self.claims = claims
+        self.estimates = estimates
+        # commit plans: {unit: {resource: [labels of the controls staging it]}}
+        self.staged_by = staged_by or {}
+        self.preds = [[] for _ in loaded]
+        self.succs = [[] for _ in loaded]
+
+        # Only writers create edges, so plans of read-mostly runs stay cheap
+        writers = [j for j, (_, writes) in enumerate(claims) if writes]
+        edges = set()
+        for j in writers:
+            for i in range(len(loaded)):
+                if i != j and conflicts(claims[i], claims[j]):
+                    edges.add((min(i, j), max(i, j)))
+        for i, j in sorted(edges):
+            self.preds[j].append(i)
+            self.succs[i].append(j)
+
+        self.depth = [0] * len(loaded)
+        self.finish = [0.0] * len(loaded)
+        self._via = [None] * len(loaded)
+        for j in range(len(loaded)):
+            if self.preds[j]:
+                best = max(self.preds[j], key=lambda i: self.finish[i])
+                self.depth[j] = 1 + max(self.depth[i] for i in self.preds[j])
+                self._via[j] = best
+                self.finish[j] = self.finish[best]
+            self.finish[j] += estimates[j]
+
+    @property
+    def edges(self):
+        return sum(len(p) for p in self.preds)
+
+    def waves(self):
+        """[[label, ...], ...]: items with the same dependency depth may run together."""
+        waves = [[] for _ in range(max(self.depth, default=-1) + 1)]
+        for j, depth in enumerate(self.depth):
+            waves[depth].append(self.labels[j])
+        return waves
+
+    def critical_path(self):
+        """(labels along the longest estimated chain, its estimated ms)."""
+        if not self.loaded:
+            return [], 0.0
+        j = max(range(len(self.loaded)), key=lambda k: self.finish[k])
+        total = self.finish[j]
+        path = []
+        while j is not None:
+            path.append(self.labels[j])
+            j = self._via[j]
+        return path[::-1], total
+
+    def shared(self):
+        """[(resource, labels)] staged by more than one control; the session keeps the last one."""
+        return [(resource, labels) for resources in self.staged_by.values()
+                for resource, labels in sorted(resources.items()) if len(labels) > 1]
+
+    def to_dict(self):
+        path, total = self.critical_path()
+        return {"items": len(self.loaded), "conflicts": self.edges, "waves": len(self.waves()),
+                "critical_path": path, "critical_path_ms": round(total, 3)}
+
+    def describe(self, title="check phase"):
+        """Human-readable plan, for `main.py --plan`."""
+        lines = [f"{title}: {len(self.loaded)} item(s), {self.edges} conflict edge(s), {len(self.waves())} wave(s)"]
+        for n, wave in enumerate(self.waves()):
+            lines.append(f"  wave {n}: {len(wave)} item(s): {', '.join(wave[:20])}"
+                         + (f" ... (+{len(wave) - 20})" if len(wave) > 20 else ""))
+        for unit, resources in self.staged_by.items():
+            controls = sorted({label for labels in resources.values() for label in labels})
+            lines.append(f"  {unit} commits {len(resources)} resource(s) staged by {len(controls)} control(s)")
+        for resource, labels in self.shared():
+            lines.append(f"  {resource} is staged by {', '.join(labels)}; the last one staged wins")
+        for j, preds in enumerate(self.preds):
+            if preds:
+                _, writes = self.claims[j]
+                lines.append(f"  {self.labels[j]} waits for {', '.join(self.labels[i] for i in preds)}"
+                             f" (writes {', '.join(sorted(writes))})")
+        path, total = self.critical_path()
+        lines.append(f"  critical path (~{total:.1f} ms): {' -> '.join(path)}")
+        return "\n".join(lines)
+
+
+def build_plan(loaded, label, estimates=None):
+    """
+    Check-phase plan for [(task, path)]. label(task, path) names a control;
+    estimates maps names to expected milliseconds (e.g. from the last run).
+    """
+    estimates = estimates or {}
+    annotated = [(task, path, claims_of(task)) for task, path in loaded]
+    # Readers first, then writers; stable within each group
+    annotated.sort(key=lambda entry: bool(entry[2][1]))
+    ordered = [(task, path) for task, path, _ in annotated]
+    labels = [label(task, path) for task, path in ordered]
+    return Plan(ordered, labels, [c for _, _, c in annotated],
+                [float(estimates.get(name) or DEFAULT_ESTIMATE_MS) for name in labels])
+
+
+def build_commit_plan(units, estimates=None):
+    """
+    Apply-phase plan for [(commit, name, writes)]: one unit per session
+    commit, each writing the resources staged on it. Units whose writes
+    overlap commit one after the other.
+    """
+    estimates = estimates or {}
+    return Plan([(commit, name) for commit, name, _ in units], [name for _, name, _ in units],
+                [(frozenset(), frozenset(writes)) for _, _, writes in units],
+                [float(estimates.get(name) or DEFAULT_ESTIMATE_MS) for _, name, _ in units])
+
+
+def preview_commit_plan(loaded, label, estimates=None):
+    """
+    The commit plan the loaded controls' declared staged writes lead to,
+    before anything is staged (for `main.py --plan`).
+    """
+    staged_by = {}
+    for task, path in loaded:
+        for resource in sorted(staged_writes(task)):
+            staged_by.setdefault(commit_unit(resource), {}).setdefault(resource, []).append(label(task, path))
+    estimates = estimates or {}
+    names = list(staged_by)
+    return Plan([(None, name) for name in names], names,
+                [(frozenset(), frozenset(staged_by[name])) for name in names],
+                [float(estimates.get(name) or DEFAULT_ESTIMATE_MS) for name in names], staged_by)
+
+
+def execute(plan, max_workers, run):
+    """
+    Call run(task, path) for every item of plan, at most max_workers at a
+    time, each as soon as the items it conflicts with are done.
+    Returns {path: run()'s result}.
+    """
+    results = {}
+    waiting = [len(p) for p in plan.preds]
+    ready = [j for j, n in enumerate(waiting) if n == 0]
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        running = {}
+        while ready or running:
+            for j in ready:
+                task, path = plan.loaded[j]
+                running[pool.submit(run, task, path)] = j
+            ready = []
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                j = running.pop(future)
+                results[plan.loaded[j][1]] = future.result()
+                for k in plan.succs[j]:
+                    waiting[k] -= 1
+                    if waiting[k] == 0:
+                        ready.append(k)
+    return results
@@ -0,0 +1,95 @@
+import re
+from fnmatch import fnmatchcase
+from pathlib import Path
+
+from core.manifest import cis_id_from_filename
+
+FIELDS = ("id", "sector", "tag")
+_SECTOR_PREFIX = re.compile(r"^sector\s+", re.IGNORECASE)
+
+
+class SelectorError(ValueError):
+    pass
+
+
+def _sector_name(name):
+    # "Sector 2.2" and "2.2" name the same sector
+    return _SECTOR_PREFIX.sub("", str(name).strip())
+
+
+def module_sector(module_path):
+    """The nearest `Sector X.Y` directory a module file sits in, or None."""
+    for part in reversed(Path(module_path).parent.parts):
+        if _SECTOR_PREFIX.match(part):
+            return part
+    return None
+
+
+class ControlSelector:
+    """
+    Narrows a run to some controls using only what is known before anything
+    is imported: the id (catalog entry, module manifest or file name), the
+    sector (catalog `sector` or the module's `Sector X.Y` directory) and tags.
+
+    Terms, optionally comma-separated:
+        2.2.*  /  id:2.2.*              id glob
+        sector:2.2  /  sector:Sector 2.*  sector (the "Sector " prefix is optional)
+        tag:<glob>                       any of the control's tags
+    A control is selected if it matches any include term (every control
+    when there are none) and no exclude term.
+    """
+
+    def __init__(self, include=(), exclude=()):
+        self.include = [self.parse(term) for term in _split(include)]
+        self.exclude = [self.parse(term) for term in _split(exclude)]
+
+    def __bool__(self):
+        return bool(self.include or self.exclude)
+
+    def __str__(self):
+        terms = [term for _, _, term in self.include] + [f"not {term}" for _, _, term in self.exclude]
+        return ", ".join(terms) or "all"
+
+    @staticmethod
+    def parse(term):
+        """(field, pattern, term) for one selector term; raises SelectorError."""
+        field, sep, pattern = term.partition(":")
+        if not sep:
+            field, pattern = "id", term
+        field, pattern = field.strip().lower(), pattern.strip()
+        if field not in FIELDS:
+            raise SelectorError(f"Unknown selector {term!r}: use an id glob, sector:<name> or tag:<name>")
+        if not pattern:
+            raise SelectorError(f"Empty selector {term!r}")
+        if field == "sector":
+            pattern = _sector_name(pattern)
+        return field, pattern, term
+
+    def matches(self, cis_id, sector=None, tags=()):
+        def hit(selector):
+            field, pattern, _ = selector
+            if field == "id":
+                return cis_id is not None and fnmatchcase(cis_id, pattern)
+            if field == "sector":
+                return sector is not None and fnmatchcase(_sector_name(sector), pattern)
+            return any(fnmatchcase(tag, pattern) for tag in tags)
+
+        if self.include and not any(hit(s) for s in self.include):
+            return False
+        return not any(hit(s) for s in self.exclude)
+
+    def select(self, specs, entries):
+        """(catalog specs, module manifest entries) that match; nothing is imported."""
+        if not self:
+            return specs, entries
+        specs = [spec for spec in specs if self.matches(spec.id, spec.sector, spec.tags)]
+        entries = [entry for entry in entries
+                   if self.matches(entry.cis_id or cis_id_from_filename(entry.path), module_sector(entry.path),
+                                   entry.tags)]
+        return specs, entries
+
+
+def _split(terms):
+    if isinstance(terms, str):
+        terms = [terms]
+    return [term.strip() for item in terms or () for term in item.split(",") if term.strip()]
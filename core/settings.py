@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from core.validator import ConfigValidator
+from core.windows_registry import RegistryValue
+
+# Bump when ControlSettings/CompiledConfig or the validation rules change
+SNAPSHOT_VERSION = 2
+
+
+class ConfigError(ValueError):
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = list(errors)
+
+
+class ControlSettings:
+    """Validated settings of one control: whether it runs and the typed value it enforces."""
+    __slots__ = ("id", "enabled", "value")
+
+    def __init__(self, id, enabled=False, value=None):
+        self.id = id
+        self.enabled = enabled
+        self.value = value
+
+    def __repr__(self):
+        return f"ControlSettings({self.id!r}, enabled={self.enabled}, value={self.value!r})"
+
+
+class CompiledConfig:
+    """
+    config.yaml after validation: the raw mapping (what modules receive as
+    `self.config`) plus one ControlSettings per catalog control.
+    """
+
+    def __init__(self, raw, controls):
+        self.raw = raw
+        self.controls = controls
+
+    @property
+    def general(self):
+        return self.raw.get('general', {})
+
+    def enabled(self, cis_id):
+        settings = self.controls.get(cis_id)
+        if settings is not None:
+            return settings.enabled
+        return bool((self.raw.get(cis_id) or {}).get('enabled', False))
+
+
+def compile_settings(raw, catalog, overridden=()):
+    """Validate raw config against the catalog and build typed per-control settings; raises ConfigError."""
+    validator = ConfigValidator(raw, catalog, overridden)
+    if not validator.validate():
+        raise ConfigError(validator.errors)
+
+    # YAML reads an id like "1.1" as a float; sections are looked up by string id
+    raw = {str(k) if k != 'general' else k: v for k, v in raw.items()}
+    controls = {}
+    for spec in catalog:
+        if spec.id in overridden:
+            continue
+        section = raw.get(spec.id) or {}
+        setting = spec.setting or ('users' if spec.backend == 'user_rights' else None)
+        value = section.get(setting, spec.default) if setting else spec.default
+        if spec.backend == 'user_rights':
+            value = list(value or [])
+        elif spec.backend == 'registry' and value is not None:
+            value = RegistryValue.convert(spec.type or 'REG_DWORD', value)
+        controls[spec.id] = ControlSettings(spec.id, bool(section.get('enabled', False)), value)
+    return CompiledConfig(raw, controls)
+
+
+def _snapshot_key(config_bytes, catalog, overridden):
+    digest = hashlib.sha256(config_bytes)
+    digest.update(json.dumps([SNAPSHOT_VERSION, [s.to_dict() for s in catalog], sorted(overridden)],
+                             sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _encode_value(value):
+    # REG_BINARY values are bytes; everything else compiled is JSON-native
+    return value.hex() if isinstance(value, bytes) else value
+
+
+def _snapshot_payload(key, compiled):
+    payload = {"key": key, "raw": compiled.raw,
+               "controls": {cis_id: [c.enabled, _encode_value(c.value)] for cis_id, c in compiled.controls.items()}}
+    text = json.dumps(payload, sort_keys=True)
+    # Only cache what survives the round trip (YAML can produce dates, non-string keys ...)
+    if json.loads(text)["raw"] != compiled.raw:
+        return None
+    return text
+
+
+def _from_snapshot(data, key, catalog, overridden):
+    """CompiledConfig from a parsed snapshot; None unless it is exactly the expected shape."""
+    if not isinstance(data, dict) or data.get("key") != key or not isinstance(data.get("raw"), dict):
+        return None
+    stored = data.get("controls")
+    specs = {spec.id: spec for spec in catalog if spec.id not in overridden}
+    if not isinstance(stored, dict) or set(stored) != set(specs):
+        return None
+
+    controls = {}
+    for cis_id, spec in specs.items():
+        entry = stored[cis_id]
+        if not (isinstance(entry, list) and len(entry) == 2 and isinstance(entry[0], bool)):
+            return None
+        enabled, value = entry
+        try:
+            if spec.backend == 'registry' and value is not None:
+                value = RegistryValue.convert(spec.type or 'REG_DWORD', value)
+            elif spec.backend == 'user_rights' and not isinstance(value, list):
+                return None
+        except (TypeError, ValueError):
+            return None
+        controls[cis_id] = ControlSettings(cis_id, enabled, value)
+    return CompiledConfig(data["raw"], controls)
+
+
+def load_settings(config_path, catalog, overridden=(), snapshot_path=None, parse=None, pending=None):
+    """
+    CompiledConfig for config_path. The compiled result is saved to
+    snapshot_path as plain JSON (a cache file must never be able to run
+    code in this admin process), keyed by the config file's
+    hash, the catalog and the set of module overrides; while none of them
+    change, later runs skip YAML parsing and validation entirely. Any
+    unreadable or malformed snapshot is a cache miss. `parse(path)` reads
+    the raw mapping. With a `pending` list, writing the snapshot is appended
+    to it instead of done (read-only runs never call it). Raises ConfigError
+    with every validation error.
+    """
+    with open(config_path, "rb") as f:
+        config_bytes = f.read()
+    key = _snapshot_key(config_bytes, catalog, overridden)
+
+    if snapshot_path:
+        try:
+            with open(snapshot_path, "r", encoding="utf-8") as f:
+                cached = _from_snapshot(json.load(f), key, catalog, set(overridden))
+            if cached is not None:
+                return cached
+        except (OSError, ValueError):
+            pass
+
+    raw = parse(Path(config_path)) if parse else None
+    if raw is None:
+        raise ConfigError([f"{config_path} is empty"])
+    compiled = compile_settings(raw, catalog, overridden)
+
+    if snapshot_path:
+        try:
+            text = _snapshot_payload(key, compiled)
+        except (TypeError, ValueError):
+            text = None
+        if text is not None:
+            save = lambda: _write_snapshot(Path(snapshot_path), text)
+            if pending is None:
+                save()
+            else:
+                pending.append(save)
+    return compiled
+
+
+def _write_snapshot(snapshot_path, text):
+    try:
+        snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = snapshot_path.with_name(snapshot_path.name + ".tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, snapshot_path)
+    except OSError:
+        # A read-only cache just means compiling again next run
+        pass
@@ -0,0 +1,137 @@
+import re
+import threading
+
+from core.base_module import BaseModule
+
+# Built-in principals that resolve to the same SID on every Windows host
+WELL_KNOWN_SIDS = {
+    "everyone": "S-1-1-0",
+    "creator owner": "S-1-3-0",
+    "network": "S-1-5-2",
+    "batch": "S-1-5-3",
+    "interactive": "S-1-5-4",
+    "service": "S-1-5-6",
+    "anonymous logon": "S-1-5-7",
+    "enterprise domain controllers": "S-1-5-9",
+    "authenticated users": "S-1-5-11",
+    "restricted": "S-1-5-12",
+    "system": "S-1-5-18",
+    "local system": "S-1-5-18",
+    "local service": "S-1-5-19",
+    "network service": "S-1-5-20",
+    "administrators": "S-1-5-32-544",
+    "users": "S-1-5-32-545",
+    "guests": "S-1-5-32-546",
+    "power users": "S-1-5-32-547",
+    "account operators": "S-1-5-32-548",
+    "server operators": "S-1-5-32-549",
+    "print operators": "S-1-5-32-550",
+    "backup operators": "S-1-5-32-551",
+    "replicator": "S-1-5-32-552",
+    "remote desktop users": "S-1-5-32-555",
+    "network configuration operators": "S-1-5-32-556",
+    "performance monitor users": "S-1-5-32-558",
+    "performance log users": "S-1-5-32-559",
+    "iis_iusrs": "S-1-5-32-568",
+    "hyper-v administrators": "S-1-5-32-578",
+    "remote management users": "S-1-5-32-580",
+    "window manager group": "S-1-5-90-0",
+    "virtual machines": "S-1-5-83-0",
+    "local account": "S-1-5-113",
+    "local account and member of administrators group": "S-1-5-114",
+    # Service SIDs are derived from the service name, so they are fixed too
+    "nt service\\wdiservicehost": "S-1-5-80-3139157870-2983391045-3678747466-658725712-1809340420",
+}
+
+# Domain prefixes Windows prints in front of built-in names
+_BUILTIN_DOMAINS = ("builtin", "nt authority", "window manager", "nt virtual machine")
+_SID = re.compile(r"^S-1(-\d+)+$", re.IGNORECASE)
+
+
+def split_principals(value):
+    """'*S-1-5-32-544,Guests' or ['*S-1-5-32-544', 'Guests'] -> ['*S-1-5-32-544', 'Guests']."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [str(p).strip() for p in value if str(p).strip()]
+
+
+class SidResolver(BaseModule):
+    """
+    Run-scoped account name -> SID cache for user-rights comparisons.
+
+    Names are looked up in the well-known table, then in `general.sid_table`
+    (or the table passed in), and only what is left goes to the backend in
+    one bulk lookup. Every answer, including "not found", is memoized.
+    """
+
+    def __init__(self, config, table=None):
+        super().__init__(name="SID Resolver", config=config)
+        self.id = "sids"
+        self._names = dict(WELL_KNOWN_SIDS)
+        local_table = table if table is not None else config.get('general', {}).get('sid_table') or {}
+        for name, sid in local_table.items():
+            self._names[str(name).casefold()] = str(sid).lstrip("*").upper()
+        self._lock = threading.Lock()
+        self.lookups = 0
+
+    @staticmethod
+    def _name_key(name):
+        return name.strip().casefold()
+
+    def _known(self, name):
+        key = self._name_key(name)
+        if key in self._names:
+            return True
+        domain, sep, short = key.rpartition("\\")
+        return bool(sep) and domain in _BUILTIN_DOMAINS and short in self._names
+
+    def resolve(self, names):
+        """Resolve account names in bulk; returns {name: SID or None}."""
+        names = [n for n in dict.fromkeys(names) if n and not _SID.match(n.lstrip("*"))]
+        with self._lock:
+            missing = [n for n in names if not self._known(n)]
+            if missing:
+                self._lookup(missing)
+        return {n: self.sid_for(n) for n in names}
+
+    def _lookup(self, names):
+        self.lookups += 1
+        output = self.command_output(self.run_backend("lookup_accounts", names), log_errors=False)
+        found = {}
+        for line in (output or "").splitlines():
+            name, _, sid = line.partition("\t")
+            if sid.strip():
+                found[self._name_key(name)] = sid.strip().upper()
+        for name in names:
+            sid = found.get(self._name_key(name))
+            self._names[self._name_key(name)] = sid
+            if sid is None:
+                self.log_warn(f"Could not resolve account '{name}' to a SID; comparing it by name.")
+
+    def sid_for(self, name):
+        key = self._name_key(name)
+        if key in self._names:
+            return self._names[key]
+        domain, sep, short = key.rpartition("\\")
+        if sep and domain in _BUILTIN_DOMAINS:
+            return self._names.get(short)
+        return None
+
+    def normalize(self, value):
+        """Principal set of a user-right value: SIDs where known, folded names otherwise."""
+        principals = split_principals(value)
+        self.resolve(principals)
+        result = set()
+        for p in principals:
+            bare = p.lstrip("*")
+            if _SID.match(bare):
+                result.add(bare.upper())
+            else:
+                result.add(self.sid_for(p) or self._name_key(p))
+        return frozenset(result)
+
+    def same_principals(self, current, target):
+        """True if both user-right values grant the right to the same accounts, in any order."""
+        return self.normalize(current) == self.normalize(target)
@@ -0,0 +1,329 @@
+import json
+import os
+import re
+import shutil
+import struct
+import threading
+import time
+from collections import Counter
+
+from core.backend import SystemBackend
+from core.executor import CommandResult
+from core.inf_document import InfDocument, sniff_encoding
+from core.sid_resolver import WELL_KNOWN_SIDS
+from core.windows_registry import HIVES, RegistryValue, normalize_key
+
+# Roughly what `secedit /export` returns on a fresh Windows Server 2022 install
+DEFAULT_POLICY = [
+    "[Unicode]",
+    "Unicode=yes",
+    "[System Access]",
+    "MinimumPasswordAge = 0",
+    "MaximumPasswordAge = 42",
+    "MinimumPasswordLength = 0",
+    "PasswordComplexity = 0",
+    "PasswordHistorySize = 0",
+    "LockoutBadCount = 0",
+    "RequireLogonToChangePassword = 0",
+    "ForceLogoffWhenHourExpire = 0",
+    'NewAdministratorName = "Administrator"',
+    'NewGuestName = "Guest"',
+    "ClearTextPassword = 0",
+    "LSAAnonymousNameLookup = 0",
+    "EnableAdminAccount = 1",
+    "EnableGuestAccount = 0",
+    "[Event Audit]",
+    "AuditSystemEvents = 0",
+    "AuditLogonEvents = 0",
+    "[Privilege Rights]",
+    "SeNetworkLogonRight = *S-1-1-0,*S-1-5-32-544,*S-1-5-32-545,*S-1-5-32-551",
+    "SeBackupPrivilege = *S-1-5-32-544,*S-1-5-32-551",
+    "SeChangeNotifyPrivilege = *S-1-1-0,*S-1-5-19,*S-1-5-20,*S-1-5-32-544,*S-1-5-32-545,*S-1-5-32-551",
+    "SeSystemtimePrivilege = *S-1-5-19,*S-1-5-32-544",
+    "SeCreatePagefilePrivilege = *S-1-5-32-544",
+    "SeDebugPrivilege = *S-1-5-32-544",
+    "SeRemoteShutdownPrivilege = *S-1-5-32-544",
+    "SeIncreaseQuotaPrivilege = *S-1-5-19,*S-1-5-20,*S-1-5-32-544",
+    "SeInteractiveLogonRight = *S-1-5-32-544,*S-1-5-32-545,*S-1-5-32-551",
+    "SeRemoteInteractiveLogonRight = *S-1-5-32-544,*S-1-5-32-555",
+    "SeShutdownPrivilege = *S-1-5-32-544,*S-1-5-32-551",
+    "SeTakeOwnershipPrivilege = *S-1-5-32-544",
+    "[Version]",
+    'signature="$CHICAGO$"',
+    "Revision=1",
+]
+
+DEFAULT_REGISTRY = {
+    r"HKEY_LOCAL_MACHINE\SYSTEM\CurrentControlSet\Control\Lsa": [
+        ("auditbaseobjects", "REG_DWORD", 0),
+        ("Authentication Packages", "REG_MULTI_SZ", ["msv1_0"]),
+        ("LimitBlankPasswordUse", "REG_DWORD", 1),
+        ("NoLmHash", "REG_DWORD", 1),
+    ],
+    r"HKEY_LOCAL_MACHINE\SYSTEM\CurrentControlSet\Control\SAM": [],
+}
+
+# Local accounts of the simulated host, on top of the well-known principals
+DEFAULT_ACCOUNTS = {
+    "administrator": "S-1-5-21-3623811015-3361044348-30300820-500",
+    "guest": "S-1-5-21-3623811015-3361044348-30300820-501",
+}
+
+_NOT_FOUND = "ERROR: The system was unable to find the specified registry key or value."
+_TOKEN = re.compile(r'"[^"]*"|\S+')
+
+
+def _full_key(key):
+    hive, sep, rest = key.strip().strip('"').rstrip("\\").partition("\\")
+    return HIVES.get(hive.upper(), hive) + sep + rest
+
+
+def parse_reg_file(text):
+    """
+    Parse a .reg file into [(key, name, type, data)]; data None deletes the value.
+    Covers the subset RegistryWriteBatch emits plus REGEDIT4 headers.
+    """
+    entries = []
+    key = None
+    logical = []
+    for raw in text.splitlines():
+        line = raw.strip()
+        if logical:
+            logical.append(line)
+            if line.endswith("\\"):
+                continue
+            line, logical = "".join(part.rstrip("\\") for part in logical), []
+        elif line.endswith("\\") and "=hex" in line:
+            logical.append(line)
+            continue
+
+        if not line or line.startswith(";") or line.startswith("Windows Registry Editor") or line == "REGEDIT4":
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            key = line[1:-1]
+            continue
+        if key is None:
+            continue
+
+        if line.startswith("@="):
+            name, rendered = "", line[2:]
+        else:
+            m = re.match(r'^"((?:[^"\\]|\\.)*)"=(.*)$', line)
+            if not m:
+                continue
+            name, rendered = m.group(1).replace('\\"', '"').replace("\\\\", "\\"), m.group(2)
+
+        entries.append((key, name) + _parse_reg_data(rendered))
+    return entries
+
+
+def _parse_reg_data(rendered):
+    if rendered == "-":
+        return None, None
+    if rendered.startswith('"'):
+        return "REG_SZ", rendered[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    if rendered.startswith("dword:"):
+        return "REG_DWORD", int(rendered[6:], 16)
+    prefix, _, payload = rendered.partition(":")
+    data = bytes(int(b, 16) for b in payload.split(",") if b.strip())
+    if prefix == "hex(b)":
+        return "REG_QWORD", struct.unpack("<Q", data.ljust(8, b"\0"))[0]
+    if prefix == "hex(2)":
+        return "REG_EXPAND_SZ", data.decode("utf-16-le").rstrip("\0")
+    if prefix == "hex(7)":
+        return "REG_MULTI_SZ", [v for v in data.decode("utf-16-le").split("\0") if v]
+    return "REG_BINARY", data
+
+
+class SimulatedBackend(SystemBackend):
+    """
+    File-backed stand-in for a Windows host, for CI runners and benchmarks.
+
+    root/policy.inf holds the local security policy in secedit export format
+    and root/registry.json the registry tree. secedit export/configure and
+    reg query/add/import are emulated on top of them; every call can be
+    slowed down with a fixed latency (seconds), optionally per operation.
+    """
+    name = "simulated"
+
+    def __init__(self, root, latency=0.0, latencies=None, executor=None):
+        self.root = os.path.abspath(root)
+        super().__init__(temp_dir=os.path.join(self.root, "Temp"), executor=executor)
+        self.latency = latency
+        self.latencies = dict(latencies or {})
+        self.calls = Counter()
+        self._lock = threading.RLock()
+        self.policy_path = os.path.join(self.root, "policy.inf")
+        self.registry_path = os.path.join(self.root, "registry.json")
+        self.seed()
+
+    def seed(self, reset=False):
+        """Create a default host under root unless one already exists."""
+        with self._lock:
+            os.makedirs(self.temp_dir, exist_ok=True)
+            if reset or not os.path.exists(self.policy_path):
+                InfDocument(DEFAULT_POLICY).save(self.policy_path)
+            if reset or not os.path.exists(self.registry_path):
+                tree = {}
+                for key, values in DEFAULT_REGISTRY.items():
+                    node = tree.setdefault(normalize_key(key), {"path": key, "values": {}})
+                    for name, value_type, data in values:
+                        node["values"][name.casefold()] = [name, value_type, data]
+                self._save_registry(tree)
+
+    # -------------------------
+    # Helpers
+    # -------------------------
+    def _call(self, op):
+        self.calls[op] += 1
+        delay = self.latencies.get(op, self.latency)
+        if delay:
+            time.sleep(delay)
+
+    @staticmethod
+    def _result(args, returncode=0, stdout="", stderr=""):
+        return CommandResult(args, returncode, stdout, stderr)
+
+    def _load_registry(self):
+        with open(self.registry_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_registry(self, tree):
+        tmp = self.registry_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(tree, f)
+        os.replace(tmp, self.registry_path)
+
+    def set_registry_value(self, key, name, value_type, data):
+        """Write one value directly (also used to prepare test hosts)."""
+        with self._lock:
+            tree = self._load_registry()
+            self._store_value(tree, key, name, value_type, data)
+            self._save_registry(tree)
+
+    @staticmethod
+    def _store_value(tree, key, name, value_type, data):
+        node = tree.setdefault(normalize_key(key), {"path": _full_key(key), "values": {}})
+        if value_type is None:
+            node["values"].pop(name.casefold(), None)
+            return
+        data = RegistryValue.convert(value_type, data)
+        if isinstance(data, bytes):
+            data = data.hex()
+        node["values"][name.casefold()] = [name, value_type, data]
+
+    # -------------------------
+    # SystemBackend
+    # -------------------------
+    def export_policy(self, path):
+        self._call("export_policy")
+        with self._lock:
+            shutil.copyfile(self.policy_path, path)
+        return self._result(["secedit", "/export", "/cfg", path])
+
+    def configure_policy(self, path, db="secedit.sdb"):
+        self._call("configure_policy")
+        args = ["secedit", "/configure", "/db", db, "/cfg", path]
+        try:
+            delta = InfDocument.load(path)
+        except (OSError, UnicodeError) as e:
+            return self._result(args, 1, stderr=str(e))
+
+        with self._lock:
+            policy = InfDocument.load(self.policy_path)
+            for section in delta.sections():
+                if section.casefold() in ("unicode", "version"):
+                    continue
+                for key, value in delta.items(section):
+                    # secedit drops a right entirely when it is granted to no one
+                    if section.casefold() == "privilege rights" and not value:
+                        policy.delete(section, key)
+                    else:
+                        policy.set(section, key, value)
+            policy.save(self.policy_path)
+        return self._result(args)
+
+    def query_registry(self, key, value_name=None):
+        self._call("query_registry")
+        args = ["reg", "query", key]
+        with self._lock:
+            node = self._load_registry().get(normalize_key(key))
+        if node is None:
+            return self._result(args, 1, stderr=_NOT_FOUND)
+
+        values = list(node["values"].values())
+        if value_name is not None:
+            values = [v for v in values if v[0].casefold() == value_name.casefold()]
+            if not values:
+                return self._result(args, 1, stderr=_NOT_FOUND)
+
+        lines = ["", node["path"]]
+        for name, value_type, data in values:
+            if value_type in ("REG_DWORD", "REG_QWORD"):
+                rendered = f"0x{data:x}"
+            elif value_type == "REG_MULTI_SZ":
+                rendered = "\\0".join(data)
+            elif value_type == "REG_BINARY":
+                rendered = data.upper()
+            else:
+                rendered = data
+            lines.append(f"    {name}    {value_type}    {rendered}")
+        return self._result(args, stdout="\r\n".join(lines) + "\r\n")
+
+    def import_registry(self, path):
+        self._call("import_registry")
+        args = ["reg", "import", path]
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+            encoding, bom = sniff_encoding(raw)
+            entries = parse_reg_file(raw[len(bom):].decode(encoding))
+        except (OSError, UnicodeError, ValueError) as e:
+            return self._result(args, 1, stderr=f"ERROR: Error accessing the registry. {e}")
+
+        with self._lock:
+            tree = self._load_registry()
+            for key, name, value_type, data in entries:
+                self._store_value(tree, key, name, value_type, data)
+            self._save_registry(tree)
+        return self._result(args, stdout="The operation completed successfully.")
+
+    def lookup_accounts(self, names):
+        self._call("lookup_accounts")
+        accounts = dict(WELL_KNOWN_SIDS, **DEFAULT_ACCOUNTS)
+        lines = []
+        for name in names:
+            short = name.strip().casefold().rpartition("\\")[2]
+            lines.append(f"{name}\t{accounts.get(short, '')}")
+        return self._result(["lookup_accounts"] + list(names), stdout="\n".join(lines))
+
+    def run(self, command):
+        """Emulate the raw secedit/reg command lines modules still issue directly."""
+        tokens = [t.strip('"') for t in _TOKEN.findall(command)]
+        lowered = [t.lower() for t in tokens]
+
+        def arg(flag):
+            return tokens[lowered.index(flag) + 1] if flag in lowered else None
+
+        if lowered[:2] == ["secedit", "/export"]:
+            return self.export_policy(arg("/cfg"))
+        if lowered[:2] == ["secedit", "/configure"]:
+            return self.configure_policy(arg("/cfg"), arg("/db") or "secedit.sdb")
+        if lowered[:2] == ["reg", "query"]:
+            return self.query_registry(tokens[2], arg("/v"))
+        if lowered[:2] == ["reg", "import"]:
+            return self.import_registry(tokens[2])
+        if lowered[:2] == ["reg", "add"]:
+            self._call("reg_add")
+            value_type = arg("/t") or "REG_SZ"
+            data = arg("/d") or ""
+            if value_type == "REG_MULTI_SZ":
+                data = data.split("\\0")
+            try:
+                self.set_registry_value(tokens[2], arg("/v") or "", value_type, data)
+            except ValueError as e:
+                return self._result(tokens, 1, stderr=f"ERROR: Invalid syntax. {e}")
+            return self._result(tokens, stdout="The operation completed successfully.")
+
+        self._call("run")
+        return self._result(tokens)
@@ -0,0 +1,68 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+
+def fingerprint(*parts):
+    """Stable hash of JSON-serialisable inputs."""
+    payload = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RunState:
+    """
+    Per-control results persisted between runs for incremental passes.
+
+    Stores {cis_id: {"fingerprint", "result", "timestamp"}}. A control whose
+    fingerprint (definition + config + observed state) matches the previous
+    run, and which was compliant then, does not need to be evaluated again.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.controls = {}
+        self.commits = {}       # apply-phase unit -> last wall time in ms (core/scheduler.py)
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.controls = data.get("controls", {})
+            self.commits = data.get("commits", {})
+        except (OSError, ValueError, AttributeError):
+            self.controls, self.commits = {}, {}
+
+    def unchanged(self, cis_id, current_fingerprint):
+        """The previous record if the control was compliant with identical inputs."""
+        previous = self.controls.get(cis_id)
+        if previous and previous.get("result") == "OK" and previous.get("fingerprint") == current_fingerprint:
+            return previous
+        return None
+
+    def record(self, cis_id, current_fingerprint, result, timestamp, duration_ms=None):
+        self.controls[cis_id] = {"fingerprint": current_fingerprint, "result": result, "timestamp": timestamp}
+        if duration_ms is not None:
+            # Weighs the control in the next run's schedule (core/scheduler.py)
+            self.controls[cis_id]["duration_ms"] = round(duration_ms, 3)
+
+    def record_commits(self, timings):
+        """Wall time of each apply-phase unit, to weigh the next run's commit plan."""
+        self.commits.update({name: round(ms, 3) for name, ms in timings.items()})
+
+    def forget(self, cis_id):
+        self.controls.pop(cis_id, None)
+
+    def clear(self):
+        """Forget every control and persist that, so the next run is a full one."""
+        self.controls = {}
+        self.save()
+
+    def save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump({"controls": self.controls, "commits": self.commits}, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+        except OSError:
+            # Without a writable state file every run is simply a full run
+            pass
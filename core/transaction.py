@@ -0,0 +1,284 @@
+import base64
+import gzip
+import json
+import os
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+
+from core.base_module import BaseModule
+from core.inf_document import InfDocument
+from core.windows_registry import format_reg_delete, format_reg_value, render_reg_file
+from core.windows_secedit import DELTA_HEADER
+
+SNAPSHOT_VERSION = 1
+DEFAULT_KEEP = 5
+
+
+def _registry_data(value):
+    # JSON-safe form of RegistryValue.data (REG_BINARY is bytes)
+    return value.data.hex() if isinstance(value.data, bytes) else value.data
+
+
+class RunSnapshot:
+    """
+    State a run is about to change, captured before its apply phase:
+
+        policy:   [section, key, value before (None if unset), value applied]
+        registry: [key, name, type, type before, data before (None if unset), data applied]
+        files:    [path, compressed content before (None if the file did not exist)]
+    """
+
+    def __init__(self, run_id, timestamp=None, policy=None, registry=None, files=None):
+        self.run_id = run_id
+        self.timestamp = timestamp or datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        self.policy = policy or []
+        self.registry = registry or []
+        self.files = files or []
+
+    def __bool__(self):
+        return bool(self.policy or self.registry or self.files)
+
+    def to_dict(self):
+        return {"version": SNAPSHOT_VERSION, "run_id": self.run_id, "timestamp": self.timestamp,
+                "policy": self.policy, "registry": self.registry, "files": self.files}
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {data.get('version')!r}")
+        return cls(data["run_id"], data.get("timestamp"), data.get("policy"), data.get("registry"),
+                   data.get("files"))
+
+
+class SnapshotStore:
+    """Gzipped JSON snapshots under one directory; only the newest `keep` are kept."""
+
+    def __init__(self, directory, keep=DEFAULT_KEEP):
+        self.directory = Path(directory)
+        self.keep = max(0, int(keep))
+
+    def _path(self, run_id):
+        return self.directory / f"{run_id}.json.gz"
+
+    def save(self, snapshot):
+        if not self.keep:
+            return None
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(snapshot.run_id)
+        tmp = path.with_name(path.name + ".tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(snapshot.to_dict(), f, separators=(",", ":"))
+        os.replace(tmp, path)
+        self.prune()
+        return path
+
+    def list(self):
+        """Run ids of the stored snapshots, oldest first."""
+        if not self.directory.is_dir():
+            return []
+        paths = sorted(self.directory.glob("*.json.gz"), key=lambda p: p.stat().st_mtime)
+        return [p.name[:-len(".json.gz")] for p in paths]
+
+    def load(self, run_id=None):
+        """The snapshot of run_id, or the newest one; None if there is none."""
+        if run_id is None:
+            runs = self.list()
+            if not runs:
+                return None
+            run_id = runs[-1]
+        try:
+            with gzip.open(self._path(run_id), "rt", encoding="utf-8") as f:
+                return RunSnapshot.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+
+    def prune(self):
+        for run_id in self.list()[:-self.keep or None]:
+            self._path(run_id).unlink(missing_ok=True)
+
+
+class RunTransaction(BaseModule):
+    """
+    Makes a run's apply phase all-or-nothing.
+
+    capture() records, from what the check phase already read, the previous
+    value of every staged policy key and registry value (plus the original
+    content of files modules edited), and stores it before anything is
+    committed. verify() re-reads what the commit should have changed;
+    restore() puts back the previous state with one secedit /configure, one
+    reg import and a rewrite of each edited file.
+    """
+
+    def __init__(self, config, run_id, store=None):
+        super().__init__(name="Run Transaction", config=config)
+        self.id = "transaction"
+        self.run_id = run_id
+        self.store = store
+        self.snapshot = None
+        self._files = {}        # path -> original bytes (None: did not exist)
+        self._modules = []      # modules whose staged changes the snapshot covers
+        self._lock = threading.Lock()
+
+    # -------------------------
+    # Capture
+    # -------------------------
+    def record_file(self, path, original):
+        """Remember a file's content before its first edit in this run."""
+        path = os.path.abspath(path)
+        with self._lock:
+            self._files.setdefault(path, original)
+
+    def capture(self):
+        """Snapshot the pre-apply state of everything staged on the run context."""
+        context = self.context
+        policy, registry = [], []
+        modules = []
+
+        export = context.policy.snapshot() if context.policy.pending() else None
+        for (section, key), (value, module) in sorted(context.policy.pending().items()):
+            policy.append([section, key, export.get(section, key) if export else None, value])
+            modules.append(module)
+
+        for key, name, value_type, data, module in context.registry_writes.pending():
+            before = context.registry.get(key, name)
+            registry.append([key, name, value_type, before.type if before else None,
+                             _registry_data(before) if before else None,
+                             data.hex() if isinstance(data, bytes) else data])
+            modules.append(module)
+
+        for path, original in context.file_edits.originals():
+            self.record_file(path, original)
+        for edits in context.file_edits.pending().values():
+            modules.extend(module for _, _, module in edits)
+        files = [[path, base64.b64encode(zlib.compress(data)).decode("ascii") if data is not None else None]
+                 for path, data in sorted(self._files.items())]
+
+        self.snapshot = RunSnapshot(self.run_id, policy=policy, registry=registry, files=files)
+        self._modules = list(dict.fromkeys(modules))
+        if self.snapshot and self.store is not None:
+            start = time.perf_counter()
+            path = self.store.save(self.snapshot)
+            if path is not None:
+                size = path.stat().st_size
+                self.count(bytes_written=size)
+                self.logger.info(f"Snapshot {path} ({size} bytes) in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return self.snapshot
+
+    # -------------------------
+    # Verification
+    # -------------------------
+    def verify(self):
+        """Re-read the committed state; returns a description of every value that did not take."""
+        context = self.context
+        failures = []
+        if self.snapshot.policy:
+            export = context.policy.refresh()
+            if export is None:
+                failures.append("security policy could not be re-exported")
+            else:
+                for section, key, _, applied in self.snapshot.policy:
+                    _, _, matches = context.policy.evaluate(section, key, applied)
+                    if not matches:
+                        failures.append(f"{key} is not {applied!r} after secedit /configure")
+        for key, name, value_type, _, _, applied in self.snapshot.registry:
+            # RegistryWriteBatch re-read every touched key after the import
+            if not context.registry.matches(key, name, applied, value_type):
+                failures.append(f"{name} is not {applied!r} after reg import")
+        return failures
+
+    # -------------------------
+    # Rollback
+    # -------------------------
+    def abort(self, reason):
+        """Drop everything staged; nothing has been committed, so nothing is restored."""
+        context = self.context
+        for session in (context.policy, context.registry_writes, context.file_edits):
+            session.discard(reason)
+        self.log_warn(f"Nothing applied: {reason}")
+
+    def rollback(self, reason):
+        """Restore the captured state after a failed commit or verification."""
+        # A file whose write failed was never touched; rewriting it from the
+        # snapshot could only lose changes made to it since
+        committed = self.context.file_edits.committed()
+        snapshot = RunSnapshot(self.snapshot.run_id, self.snapshot.timestamp, self.snapshot.policy,
+                               self.snapshot.registry, [entry for entry in self.snapshot.files if entry[0] in committed])
+        ok = self.restore(snapshot)
+        for module in self._modules:
+            module.log_warn(f"Rolled back: {reason}")
+        if ok:
+            self.log_change(f"Rolled back run {self.run_id}: {reason}")
+        else:
+            self.log_error(f"Rollback of run {self.run_id} incomplete: {reason}")
+        return ok
+
+    def restore(self, snapshot):
+        """Write snapshot's previous values back; returns True if every part succeeded."""
+        ok = self._restore_policy(snapshot.policy)
+        ok = self._restore_registry(snapshot.registry) and ok
+        ok = self._restore_files(snapshot.files) and ok
+        if self.context is not None:
+            self.context.registry.invalidate()
+            self.context.policy.refresh(export=False)
+            self.context.commands.invalidate()
+        return ok
+
+    def _restore_policy(self, entries):
+        edits = {}
+        for section, key, before, _ in entries:
+            if before is None and section.casefold() != "privilege rights":
+                # secedit cannot unset a System Access value; it keeps the applied one
+                self.log_warn(f"{key} was not set before the run and cannot be unset by secedit")
+                continue
+            # An empty Privilege Rights entry grants the right to no one, i.e. unset
+            edits[(section, key)] = before or ""
+        if not edits:
+            return True
+
+        delta = InfDocument(DELTA_HEADER)
+        delta.update(edits)
+        delta_cfg = os.path.join(self.backend.temp_dir, f"hardening-{self.run_id}-rollback.inf")
+        delta.save(delta_cfg)
+        try:
+            return self.command_output(self.run_backend("configure_policy", delta_cfg)) is not None
+        finally:
+            if os.path.exists(delta_cfg):
+                os.remove(delta_cfg)
+
+    def _restore_registry(self, entries):
+        if not entries:
+            return True
+        content = render_reg_file(
+            (key, format_reg_delete(name) if before_type is None else format_reg_value(name, before_type, before))
+            for key, name, _, before_type, before, _ in entries)
+
+        reg_file = os.path.join(self.backend.temp_dir, f"hardening-{self.run_id}-rollback.reg")
+        with open(reg_file, "w", encoding="utf-16") as f:
+            f.write(content)
+        try:
+            return self.command_output(self.run_backend("import_registry", reg_file)) is not None
+        finally:
+            if os.path.exists(reg_file):
+                os.remove(reg_file)
+
+    def _restore_files(self, entries):
+        ok = True
+        for path, packed in entries:
+            try:
+                if packed is None:
+                    if os.path.exists(path):
+                        os.remove(path)
+                    continue
+                data = zlib.decompress(base64.b64decode(packed))
+                tmp = f"{path}.rollback"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+                self.count(bytes_written=len(data))
+            except OSError as e:
+                self.log_error(f"Could not restore {path}: {e}")
+                ok = False
+        return ok
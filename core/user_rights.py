@@ -8,4 +8,7 @@ class UserRightsModule(SeceditModule):
         
         # Apply using the generic secedit logic
         # Note: secedit expects values to look like: SeDebugPrivilege = *S-1-5-32-544,Administrator
-        self.apply_secedit_policy(privilege_constant, target_val, section_name="Privilege Rights")
\ No newline at end of file
+        self.apply_secedit_policy(privilege_constant, target_val, section_name="Privilege Rights")
+
+    def audit_user_right(self, privilege_constant, desired_users_list):
+        self.audit_secedit_policy(privilege_constant, ",".join(desired_users_list), section_name="Privilege Rights")
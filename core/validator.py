@@ -1,22 +1,53 @@
 import logging
 
+from core.events import DURABILITY_MODES
+from core.windows_registry import RegistryValue
+
 logger = logging.getLogger("Validator")
 
+GENERAL_KEYS = ('dry_run', 'mode', 'backend', 'max_workers', 'slowest_controls', 'sid_table',
+                'events', 'commands', 'simulation', 'transaction', 'agent')
+
+
 class ConfigValidator:
-    def __init__(self, config):
+    def __init__(self, config, catalog=None, overridden=()):
         self.config = config
+        # With a catalog, every control section is checked against its entry;
+        # ids in `overridden` are Python modules, whose settings are their own.
+        self.catalog = {spec.id: spec for spec in catalog or []}
+        self.overridden = set(overridden)
         self.errors = []
 
     def validate(self):
         """
         Main entry point. Returns True if config is good, False if bad.
         """
-        # Example Check: Ensure the 'general' section exists
-        if 'general' not in self.config:
+        if not isinstance(self.config, dict):
+            self.errors.append("config.yaml must be a mapping")
+        elif 'general' not in self.config:
             self.errors.append("Missing 'general' section in config.yaml")
+        elif not isinstance(self.config['general'], dict):
+            self.errors.append("'general' must be a mapping")
         else:
+            unknown = set(self.config['general']) - set(GENERAL_KEYS)
+            if unknown:
+                self.errors.append(f"In 'general': unknown keys: {', '.join(sorted(map(str, unknown)))}")
             # Check if 'dry_run' is a boolean (True/False)
             self._check_type('general', 'dry_run', bool)
+            self._check_choice('general', 'mode', ('enforce', 'audit'))
+            self._check_choice('general', 'backend', ('local', 'simulated'))
+            self._check_positive_int('general', 'max_workers')
+            self._check_type('general', 'sid_table', dict)
+            self._check_type('general', 'slowest_controls', int)
+            self._check_events()
+            self._check_commands()
+            self._check_transaction()
+            self._check_agent()
+
+        if isinstance(self.config, dict):
+            for section, settings in self.config.items():
+                if section != 'general':
+                    self._check_control(str(section), settings)
 
         # --- Final Decision ---
         if self.errors:
@@ -26,6 +57,111 @@ class ConfigValidator:
         
         return True # Validation Passed
 
+    def _check_control(self, cis_id, settings):
+        """One control section: `enabled` plus the catalog entry's typed setting"""
+        if settings is None:
+            return
+        if not isinstance(settings, dict):
+            self.errors.append(f"In '{cis_id}': section must be a mapping, got {type(settings).__name__}")
+            return
+        if 'enabled' in settings and not isinstance(settings['enabled'], bool):
+            self.errors.append(f"In '{cis_id}': 'enabled' must be bool, got {type(settings['enabled']).__name__}")
+
+        spec = self.catalog.get(cis_id)
+        if spec is None or cis_id in self.overridden:
+            return
+
+        setting = spec.setting or ('users' if spec.backend == 'user_rights' else None)
+        allowed = {'enabled', setting}
+        if spec.backend == 'user_rights':
+            # Informational copy of the right's name; must not contradict the catalog
+            allowed.add('right')
+            if 'right' in settings and settings['right'] != spec.key:
+                self.errors.append(f"In '{cis_id}': 'right' is {settings['right']!r} but the catalog enforces {spec.key!r}")
+        unknown = set(settings) - allowed
+        if unknown:
+            self.errors.append(f"In '{cis_id}': unknown keys: {', '.join(sorted(map(str, unknown)))}"
+                               + (f" (this control's setting is '{setting}')" if setting else ""))
+
+        if setting and setting in settings:
+            problem = setting_problem(spec, settings[setting])
+            if problem:
+                self.errors.append(f"In '{cis_id}': '{setting}' {problem}")
+
+    def _check_events(self):
+        """general.events tunes the JSONL sink (core/events.py)"""
+        events = self.config['general'].get('events')
+        if events is None:
+            return
+        if not isinstance(events, dict):
+            self.errors.append("In 'general': 'events' must be a mapping")
+            return
+
+        for key in ('buffer_events', 'max_bytes', 'backups', 'flush_interval'):
+            value = events.get(key)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                self.errors.append(f"In 'general.events': '{key}' must be a number, got {type(value).__name__}")
+        if 'durability' in events and events['durability'] not in DURABILITY_MODES:
+            self.errors.append(
+                f"In 'general.events': 'durability' must be one of "
+                f"{', '.join(DURABILITY_MODES)}, got {events['durability']!r}"
+            )
+
+    def _check_commands(self):
+        """general.commands tunes the command executor (core/executor.py)"""
+        commands = self.config['general'].get('commands')
+        if commands is None:
+            return
+        if not isinstance(commands, dict):
+            self.errors.append("In 'general': 'commands' must be a mapping")
+            return
+
+        unknown = set(commands) - {'max_concurrency', 'timeout'}
+        if unknown:
+            self.errors.append(f"In 'general.commands': unknown keys: {', '.join(sorted(unknown))}")
+        for key in ('max_concurrency', 'timeout'):
+            value = commands.get(key)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0):
+                self.errors.append(f"In 'general.commands': '{key}' must be a positive number, got {value!r}")
+
+    def _check_transaction(self):
+        """general.transaction controls snapshots and rollback (core/transaction.py)"""
+        transaction = self.config['general'].get('transaction')
+        if transaction is None:
+            return
+        if not isinstance(transaction, dict):
+            self.errors.append("In 'general': 'transaction' must be a mapping")
+            return
+
+        unknown = set(transaction) - {'enabled', 'keep'}
+        if unknown:
+            self.errors.append(f"In 'general.transaction': unknown keys: {', '.join(sorted(unknown))}")
+        if 'enabled' in transaction and not isinstance(transaction['enabled'], bool):
+            self.errors.append("In 'general.transaction': 'enabled' must be bool")
+        keep = transaction.get('keep')
+        if keep is not None and (isinstance(keep, bool) or not isinstance(keep, int) or keep < 0):
+            self.errors.append(f"In 'general.transaction': 'keep' must be a non-negative integer, got {keep!r}")
+
+    def _check_agent(self):
+        """general.agent schedules the resident mode (main.py --agent)"""
+        agent = self.config['general'].get('agent')
+        if agent is None:
+            return
+        if not isinstance(agent, dict):
+            self.errors.append("In 'general': 'agent' must be a mapping")
+            return
+
+        unknown = set(agent) - {'interval', 'jitter'}
+        if unknown:
+            self.errors.append(f"In 'general.agent': unknown keys: {', '.join(sorted(unknown))}")
+        interval = agent.get('interval')
+        if interval is not None and (isinstance(interval, bool) or not isinstance(interval, (int, float))
+                                     or interval <= 0):
+            self.errors.append(f"In 'general.agent': 'interval' must be a positive number, got {interval!r}")
+        jitter = agent.get('jitter')
+        if jitter is not None and (isinstance(jitter, bool) or not isinstance(jitter, (int, float)) or jitter < 0):
+            self.errors.append(f"In 'general.agent': 'jitter' must be a non-negative number, got {jitter!r}")
+
     def _check_type(self, section, key, expected_type):
         """Reusable helper to check data types"""
         if section in self.config and key in self.config[section]:
@@ -33,4 +169,39 @@ class ConfigValidator:
             if not isinstance(value, expected_type):
                 self.errors.append(
                     f"In '{section}': '{key}' must be {expected_type.__name__}, got {type(value).__name__}"
-                )
\ No newline at end of file
+                )
+
+    def _check_positive_int(self, section, key):
+        """Like _check_type(int), but also rejects bools, zero and negatives"""
+        if section in self.config and key in self.config[section]:
+            value = self.config[section][key]
+            if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+                self.errors.append(f"In '{section}': '{key}' must be a positive int, got {value!r}")
+
+    def _check_choice(self, section, key, choices):
+        """Reusable helper to check a value is one of a fixed set"""
+        if section in self.config and key in self.config[section]:
+            value = self.config[section][key]
+            if value not in choices:
+                self.errors.append(
+                    f"In '{section}': '{key}' must be one of {', '.join(map(str, choices))}, got {value!r}"
+                )
+
+
+def setting_problem(spec, value):
+    """Why `value` cannot be enforced by catalog entry `spec`, or None if it can."""
+    if spec.backend == 'user_rights':
+        if not isinstance(value, list) or not all(isinstance(v, str) and v.strip() for v in value):
+            return "must be a list of account names or *SIDs"
+        return None
+    if isinstance(value, bool) or value is None or isinstance(value, (list, dict)) and spec.type != 'REG_MULTI_SZ':
+        return f"must be a {'number' if spec.type in (None, 'REG_DWORD', 'REG_QWORD') else 'string'}, got {type(value).__name__}"
+    if spec.backend == 'secedit':
+        if not isinstance(value, (int, str)):
+            return f"must be a number or string, got {type(value).__name__}"
+        return None
+    try:
+        RegistryValue.convert(spec.type or 'REG_DWORD', value)
+    except (TypeError, ValueError):
+        return f"is not a valid {spec.type or 'REG_DWORD'} value: {value!r}"
+    return None
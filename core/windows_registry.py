@@ -0,0 +1,317 @@
+import os
+import re
+import struct
+import threading
+import uuid
+from core.base_module import BaseModule
+
+HIVES = {
+    "HKLM": "HKEY_LOCAL_MACHINE",
+    "HKCU": "HKEY_CURRENT_USER",
+    "HKCR": "HKEY_CLASSES_ROOT",
+    "HKU": "HKEY_USERS",
+    "HKCC": "HKEY_CURRENT_CONFIG",
+}
+
+# `reg query` prints values as: <4 spaces>Name<4 spaces>REG_TYPE<4 spaces>Data
+_VALUE_LINE = re.compile(r"^ {4}(.*?) {4}(REG_[A-Z_]+)(?: {4}(.*))?$")
+
+
+def normalize_key(key):
+    """'HKLM\\System\\...' and 'HKEY_LOCAL_MACHINE\\System\\...' map to the same cache key."""
+    key = key.strip().strip('"').rstrip("\\")
+    hive, sep, rest = key.partition("\\")
+    hive = HIVES.get(hive.upper(), hive.upper())
+    return (hive + sep + rest).casefold()
+
+
+class RegistryValue:
+    """One typed registry value as returned by `reg query`."""
+
+    def __init__(self, name, value_type, data):
+        self.name = name
+        self.type = value_type
+        self.data = data
+
+    @classmethod
+    def from_query(cls, name, value_type, raw):
+        return cls(name, value_type, cls.convert(value_type, raw or ""))
+
+    @staticmethod
+    def convert(value_type, raw):
+        """Turn the textual `reg` representation (or a config value) into a Python value."""
+        if value_type in ("REG_DWORD", "REG_QWORD"):
+            if isinstance(raw, int):
+                return raw
+            raw = str(raw).strip()
+            return int(raw, 16) if raw.lower().startswith("0x") else int(raw)
+        if value_type == "REG_MULTI_SZ":
+            if isinstance(raw, (list, tuple)):
+                return [str(v) for v in raw]
+            return [v for v in str(raw).split("\\0") if v]
+        if value_type == "REG_BINARY":
+            if isinstance(raw, (bytes, bytearray)):
+                return bytes(raw)
+            return bytes.fromhex(str(raw).strip())
+        return str(raw)
+
+    def equals(self, expected, value_type=None):
+        """Typed comparison: 1 == '1' == '0x1' for a DWORD, list order matters for MULTI_SZ."""
+        if value_type and value_type != self.type:
+            return False
+        try:
+            return self.data == self.convert(self.type, expected)
+        except (TypeError, ValueError):
+            return False
+
+    def __repr__(self):
+        return f"RegistryValue({self.name!r}, {self.type}, {self.data!r})"
+
+
+def _reg_string(text):
+    return '"' + str(text).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _reg_hex(prefix, data):
+    return prefix + ":" + ",".join(f"{b:02x}" for b in data)
+
+
+def format_reg_value(value_name, value_type, data):
+    """Render one value as a line of a `Windows Registry Editor Version 5.00` file."""
+    name = "@" if value_name in ("", "(Default)") else _reg_string(value_name)
+    data = RegistryValue.convert(value_type, data)
+    if value_type == "REG_DWORD":
+        rendered = f"dword:{data & 0xFFFFFFFF:08x}"
+    elif value_type == "REG_QWORD":
+        rendered = _reg_hex("hex(b)", struct.pack("<Q", data & 0xFFFFFFFFFFFFFFFF))
+    elif value_type == "REG_SZ":
+        rendered = _reg_string(data)
+    elif value_type == "REG_EXPAND_SZ":
+        rendered = _reg_hex("hex(2)", (data + "\0").encode("utf-16-le"))
+    elif value_type == "REG_MULTI_SZ":
+        rendered = _reg_hex("hex(7)", ("".join(v + "\0" for v in data) + "\0").encode("utf-16-le"))
+    elif value_type == "REG_BINARY":
+        rendered = _reg_hex("hex", data)
+    else:
+        raise ValueError(f"Unsupported registry type: {value_type}")
+    return f"{name}={rendered}"
+
+
+def format_reg_delete(value_name):
+    """A .reg line that deletes one value."""
+    return ("@" if value_name in ("", "(Default)") else _reg_string(value_name)) + "=-"
+
+
+def render_reg_file(lines):
+    """A `Windows Registry Editor Version 5.00` file from (key, value line) pairs, grouped by key."""
+    by_key = {}
+    for key, line in lines:
+        by_key.setdefault(normalize_key(key), (key, []))[1].append(line)
+    out = ["Windows Registry Editor Version 5.00"]
+    for key, entries in by_key.values():
+        hive, sep, rest = key.partition("\\")
+        out.append("")
+        out.append(f"[{HIVES.get(hive.upper(), hive) + sep + rest}]")
+        out.extend(entries)
+    return "\r\n".join(out) + "\r\n"
+
+
+def parse_query_output(output):
+    """Parse `reg query "<key>"` output into {folded value name: RegistryValue}."""
+    values = {}
+    for line in (output or "").splitlines():
+        m = _VALUE_LINE.match(line.rstrip("\r"))
+        if not m:
+            continue
+        name, value_type, raw = m.groups()
+        values[name.casefold()] = RegistryValue.from_query(name, value_type, raw)
+    return values
+
+
+class RegistryReader(BaseModule):
+    """
+    Run-scoped registry state cache.
+
+    Each key path is read with one `reg query` the first time any control asks
+    for it; every later lookup in the run is served from memory. Writers call
+    invalidate() so the next read reflects the new state. The cache is
+    shared by every control of the run, so it is only touched under a lock.
+    """
+
+    def __init__(self, config):
+        super().__init__(name="Registry Reader", config=config)
+        self.id = "registry"
+        self._keys = {}     # normalized key path -> {folded value name: RegistryValue}
+        self._key_locks = {}
+        self._generation = 0    # bumped by invalidate() so in-flight reads do not cache stale state
+        self._lock = threading.Lock()
+
+    def read_key(self, key):
+        folded = normalize_key(key)
+        with self._lock:
+            values = self._keys.get(folded)
+            if values is not None:
+                return values
+            # One lock per key: concurrent controls on different keys query in
+            # parallel, controls on the same key wait for a single `reg query`.
+            key_lock = self._key_locks.setdefault(folded, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                values = self._keys.get(folded)
+                if values is not None:
+                    return values
+                generation = self._generation
+            # A missing key is a normal state (the value still has to be created)
+            output = self.command_output(self.run_backend("query_registry", key), log_errors=False)
+            values = parse_query_output(output)
+            with self._lock:
+                if generation == self._generation:
+                    self._keys[folded] = values
+            return values
+
+    def get(self, key, value_name):
+        return self.read_key(key).get(value_name.casefold())
+
+    def matches(self, key, value_name, expected, value_type=None):
+        current = self.get(key, value_name)
+        return current is not None and current.equals(expected, value_type)
+
+    def invalidate(self, key=None):
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._keys.clear()
+            else:
+                self._keys.pop(normalize_key(key), None)
+
+
+class RegistryWriteBatch(BaseModule):
+    """
+    Run-scoped collector for registry writes.
+
+    Controls stage values during the run; commit() renders them into one .reg
+    file, applies it with a single `reg import` and then re-reads the touched
+    keys so every control still gets its own CHANGED/ERROR result.
+    """
+
+    def __init__(self, config, reader):
+        super().__init__(name="Registry Writer", config=config)
+        self.id = "registry-writes"
+        self.reader = reader
+        self.token = uuid.uuid4().hex[:8]
+        self._pending = {}      # {(normalized key, folded name): (key, name, type, data, module)}
+        self._lock = threading.RLock()
+
+    def stage(self, module, key, value_name, value_type, data):
+        slot = (normalize_key(key), value_name.casefold())
+        with self._lock:
+            previous = self._pending.get(slot)
+            if previous and previous[4] is not module:
+                module.log_warn(f"{value_name} was already staged by {previous[4].name}; overriding.")
+            self._pending[slot] = (key, value_name, value_type, data, module)
+
+    def pending(self):
+        """[(key, name, type, data, module)] staged for commit(), in .reg order."""
+        with self._lock:
+            return [entry for _, entry in sorted(self._pending.items())]
+
+    def discard(self, reason):
+        """Drop every staged value without writing it."""
+        with self._lock:
+            for _, value_name, _, _, module in self._pending.values():
+                module.log_warn(f"{value_name} not applied: {reason}")
+            self._pending.clear()
+
+    def render(self):
+        """The exact .reg file commit() imports."""
+        return render_reg_file((key, format_reg_value(value_name, value_type, data))
+                               for key, value_name, value_type, data, _ in self.pending())
+
+    def commit_units(self):
+        """[(commit, name, writes)] for the apply-phase plan: every staged value goes into one import."""
+        with self._lock:
+            writes = {"registry:" + normalize_key(key) for key, _, _, _, _ in self._pending.values()}
+        return [(self.commit, "registry", writes)] if writes else []
+
+    def commit(self):
+        with self._lock:
+            return self._commit()
+
+    def _commit(self):
+        if not self._pending:
+            return True
+
+        content = self.render()
+        if self.config.get('general', {}).get('dry_run'):
+            self.log_change(f"(DRY RUN) Would import {len(self._pending)} registry value(s):\n{content}")
+            self._pending.clear()
+            return True
+
+        reg_file = os.path.join(self.backend.temp_dir, f"hardening-{self.token}.reg")
+        with open(reg_file, 'w', encoding='utf-16') as f:
+            f.write(content)
+
+        try:
+            result = self.command_output(self.run_backend("import_registry", reg_file))
+        finally:
+            if os.path.exists(reg_file):
+                os.remove(reg_file)
+
+        # Re-read every touched key once and report per control
+        for key, _, _, _, _ in self._pending.values():
+            self.reader.invalidate(key)
+        for key, value_name, value_type, data, module in self._pending.values():
+            if self.reader.matches(key, value_name, data, value_type):
+                module.log_change(f"Set {value_name} to {data} in Registry")
+            elif result is None:
+                module.log_error(f"Failed to set {value_name}: reg import failed")
+            else:
+                module.log_error(f"Failed to set {value_name}: value not updated after reg import")
+
+        if result is not None:
+            self.log_change(f"Imported {len(self._pending)} registry value(s) in one reg import")
+        self._pending.clear()
+        return result is not None
+
+
+class RegistryModule(BaseModule):
+    # Only reads and stages during apply(); writes happen in the batch commit
+    parallel_safe = True
+
+    def apply_registry_value(self, key, value_name, target_data, value_type="REG_DWORD"):
+        """
+        Generic logic to enforce one registry value.
+
+        Inside a run the value is read through the shared RegistryReader and the
+        write is staged on the RegistryWriteBatch. Used on its own, the module
+        falls back to a private batch and commits immediately.
+        """
+        if self.context:
+            reader, batch, standalone = self.context.registry, self.context.registry_writes, False
+        else:
+            reader = RegistryReader(self.config)
+            batch, standalone = RegistryWriteBatch(self.config, reader), True
+
+        current = reader.get(key, value_name)
+        if current is not None and current.equals(target_data, value_type):
+            self.log_ok(f"{value_name} is already set to {target_data}.")
+            return False
+
+        if self.config.get('general', {}).get('dry_run'):
+            self.log_change(f"(DRY RUN) Would set {value_name} to {target_data} in Registry")
+
+        batch.stage(self, key, value_name, value_type, target_data)
+        if standalone:
+            batch.commit()
+        return True
+
+    def audit_registry_value(self, key, value_name, target_data, value_type="REG_DWORD"):
+        """Report whether the registry already holds target_data; never writes."""
+        reader = self.context.registry if self.context else RegistryReader(self.config)
+        current = reader.get(key, value_name)
+        actual = None
+        if current is not None:
+            actual = current.data.hex() if isinstance(current.data, bytes) else current.data
+        compliant = current is not None and current.equals(target_data, value_type)
+        self.log_compliance(compliant, value_name, target_data, actual)
@@ -1,33 +1,227 @@
 import os
+import threading
+import uuid
 from core.base_module import BaseModule
+from core.inf_document import InfDocument
+from core.sid_resolver import SidResolver
+
+DELTA_HEADER = ["[Unicode]", "Unicode=yes", "[Version]", 'signature="$CHICAGO$"', "Revision=1"]
+
+
+class PolicySession(BaseModule):
+    """
+    Run-scoped view of the local security policy.
+
+    The policy is exported once, every control stages its desired value in
+    memory, and commit() applies only the differing keys as one delta INF
+    with a single `secedit /configure`.
+    """
+
+    def __init__(self, config):
+        super().__init__(name="Policy Session", config=config)
+        self.id = "secedit"
+        self.token = uuid.uuid4().hex[:8]
+
+        self._policy = None          # InfDocument once exported
+        self._export_failed = False
+        self._pending = {}           # {(section, key): (value, module)}
+        self._lock = threading.RLock()
+        self._sids = None
+        self._sids_primed = False
+
+    # -------------------------
+    # Reading
+    # -------------------------
+    def _load(self):
+        with self._lock:
+            return self._export()
+
+    def _export(self):
+        if self._policy is not None or self._export_failed:
+            return self._policy
+
+        export_cfg = os.path.join(self.backend.temp_dir, f"hardening-{self.token}-export.inf")
+        self.command_output(self.run_backend("export_policy", export_cfg))
+
+        if not os.path.exists(export_cfg):
+            self.logger.error("Failed to export security policy.")
+            self._export_failed = True
+            return None
+
+        try:
+            self._policy = InfDocument.load(export_cfg)
+        finally:
+            os.remove(export_cfg)
+        return self._policy
+
+    def snapshot(self):
+        """The exported policy as an InfDocument, or None if the export failed."""
+        return self._load()
+
+    def refresh(self, export=True):
+        """Forget the cached export (after the policy changed) and, by default, export again."""
+        with self._lock:
+            self._policy = None
+            self._export_failed = False
+            return self._export() if export else None
+
+    def current_value(self, section_name, key_name):
+        policy = self._load()
+        if policy is None:
+            return None
+        return policy.get(section_name, key_name)
+
+    @property
+    def sids(self):
+        """The run's SidResolver (a private one when used outside a run)."""
+        if self.context is not None:
+            return self.context.sids
+        if self._sids is None:
+            self._sids = SidResolver(self.config)
+        return self._sids
+
+    def _prime_sids(self):
+        # Resolve every account name in the export with one bulk lookup,
+        # instead of one lookup per user-rights control
+        with self._lock:
+            if self._sids_primed or self._policy is None:
+                return
+            self._sids_primed = True
+            names = [v for _, value in self._policy.items("Privilege Rights") for v in value.split(",")]
+        self.sids.resolve([n.strip() for n in names if n.strip()])
+
+    def evaluate(self, section_name, key_name, target_value):
+        """Compare one key against the export: (current value, target value, matches)."""
+        target_value = str(target_value).strip()
+        current = self.current_value(section_name, key_name)
+        if section_name == "Privilege Rights":
+            # secedit omits rights that are granted to no one, and the order
+            # and spelling (name or *SID) of the accounts carry no meaning
+            current = current or ""
+            self._prime_sids()
+            return current, target_value, self.sids.same_principals(current, target_value)
+        return current, target_value, current == target_value
+
+    # -------------------------
+    # Staging
+    # -------------------------
+    def request(self, module, section_name, key_name, target_value):
+        """
+        Compare one control's desired value against the export and stage it
+        for commit() if it differs. Results are logged on the requesting module.
+        """
+        if self._load() is None:
+            module.log_error("Failed to export security policy.")
+            return False
+
+        current, target_value, matches = self.evaluate(section_name, key_name, target_value)
+        if matches:
+            module.log_ok(f"Setting '{key_name} = {target_value}' is already set.")
+            return False
+
+        if self.config.get('general', {}).get('dry_run'):
+            module.log_change(f"(DRY RUN) Would set {key_name} from '{current}' to '{target_value}'")
+            return True
+
+        with self._lock:
+            previous = self._pending.get((section_name, key_name))
+            if previous and previous[1] is not module:
+                module.log_warn(f"{key_name} was already staged by {previous[1].name}; overriding.")
+
+            self._pending[(section_name, key_name)] = (target_value, module)
+        return True
+
+    def pending(self):
+        """{(section, key): (value, module)} staged for commit()."""
+        with self._lock:
+            return dict(self._pending)
+
+    def discard(self, reason):
+        """Drop every staged key without applying it."""
+        with self._lock:
+            for (_, key_name), (_, module) in self._pending.items():
+                module.log_warn(f"{key_name} not applied: {reason}")
+            self._pending.clear()
+
+    def build_delta(self):
+        """Render the staged keys as a minimal secedit template."""
+        delta = InfDocument(DELTA_HEADER)
+        # Sorted, so the template does not depend on which check finished first
+        delta.update({k: value for k, (value, _) in sorted(self._pending.items())})
+        return delta
+
+    # -------------------------
+    # Applying
+    # -------------------------
+    def commit_units(self):
+        """[(commit, name, writes)] for the apply-phase plan: every staged key goes into one configure."""
+        with self._lock:
+            writes = {f"policy\\{section_name}\\{key_name}" for section_name, key_name in self._pending}
+        return [(self.commit, "secedit", writes)] if writes else []
+
+    def commit(self):
+        """Apply every staged key with one `secedit /configure`."""
+        with self._lock:
+            return self._commit()
+
+    def _commit(self):
+        if not self._pending:
+            return True
+
+        delta_cfg = os.path.join(self.backend.temp_dir, f"hardening-{self.token}-delta.inf")
+        self.build_delta().save(delta_cfg)
+
+        try:
+            result = self.command_output(self.run_backend("configure_policy", delta_cfg))
+        finally:
+            if os.path.exists(delta_cfg):
+                os.remove(delta_cfg)
+
+        ok = result is not None
+        for (section_name, key_name), (value, module) in self._pending.items():
+            if ok:
+                module.log_change(f"Enforced {key_name} to {value}")
+                self._policy.set(section_name, key_name, value)
+            else:
+                module.log_error(f"Failed to enforce {key_name}: secedit /configure failed")
+
+        if ok:
+            self.log_change(f"Applied {len(self._pending)} policy setting(s) in one secedit /configure")
+        self._pending.clear()
+        return ok
+
 
 class SeceditModule(BaseModule):
+    # Only reads and stages during apply(); writes happen in the session commit
+    parallel_safe = True
+
     def apply_secedit_policy(self, key_name, target_value, section_name="System Access"):
         """
         Generic logic to update Windows Security Policy via secedit.
+
+        Inside a run the value is staged on the shared PolicySession and applied
+        with every other control's change at the end. Used on its own, the module
+        falls back to a private session and commits immediately.
         """
-        temp_cfg = f"C:\\Windows\\Temp\\{self.id}.inf"
-        
-        # 1. Export Policy
-        self.run_command(f"secedit /export /cfg {temp_cfg} /quiet")
-        
-        if not os.path.exists(temp_cfg):
-            self.logger.error("Failed to export security policy.")
+        session = self.context.policy if self.context else None
+        if session is None:
+            session = PolicySession(self.config)
+            session.context = self.context
+            session.request(self, section_name, key_name, target_value)
+            session.commit()
             return
 
-        # 2. Define Regex Pattern to find the specific key
-        # Pattern looks for: KeyName = Value
-        pattern = rf"^\s*{key_name}\s*=\s*(.*)$"
-        replacement = f"{key_name} = {target_value}"
-
-        # 3. Update Content using the BaseModule's regex engine
-        changed = self.update_file_content(temp_cfg, pattern, replacement)
-
-        # 4. Apply Changes
-        if changed and not self.config.get('general', {}).get('dry_run'):
-            self.run_command(f"secedit /configure /db secedit.sdb /cfg {temp_cfg} /quiet")
-            self.log_change(f"Enforced {key_name} to {target_value}")
-        
-        # Cleanup
-        if os.path.exists(temp_cfg): os.remove(temp_cfg)
-        if os.path.exists(f"{temp_cfg}.bak"): os.remove(f"{temp_cfg}.bak")
\ No newline at end of file
+        session.request(self, section_name, key_name, target_value)
+
+    def audit_secedit_policy(self, key_name, target_value, section_name="System Access"):
+        """Report whether the exported policy already holds target_value; never writes."""
+        session = self.context.policy if self.context else None
+        if session is None:
+            session = PolicySession(self.config)
+            session.context = self.context
+
+        if session.snapshot() is None:
+            self.log_error("Failed to export security policy.")
+            return
+        current, target_value, matches = session.evaluate(section_name, key_name, target_value)
+        self.log_compliance(matches, key_name, target_value, current)
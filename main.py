@@ -3,23 +3,40 @@ try:
 except ImportError:
     yaml = None
 
+import argparse
 import os
 import importlib.util
 import inspect
 import sys
 import json
+import time
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
 
+from core.agent import DEFAULT_INTERVAL, DEFAULT_JITTER, AgentSchedule, WarmState, file_signature
+from core.backend import SystemBackend, create_backend
 from core.base_module import BaseModule
-from core.validator import ConfigValidator
+from core.catalog import CatalogError, build_control, load_catalog
+from core.events import JsonlEventSink
+from core.manifest import ModuleManifest, cis_id_from_filename
+from core.run_context import RunContext
+from core.scheduler import Plan, build_plan, execute, preview_commit_plan
+from core.selection import ControlSelector, SelectorError
+from core.settings import ConfigError, load_settings
+from core.state import RunState
+from core.transaction import DEFAULT_KEEP, RunTransaction, SnapshotStore
 
 # Base paths, so we don't depend on the current working directory
 SCRIPT_DIR = Path(__file__).resolve().parent
 REPO_ROOT = SCRIPT_DIR
 DEFAULT_CONFIG = REPO_ROOT / "config.yaml"
+DEFAULT_CATALOG = REPO_ROOT / "catalog.yaml"
 MODULES_DIR = REPO_ROOT / "modules"
+# Manifest and other run-to-run caches; override for read-only installs
+CACHE_DIR = Path(os.environ.get("HARDENING_CACHE_DIR") or REPO_ROOT / ".cache")
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_SLOWEST_CONTROLS = 5
 
 
 def load_config(path: Path) -> dict:
@@ -56,11 +73,8 @@ def _guess_cis_id(hardening_task, module_path: str) -> str:
         if isinstance(v, str) and v.strip():
             return v.strip()
 
-    stem = Path(module_path).stem  # e.g. "1.1.1" or "1_1_1_1"
     # Normalize underscores to dots only if it looks like a numeric control id
-    if any(ch.isdigit() for ch in stem):
-        return stem.replace("_", ".")
-    return stem
+    return cis_id_from_filename(module_path)
 
 
 def _task_title(hardening_task) -> str:
@@ -71,25 +85,40 @@ def _task_title(hardening_task) -> str:
     return hardening_task.__class__.__name__
 
 
-def emit_json_event(jsonl_path: str, event: dict) -> None:
+def _build_event(meta: dict, result: str, message: str, dry_run: bool, extra: dict | None = None) -> dict:
     """
-    Append one JSON object per line (JSONL). Safe: never raises to caller.
+    Wrap one module result in the Wazuh event envelope.
+    extra carries result-specific fields (e.g. expected/actual in audit mode).
     """
-    try:
-        p = Path(jsonl_path)
-        p.parent.mkdir(parents=True, exist_ok=True)
-        with p.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(event, ensure_ascii=False) + "\n")
-    except Exception:
-        # Never break hardening execution because logging failed
-        pass
+    return {
+        "timestamp": _iso_utc_now(),
+        "hardening": dict(meta, **(extra or {}), result=result, message=message, dry_run=dry_run),
+    }
+
+
+def _event_extra(ev: dict, metrics: dict | None = None) -> dict:
+    extra = {k: v for k, v in ev.items() if k not in ("result", "message")}
+    if metrics is not None:
+        extra["metrics"] = metrics
+    return extra
 
 
-def load_module_from_file(filepath: str, config: dict):
+def _rounded_metrics(module) -> dict:
+    return {k: round(v, 3) if isinstance(v, float) else v for k, v in module.metrics.items()}
+
+
+def load_module_from_file(filepath: str, config: dict, class_name: str | None = None):
     """
     Dynamically loads a Python file given a path and instantiates the class
-    inside it that inherits from BaseModule.
+    inside it that inherits from BaseModule. class_name (from the module
+    manifest) skips scanning the module's members.
     """
+    module_class = load_module_class(filepath, class_name)
+    return module_class(config=config) if module_class is not None else None
+
+
+def load_module_class(filepath: str, class_name: str | None = None):
+    """Import a module file and return its BaseModule subclass, or None."""
     module_name = os.path.basename(filepath).replace(".py", "")
 
     spec = importlib.util.spec_from_file_location(module_name, filepath)
@@ -105,151 +134,649 @@ def load_module_from_file(filepath: str, config: dict):
         print(f"[ERROR] Could not load {filepath}: {e}")
         return None
 
+    obj = getattr(module, class_name, None) if class_name else None
+    if inspect.isclass(obj) and issubclass(obj, BaseModule) and obj is not BaseModule:
+        return obj
+
     for _, obj in inspect.getmembers(module):
         if inspect.isclass(obj) and issubclass(obj, BaseModule) and obj is not BaseModule:
-            return obj(config=config)
+            return obj
 
     print(f"[WARN] No BaseModule subclass found in {filepath}")
     return None
 
 
-def main(config_path: str | None = None):
+def _run_task(hardening_task, full_path: str, state: RunState | None = None, audit: bool = False):
     """
-    Main entry point for the hardening framework.
+    Run one module's apply() (audit() in audit mode); returns (error message
+    if it raised, previous state record if the control was skipped because
+    its inputs are unchanged). The wall time lands in the module's metrics.
     """
-    print("--- Python Hardening Framework (CIS Style) ---")
+    start = time.perf_counter()
+    try:
+        return _check_task(hardening_task, full_path, state, audit)
+    finally:
+        hardening_task.count(duration_ms=(time.perf_counter() - start) * 1000)
 
-    # 1) Resolve config path
-    cfg_path = Path(config_path).resolve() if config_path else DEFAULT_CONFIG
-    print(f"[INFO] Using config file: {cfg_path}")
 
-    # 2) Load & validate config
-    config = load_config(cfg_path)
+def _check_task(hardening_task, full_path: str, state: RunState | None, audit: bool):
+    if state is not None:
+        try:
+            fp = hardening_task.fingerprint()
+        except Exception as e:
+            print(f"[WARN] Could not fingerprint {full_path}: {e}")
+            fp = None
+        previous = state.unchanged(_guess_cis_id(hardening_task, full_path), fp) if fp else None
+        if previous is not None:
+            print(f"[INFO] Unchanged, skipping: {full_path}")
+            return None, previous
 
-    validator = ConfigValidator(config)
-    if not validator.validate():
-        print("CRITICAL: Configuration contains errors. Execution stopped.")
-        sys.exit(1)
+    try:
+        print(f"[INFO] Running module: {full_path}")
+        if not audit:
+            hardening_task.apply()
+        elif not hardening_task.audit():
+            hardening_task.log_skip("Module does not support audit mode.")
+    except Exception as e:
+        print(f"[ERROR] Execution failed for {full_path}: {e}")
+        return str(e), None
+    return None, None
+
+
+def plan_check_phase(loaded: list, state: RunState | None = None) -> Plan:
+    """Conflict graph of the loaded controls, weighted by their durations in the last run."""
+    estimates = {}
+    if state is not None:
+        estimates = {cis_id: record.get("duration_ms") for cis_id, record in state.controls.items()}
+    return build_plan(loaded, _guess_cis_id, estimates)
 
-    # 3) JSON changelog settings
-    # Prefer env var so your Wazuh wrapper can control where it writes.
-    # Examples:
-    #  - Windows: C:\ProgramData\Wazuh\logs\hardening\Window-hardening-script.jsonl
-    #  - Linux:   /var/ossec/logs/hardening/Ubuntu-hardening-script.jsonl
+
+def run_check_phase(loaded: list, max_workers: int, state: RunState | None = None, audit: bool = False,
+                    plan: Plan | None = None) -> dict:
+    """
+    Run apply() for every loaded (task, path) pair on a bounded thread pool
+    (controls mostly wait on child processes and file I/O). Controls whose
+    declared resources conflict run one after the other, in plan order;
+    everything else runs concurrently (see core/scheduler.py).
+    With a RunState, controls whose fingerprint matches a compliant previous
+    run are not applied at all.
+    Returns {path: (error message or None, previous record or None)}.
+    """
+    plan = plan or plan_check_phase(loaded, state)
+    return execute(plan, max_workers, lambda task, path: _run_task(task, path, state, audit))
+
+
+def _overall_result(events: list, failure: str | None, dry_run: bool) -> str:
+    """Collapse a control's events into the result stored in the run state."""
+    results = {ev.get("result") for ev in events}
+    if failure is not None or "ERROR" in results:
+        return "ERROR"
+    if "CHANGED" in results:
+        # A real run leaves the control compliant; a dry run does not
+        return "CHANGED" if dry_run else "OK"
+    if "WARN" in results:
+        return "WARN"
+    return "OK"
+
+
+def _failed_controls(loaded: list, outcomes: dict) -> list:
+    """Ids of controls whose check raised or recorded an ERROR (before anything is committed)."""
+    failed = []
+    for hardening_task, full_path in loaded:
+        failure, previous = outcomes[full_path]
+        if previous is not None:
+            continue
+        events = hardening_task.get_events(clear=False) if hasattr(hardening_task, "get_events") else []
+        if failure is not None or any(ev.get("result") == "ERROR" for ev in events):
+            failed.append(_guess_cis_id(hardening_task, full_path))
+    return failed
+
+
+def jsonl_log_path() -> str:
+    r"""
+    Where the JSON changelog goes. Prefer env var so your Wazuh wrapper can
+    control where it writes. Examples:
+     - Windows: C:\ProgramData\Wazuh\logs\hardening\Window-hardening-script.jsonl
+     - Linux:   /var/ossec/logs/hardening/Ubuntu-hardening-script.jsonl
+    """
     if os.name == "nt":
         program_data = os.environ.get("ProgramData", r"C:\ProgramData")
         default_jsonl = Path(program_data) / "Wazuh" / "logs" / "hardening" / "Window-hardening-script.jsonl"
     else:
         default_jsonl = Path("/var/ossec/logs/hardening/Ubuntu-hardening-script.jsonl")
-        
-    jsonl_path = os.environ.get("HARDENING_JSONL_PATH") or str(default_jsonl)
 
-    repo_name = os.environ.get("HARDENING_REPO_NAME") or str(REPO_ROOT.name)
-    os_name = os.environ.get("HARDENING_OS") or ("windows" if os.name == "nt" else "linux")
-    dry_run = bool(config.get("general", {}).get("dry_run", False))
-    run_id = os.environ.get("HARDENING_RUN_ID") or f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    return os.environ.get("HARDENING_JSONL_PATH") or str(default_jsonl)
 
-    # 4) Discover module files recursively
+
+def _discover_modules() -> list[str]:
+    """Module files under MODULES_DIR, recursively, in a stable order."""
     module_paths: list[str] = []
     for root, dirs, files in os.walk(str(MODULES_DIR)):
         for file in files:
             if file.endswith(".py") and file != "__init__.py":
                 module_paths.append(os.path.join(root, file))
+    return sorted(module_paths)
+
+
+def _enabled_controls(settings, catalog: list, all_entries: list,
+                      selector: ControlSelector | None = None) -> tuple[list, list]:
+    """
+    (catalog specs, module manifest entries) of the enabled controls the
+    selector picks. `enabled` and the selector are checked before importing,
+    so other modules never load; files whose id cannot be read statically
+    are loaded if enabled (their file name stands in for the id when selecting).
+    """
+    entries = [entry for entry in all_entries if not entry.cis_id or settings.enabled(entry.cis_id)]
+    overridden = {entry.cis_id for entry in entries}
+    specs = [spec for spec in catalog if spec.id not in overridden and settings.enabled(spec.id)]
+    if selector:
+        specs, entries = selector.select(specs, entries)
+    return specs, entries
+
+
+def _run_base(config: dict, audit: bool) -> tuple[dict, bool, bool]:
+    """(event fields shared by one run, dry_run, audit) for a new run id."""
+    repo_name = os.environ.get("HARDENING_REPO_NAME") or str(REPO_ROOT.name)
+    os_name = os.environ.get("HARDENING_OS") or ("windows" if os.name == "nt" else "linux")
+    dry_run = bool(config.get("general", {}).get("dry_run", False))
+    audit = audit or config.get("general", {}).get("mode") == "audit"
+    run_id = os.environ.get("HARDENING_RUN_ID") or f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    base = {"repo": repo_name, "os": os_name, "run_id": run_id, "mode": "audit" if audit else "enforce"}
+    return base, dry_run, audit
+
+
+def _selector(select, exclude) -> ControlSelector:
+    try:
+        return ControlSelector(select or (), exclude or ())
+    except SelectorError as e:
+        print(f"CRITICAL: {e}")
+        sys.exit(1)
+
+
+def main(config_path: str | None = None, catalog_path: str | None = None, full: bool = False,
+         audit: bool = False, plan_only: bool = False, select=None, exclude=None):
+    """
+    Main entry point for the hardening framework.
+    Runs are incremental: controls that were compliant last time and whose
+    inputs are unchanged are skipped. The fingerprint includes the observed
+    host value, so the policy export and registry queries still run every
+    time; full=True evaluates everything.
+    audit=True (or general.mode: audit) only reports compliance and never
+    changes the system. plan_only=True prints the check and apply phase
+    plans and runs nothing.
+    select/exclude narrow the run to some controls (core/selection.py), e.g.
+    select=["2.2.*", "sector:1.1"], exclude=["tag:slow"].
+    """
+    print("--- Python Hardening Framework (CIS Style) ---")
+    selector = _selector(select, exclude)
+
+    # 1) Resolve config path
+    cfg_path = Path(config_path).resolve() if config_path else DEFAULT_CONFIG
+    print(f"[INFO] Using config file: {cfg_path}")
 
-    module_paths.sort()
+    catalog_file = Path(catalog_path or os.environ.get("HARDENING_CATALOG") or DEFAULT_CATALOG).resolve()
+
+    # 2) Discover module files recursively
+    module_paths = _discover_modules()
 
     print(f"[INFO] Modules directory: {MODULES_DIR}")
     print(f"[INFO] Found {len(module_paths)} modules.")
 
-    # 5) Run modules
-    for full_path in module_paths:
-        hardening_task = load_module_from_file(full_path, config)
+    # Module ids come from the cached manifest, without importing anything
+    manifest = ModuleManifest(CACHE_DIR / "module_manifest.json")
+    manifest.prune(module_paths)
+    all_entries = [manifest.entry_for(full_path) for full_path in module_paths]
+
+    # Table-driven controls come from the catalog; a Python module with the
+    # same id replaces the catalog entry.
+    # Cache writes wait until we know this is not a (read-only) audit run
+    cache_writes = []
+    try:
+        catalog = load_catalog(catalog_file, CACHE_DIR / "catalog.json", cache_writes)
+    except CatalogError as e:
+        print(f"CRITICAL: {e}")
+        sys.exit(1)
+    module_ids = {entry.cis_id for entry in all_entries if entry.cis_id}
+
+    # 3) Load, validate & compile config. Every error is reported here,
+    # before any control runs; an unchanged config loads from the snapshot.
+    try:
+        settings = load_settings(cfg_path, catalog, module_ids, CACHE_DIR / "config.snapshot.json", parse=load_config,
+                                 pending=cache_writes)
+    except ConfigError:
+        print("CRITICAL: Configuration contains errors. Execution stopped.")
+        sys.exit(1)
+    config = settings.raw
+
+    # 4) JSON changelog settings
+    jsonl_path = jsonl_log_path()
+
+    base, dry_run, audit = _run_base(config, audit)
+
+    # 5) Check `enabled` and the selection before importing, so other modules never load.
+    specs, entries = _enabled_controls(settings, catalog, all_entries, selector)
+    if not audit and not plan_only:
+        manifest.save()
+        for write in cache_writes:
+            write()
+
+    print(f"[INFO] Catalog: {catalog_file} ({len(catalog)} controls)")
+    if selector:
+        print(f"[INFO] {len(specs) + len(entries)} enabled controls selected ({selector}).")
+        if not specs and not entries:
+            print("[WARN] No enabled control matches the selection; nothing to do.")
+            return
+    else:
+        print(f"[INFO] {len(specs) + len(entries)} controls enabled.")
+    if audit:
+        print("[INFO] Audit mode: evaluating against one policy/registry snapshot, nothing is changed.")
+
+    # One handle for the whole run; buffered events are flushed on exit,
+    # including when a module or the commit raises.
+    state = RunState(CACHE_DIR / "run_state.json")
+    # The backend owns the command executor's loop thread, so it is closed
+    # with the sink.
+    sink = JsonlEventSink.from_config(jsonl_path, config)
+    backend = create_backend(config)
+    try:
+        if plan_only:
+            _show_plan(config, specs, entries, sink, base, dry_run, str(catalog_file), state, settings.controls,
+                       backend)
+            return
+        if audit:
+            _audit(config, specs, entries, sink, base, dry_run, str(catalog_file), settings.controls, backend)
+        else:
+            _run(config, specs, entries, sink, base, dry_run, str(catalog_file), state, backend, full,
+                 settings.controls)
+    finally:
+        backend.close()
+        sink.close()
+    if not audit:
+        state.save()
+
+
+def _load_controls(config: dict, specs: list, entries: list, sink: JsonlEventSink, base: dict, dry_run: bool,
+                   catalog_file: str, context: RunContext, controls: dict, warm: WarmState | None = None) -> list:
+    """
+    Build catalog controls and import module files; returns [(task, path)].
+    With the agent's WarmState, instances from the previous pass are reused
+    and a module file is only imported again when its content changed.
+    """
+    loaded = []
+
+    for spec in specs:
+        full_path = f"{catalog_file}#{spec.id}"
+        if warm is None:
+            hardening_task = build_control(spec, config, controls.get(spec.id))
+        else:
+            hardening_task = warm.control(full_path, None,
+                                          lambda spec=spec: build_control(spec, config, controls.get(spec.id)))
+        hardening_task.context = context
+        loaded.append((hardening_task, full_path))
+
+    for entry in entries:
+        full_path = entry.path
+        if warm is None:
+            hardening_task = load_module_from_file(full_path, config, entry.class_name)
+        else:
+            def build(entry=entry):
+                module_class = warm.module_class(entry.path, entry.sha256,
+                                                 lambda: load_module_class(entry.path, entry.class_name))
+                return module_class(config=config) if module_class is not None else None
+
+            hardening_task = warm.control(full_path, entry.sha256, build)
 
         if not hardening_task:
             # Optional: record load failure as JSON
-            if jsonl_path:
-                emit_json_event(jsonl_path, {
-                    "timestamp": _iso_utc_now(),
-                    "hardening": {
-                        "repo": repo_name,
-                        "os": os_name,
-                        "run_id": run_id,
-                        "module_path": full_path,
-                        "result": "ERROR",
-                        "message": "Failed to load module (no BaseModule subclass found or import failed).",
-                        "dry_run": dry_run,
-                    }
-                })
+            sink.emit(_build_event(
+                dict(base, module_path=full_path), "ERROR",
+                "Failed to load module (no BaseModule subclass found or import failed).", dry_run))
             continue
 
-        cis_id = _guess_cis_id(hardening_task, full_path)
-        title = _task_title(hardening_task)
+        hardening_task.context = context
+        loaded.append((hardening_task, full_path))
+
+    if warm is not None:
+        warm.prune(path for _, path in loaded)
+    return loaded
+
+
+def _emit_task_events(sink: JsonlEventSink, meta: dict, events: list, failure: str | None, dry_run: bool,
+                      metrics: dict | None = None) -> None:
+    # Export every CHANGED/OK/WARN/ERROR/SKIP/COMPLIANT line as a JSON event
+    for ev in events:
+        sink.emit(_build_event(meta, ev.get("result", "SUCCESS"), ev.get("message", ""), dry_run,
+                               _event_extra(ev, metrics)))
+
+    if failure is not None:
+        sink.emit(_build_event(meta, "ERROR", failure, dry_run, _event_extra({}, metrics)))
+    elif not events:
+        # No structured events emitted by the module → log generic success
+        sink.emit(_build_event(
+            meta, "SUCCESS", "Module executed without emitting events.", dry_run, _event_extra({}, metrics)))
+
+
+def _emit_session_events(sink: JsonlEventSink, context: RunContext, base: dict, dry_run: bool) -> None:
+    # Events recorded by the shared sessions themselves (export/configure results).
+    # Their metrics carry the shared reads and the commits, which no single
+    # control pays for.
+    for session in context.sessions():
+        meta = dict(base, cis_id=session.id, title=session.name)
+        metrics = _rounded_metrics(session)
+        for ev in session.get_events():
+            sink.emit(_build_event(meta, ev.get("result", "SUCCESS"), ev.get("message", ""), dry_run,
+                                   _event_extra(ev, metrics)))
+
+
+def _emit_summary(sink: JsonlEventSink, config: dict, base: dict, dry_run: bool, loaded: list,
+                  context: RunContext, started: float, plans: dict | None = None) -> None:
+    """One closing event with run totals and the slowest controls."""
+    slowest_n = int(config.get("general", {}).get("slowest_controls", DEFAULT_SLOWEST_CONTROLS))
+    modules = [task for task, _ in loaded] + context.sessions()
+    totals = {key: 0 for key in ("child_ms", "commands", "bytes_read", "bytes_written")}
+    for module in modules:
+        for key in totals:
+            totals[key] += module.metrics.get(key, 0)
+    totals = {k: round(v, 3) if isinstance(v, float) else v for k, v in totals.items()}
+    totals["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    totals["controls"] = len(loaded)
+    totals["command_cache"] = context.commands.stats()
+
+    ranked = sorted(loaded, key=lambda pair: pair[0].metrics.get("duration_ms", 0), reverse=True)[:slowest_n]
+    slowest = [{"cis_id": _guess_cis_id(task, path), "duration_ms": round(task.metrics.get("duration_ms", 0), 3)}
+               for task, path in ranked]
+
+    message = (f"{totals['controls']} controls in {totals['duration_ms']:.0f} ms, "
+               f"{totals['commands']} backend calls ({totals['child_ms']:.0f} ms)")
+    if slowest:
+        message += "; slowest: " + ", ".join(f"{s['cis_id']} ({s['duration_ms']:.0f} ms)" for s in slowest)
+    print(f"[INFO] {message}")
+    sink.emit(_build_event(dict(base, cis_id="run", title="Run summary"), "SUMMARY", message, dry_run,
+                           {"metrics": totals, "slowest": slowest,
+                            **({"plan": plans} if plans else {})}))
+
+
+def _task_meta(base: dict, hardening_task, full_path: str) -> dict:
+    return dict(base,
+                cis_id=_guess_cis_id(hardening_task, full_path),
+                title=_task_title(hardening_task),
+                module_path=full_path)
+
+
+def _show_plan(config: dict, specs: list, entries: list, sink: JsonlEventSink, base: dict, dry_run: bool,
+               catalog_file: str, state: RunState, controls: dict, backend: SystemBackend | None = None) -> None:
+    """
+    Print both phases' schedules (waves, conflicts, critical paths) without
+    running anything. The apply phase is previewed from the writes the
+    controls declare they stage.
+    """
+    context = RunContext(config, backend=backend)
+    loaded = _load_controls(config, specs, entries, sink, base, dry_run, catalog_file, context, controls)
+    check = plan_check_phase(loaded, state)
+    commit = preview_commit_plan(loaded, _guess_cis_id, state.commits)
+    print(check.describe())
+    print(commit.describe("apply phase"))
+    print(f"critical path of the run (~{check.critical_path()[1] + commit.critical_path()[1]:.1f} ms)")
+
+
+def _audit(config: dict, specs: list, entries: list, sink: JsonlEventSink, base: dict, dry_run: bool,
+           catalog_file: str, controls: dict, backend: SystemBackend | None = None,
+           warm: WarmState | None = None) -> None:
+    """
+    Read-only compliance scan. Every control is evaluated in memory against
+    the same policy export and registry reads; nothing is staged, committed,
+    backed up or recorded in the run state.
+    """
+    started = time.perf_counter()
+    context = RunContext(config, backend=backend)
+    loaded = _load_controls(config, specs, entries, sink, base, dry_run, catalog_file, context, controls or {}, warm)
+
+    max_workers = int(config.get("general", {}).get("max_workers", DEFAULT_MAX_WORKERS))
+    plan = plan_check_phase(loaded)
+    outcomes = run_check_phase(loaded, max_workers, audit=True, plan=plan)
+
+    totals = {}
+    for hardening_task, full_path in loaded:
+        events = hardening_task.get_events()
+        for ev in events:
+            totals[ev.get("result")] = totals.get(ev.get("result"), 0) + 1
+        _emit_task_events(sink, _task_meta(base, hardening_task, full_path), events, outcomes[full_path][0], dry_run,
+                          _rounded_metrics(hardening_task))
+    _emit_session_events(sink, context, base, dry_run)
+    _emit_summary(sink, config, base, dry_run, loaded, context, started, {"check": plan.to_dict()})
+
+    print(f"[INFO] Audit: {totals.get('COMPLIANT', 0)} compliant, {totals.get('NON_COMPLIANT', 0)} non-compliant, "
+          f"{totals.get('SKIP', 0)} skipped, {totals.get('ERROR', 0)} errors.")
+
+
+def _run(config: dict, specs: list, entries: list, sink: JsonlEventSink, base: dict, dry_run: bool,
+         catalog_file: str, state: RunState, backend: SystemBackend | None = None, full: bool = False,
+         controls: dict | None = None, warm: WarmState | None = None) -> None:
+    # 5) Load controls: catalog entries are built directly, module files imported
+    started = time.perf_counter()
+    transaction = None
+    tx_config = config.get("general", {}).get("transaction") or {}
+    if not dry_run and tx_config.get("enabled", True):
+        store = SnapshotStore(CACHE_DIR / "snapshots", tx_config.get("keep", DEFAULT_KEEP))
+        transaction = RunTransaction(config, base["run_id"], store)
+    context = RunContext(config, backend=backend, transaction=transaction)
+    loaded = _load_controls(config, specs, entries, sink, base, dry_run, catalog_file, context, controls or {}, warm)
+
+    # 6) Check phase: evaluate every control and stage its changes.
+    # Batched controls only read state here, so they run concurrently.
+    max_workers = int(config.get("general", {}).get("max_workers", DEFAULT_MAX_WORKERS))
+    plan = plan_check_phase(loaded, state)
+    outcomes = run_check_phase(loaded, max_workers, None if full else state, plan=plan)
+
+    # 7) Apply phase: write staged changes, one commit per backend resource;
+    # commits whose resources do not overlap run concurrently.
+    # In a transactional run the previous state of everything staged is
+    # snapshotted first; nothing is applied if a control failed, and the run
+    # rolls back if a commit fails or a change does not verify.
+    rolled_back = False
+    if transaction is not None:
+        transaction.capture()
+    failed = _failed_controls(loaded, outcomes) if transaction is not None else []
+    if failed:
+        transaction.abort(f"{len(failed)} control(s) failed: {', '.join(failed[:5])}")
+        rolled_back = True
+    else:
+        try:
+            problems = [] if context.commit(max_workers, state.commits) else ["a commit failed"]
+        except Exception as e:
+            print(f"[ERROR] Failed to apply staged changes: {e}")
+            for session in context.sessions():
+                session.log_error(f"Commit failed: {e}")
+            problems = [f"commit raised {e}"]
+        if transaction is not None and transaction.snapshot:
+            problems += transaction.verify()
+            if problems:
+                print(f"[ERROR] Apply phase failed verification, rolling back: {'; '.join(problems[:5])}")
+                transaction.rollback("; ".join(problems[:5]))
+                rolled_back = True
+
+    # 8) Export events (in module order, whatever order checks finished in)
+    for hardening_task, full_path in loaded:
+        failure, previous = outcomes[full_path]
+        meta = _task_meta(base, hardening_task, full_path)
+        cis_id = meta["cis_id"]
+
+        metrics = _rounded_metrics(hardening_task)
+        if previous is not None:
+            sink.emit(_build_event(
+                meta, "UNCHANGED",
+                f"Inputs unchanged since {previous.get('timestamp')}; last result {previous.get('result')}.",
+                dry_run, {"metrics": metrics}))
+            continue
 
+        events = []
+        if hasattr(hardening_task, "get_events"):
+            events = hardening_task.get_events()
+        _emit_task_events(sink, meta, events, failure, dry_run, metrics)
+
+        # Fingerprint the post-commit state, so the next run can skip this
+        # control if nothing it depends on has moved. After a rollback every
+        # control is evaluated again next time.
         try:
-            print(f"[INFO] Running module: {full_path}")
-            hardening_task.apply()
-            
-            events = []
-            if hasattr(hardening_task, "get_events"):
-                events = hardening_task.get_events()
-
-            if jsonl_path:
-                if not events:
-                    # No structured events emitted by the module → log generic success
-                    emit_json_event(jsonl_path, {
-                        "timestamp": _iso_utc_now(),
-                        "hardening": {
-                            "repo": repo_name,
-                            "os": os_name,
-                            "run_id": run_id,
-                            "cis_id": cis_id,
-                            "title": title,
-                            "module_path": full_path,
-                            "result": "SUCCESS",
-                            "message": "Module executed without emitting events.",
-                            "dry_run": dry_run,
-                        }
-                    })
-                else:
-                    # Export every CHANGED/OK/WARN/ERROR/SKIP line as a JSON event
-                    for ev in events:
-                        emit_json_event(jsonl_path, {
-                            "timestamp": _iso_utc_now(),
-                            "hardening": {
-                                "repo": repo_name,
-                                "os": os_name,
-                                "run_id": run_id,
-                                "cis_id": cis_id,
-                                "title": title,
-                                "module_path": full_path,
-                                "result": ev.get("result", "SUCCESS"),
-                                "message": ev.get("message", ""),
-                                "dry_run": dry_run,
-                            }
-                        })
+            fp = None if rolled_back else hardening_task.fingerprint()
+        except Exception:
+            fp = None
+        if fp is None:
+            state.forget(cis_id)
+        else:
+            state.record(cis_id, fp, _overall_result(events, failure, dry_run), _iso_utc_now(),
+                         hardening_task.metrics.get("duration_ms"))
+
+    state.record_commits(context.commit_ms)
+    plans = {"check": plan.to_dict()}
+    if context.commit_plan is not None:
+        plans["commit"] = context.commit_plan.to_dict()
+    _emit_session_events(sink, context, base, dry_run)
+    _emit_summary(sink, config, base, dry_run, loaded, context, started, plans)
+
+
+def agent(config_path: str | None = None, catalog_path: str | None = None, full: bool = False,
+          audit: bool = False, passes: int | None = None, select=None, exclude=None) -> int:
+    """
+    Resident mode: load the config and controls once, then run a pass every
+    general.agent.interval seconds (plus up to `jitter` more) into the same
+    JSONL sink. Config, catalog and module files are only reloaded when they
+    change on disk, so a pass costs little more than its state checks.
+    SIGHUP runs a pass now; SIGTERM/SIGINT stop after the current one.
+    A config that fails validation keeps the previous one in force.
+    select/exclude narrow every pass like they do for main().
+    """
+    print("--- Python Hardening Framework (CIS Style) --- agent mode")
+    selector = _selector(select, exclude)
+    cfg_path = Path(config_path).resolve() if config_path else DEFAULT_CONFIG
+    catalog_file = Path(catalog_path or os.environ.get("HARDENING_CATALOG") or DEFAULT_CATALOG).resolve()
+    print(f"[INFO] Using config file: {cfg_path}")
 
+    manifest = ModuleManifest(CACHE_DIR / "module_manifest.json")
+    state = RunState(CACHE_DIR / "run_state.json")
+    warm = WarmState()
+    schedule = AgentSchedule()
+    schedule.install_signal_handlers()
 
-        except Exception as e:
-            print(f"[ERROR] Execution failed for {full_path}: {e}")
-
-            if jsonl_path:
-                emit_json_event(jsonl_path, {
-                    "timestamp": _iso_utc_now(),
-                    "hardening": {
-                        "repo": repo_name,
-                        "os": os_name,
-                        "run_id": run_id,
-                        "cis_id": cis_id,
-                        "title": title,
-                        "module_path": full_path,
-                        "result": "ERROR",
-                        "message": str(e),
-                        "dry_run": dry_run,
-                    }
-                })
+    settings = catalog = sink = None
+    loaded_signature = None
+    cache_writes = []
+    completed = 0
+    try:
+        while not schedule.stopped:
+            module_paths = _discover_modules()
+            manifest.prune(module_paths)
+            all_entries = [manifest.entry_for(full_path) for full_path in module_paths]
+            module_ids = {entry.cis_id for entry in all_entries if entry.cis_id}
+
+            # Reload only what changed on disk (the manifest re-hashes module files by stat)
+            signature = (file_signature([cfg_path, catalog_file]), frozenset(module_ids))
+            if signature != loaded_signature:
+                loaded_signature = signature
+                try:
+                    pending = []
+                    new_catalog = load_catalog(catalog_file, CACHE_DIR / "catalog.json", pending)
+                    new_settings = load_settings(cfg_path, new_catalog, module_ids, CACHE_DIR / "config.snapshot.json",
+                                                 parse=load_config, pending=pending)
+                except (CatalogError, ConfigError) as e:
+                    if settings is None:
+                        print(f"CRITICAL: {e}" if isinstance(e, CatalogError) else
+                              "CRITICAL: Configuration contains errors. Execution stopped.")
+                        return 1
+                    print("[ERROR] Reloaded configuration is invalid; keeping the previous one.")
+                else:
+                    catalog, settings, cache_writes = new_catalog, new_settings, pending
+                    if sink is not None:
+                        sink.close()
+                    sink = JsonlEventSink.from_config(jsonl_log_path(), settings.raw)
+                    warm.begin(signature, lambda: create_backend(settings.raw))
+                    print(f"[INFO] Loaded {cfg_path} and {catalog_file} ({len(catalog)} controls, "
+                          f"{len(module_paths)} modules)")
+
+            config = settings.raw
+            base, dry_run, pass_audit = _run_base(config, audit)
+            specs, entries = _enabled_controls(settings, catalog, all_entries, selector)
+            started = time.perf_counter()
+            if pass_audit:
+                _audit(config, specs, entries, sink, base, dry_run, str(catalog_file), settings.controls,
+                       warm.backend, warm)
+            else:
+                manifest.save()
+                for write in cache_writes:
+                    write()
+                cache_writes = []
+                _run(config, specs, entries, sink, base, dry_run, str(catalog_file), state, warm.backend, full,
+                     settings.controls, warm)
+                state.save()
+            sink.checkpoint()
+            completed += 1
+
+            agent_config = config.get("general", {}).get("agent") or {}
+            delay = schedule.delay(agent_config.get("interval", DEFAULT_INTERVAL),
+                                   agent_config.get("jitter", DEFAULT_JITTER))
+            print(f"[INFO] Pass {completed} ({base['run_id']}) done in {(time.perf_counter() - started) * 1000:.0f} ms"
+                  + ("" if passes and completed >= passes else f"; next in {delay:.1f} s"))
+            if passes and completed >= passes:
+                break
+            schedule.wait(delay)
+    finally:
+        if sink is not None:
+            sink.close()
+        warm.close()
+    return 0
+
+
+def rollback(config_path: str | None = None, run_id: str | None = None) -> int:
+    """Restore the state saved before run_id (default: the newest snapshot)."""
+    cfg_path = Path(config_path).resolve() if config_path else DEFAULT_CONFIG
+    config = load_config(cfg_path) or {}
+    tx_config = config.get("general", {}).get("transaction") or {}
+    store = SnapshotStore(CACHE_DIR / "snapshots", tx_config.get("keep", DEFAULT_KEEP))
+    snapshot = store.load(run_id)
+    if snapshot is None:
+        print(f"CRITICAL: No snapshot {'for run ' + run_id if run_id else 'found'} in {store.directory}")
+        return 1
+
+    print(f"[INFO] Restoring the state from before run {snapshot.run_id} ({snapshot.timestamp}): "
+          f"{len(snapshot.policy)} policy setting(s), {len(snapshot.registry)} registry value(s), "
+          f"{len(snapshot.files)} file(s)")
+    base = {"repo": os.environ.get("HARDENING_REPO_NAME") or str(REPO_ROOT.name),
+            "os": os.environ.get("HARDENING_OS") or ("windows" if os.name == "nt" else "linux"),
+            "run_id": os.environ.get("HARDENING_RUN_ID") or f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}",
+            "mode": "rollback"}
+    backend = create_backend(config)
+    try:
+        transaction = RunTransaction(config, base["run_id"])
+        context = RunContext(config, backend=backend, transaction=transaction)
+        ok = transaction.restore(snapshot)
+        if ok:
+            transaction.log_change(f"Restored the state from before run {snapshot.run_id}")
+        else:
+            transaction.log_error(f"Restore of the state from before run {snapshot.run_id} incomplete")
+    finally:
+        backend.close()
+
+    # The host changed behind the incremental state's back
+    RunState(CACHE_DIR / "run_state.json").clear()
+    with JsonlEventSink.from_config(jsonl_log_path(), config) as sink:
+        _emit_session_events(sink, context, base, False)
+    return 0 if ok else 1
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "fleet":
+        # Orchestrates other hosts; the engine itself runs (as admin) on each target
+        from core.fleet import cli as fleet_cli
+        sys.exit(fleet_cli(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "report":
+        # Only reads the event log
+        from core.report import cli as report_cli
+        sys.exit(report_cli(sys.argv[2:], default_log=jsonl_log_path()))
+    if len(sys.argv) > 1 and sys.argv[1] == "matrix":
+        # Fleet analytics over the event log (needs NumPy)
+        from core.matrix import cli as matrix_cli
+        sys.exit(matrix_cli(sys.argv[2:], default_log=jsonl_log_path()))
+
     import ctypes
 
     try:
@@ -261,5 +788,33 @@ if __name__ == "__main__":
         print("CRITICAL: Script must be run as Administrator/Root")
         sys.exit(1)
 
-    config_arg = sys.argv[1] if len(sys.argv) > 1 else None
-    main(config_arg)
+    parser = argparse.ArgumentParser(description="Python Hardening Framework (CIS Style)")
+    parser.add_argument("config", nargs="?", help="path to config.yaml (default: next to main.py)")
+    parser.add_argument("--full", action="store_true",
+                        help="evaluate every enabled control, ignoring the incremental run state "
+                             "(host state is read on every run either way; skipping only saves "
+                             "evaluating and re-checking unchanged controls)")
+    parser.add_argument("--audit", action="store_true",
+                        help="read-only compliance scan; report COMPLIANT / NON_COMPLIANT and change nothing")
+    parser.add_argument("--rollback", nargs="?", const="", metavar="RUN_ID",
+                        help="restore the state saved before RUN_ID (default: the newest snapshot) and exit")
+    parser.add_argument("--plan", action="store_true",
+                        help="print the resource-aware schedule of the enabled controls (check phase and "
+                             "commits) and exit")
+    parser.add_argument("--select", action="append", metavar="TERMS",
+                        help="only run matching controls: id globs (2.2.*), sector:<X.Y>, tag:<name>; "
+                             "repeatable or comma-separated")
+    parser.add_argument("--exclude", action="append", metavar="TERMS",
+                        help="skip matching controls (same terms as --select)")
+    parser.add_argument("--agent", action="store_true",
+                        help="stay resident and re-check every general.agent.interval seconds")
+    parser.add_argument("--passes", type=int, metavar="N",
+                        help="with --agent: stop after N passes (default: run until stopped)")
+    args = parser.parse_args()
+    if args.rollback is not None:
+        sys.exit(rollback(args.config, args.rollback or None))
+    if args.agent:
+        sys.exit(agent(args.config, full=args.full, audit=args.audit, passes=args.passes,
+                       select=args.select, exclude=args.exclude))
+    main(args.config, full=args.full, audit=args.audit, plan_only=args.plan,
+         select=args.select, exclude=args.exclude)
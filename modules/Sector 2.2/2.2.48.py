@@ -1,14 +0,0 @@
-from core.user_rights import UserRightsModule
-
-class CIS_2_2_48(UserRightsModule):
-    def __init__(self, config):
-        super().__init__(name="CIS 2.2.48 (Sync Directory Data)", config=config)
-        self.id = "2.2.48"
-
-    def apply(self):
-        if not self.config.get(self.id, {}).get('enabled', False): return
-        
-        # Privilege: SeSyncAgentPrivilege
-        # Recommendation: No One
-        users = self.config.get(self.id, {}).get('users', [])
-        self.apply_user_right("SeSyncAgentPrivilege", users)
\ No newline at end of file
@@ -0,0 +1,68 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+# The engine is run from a checkout (python main.py), not installed
+sys.path.insert(0, str(ROOT))
+CATALOG = ROOT / "catalog.yaml"
+
+from core.catalog import load_catalog  # noqa: E402
+from core.run_context import RunContext  # noqa: E402
+from core.simulated_backend import SimulatedBackend  # noqa: E402
+
+
+@pytest.fixture
+def backend(tmp_path):
+    """A freshly seeded simulated host."""
+    return SimulatedBackend(tmp_path / "host")
+
+
+@pytest.fixture(scope="session")
+def specs():
+    return load_catalog(CATALOG)
+
+
+@pytest.fixture
+def context(backend):
+    return RunContext({"general": {}}, backend=backend)
+
+
+def failing(backend, operation, stderr="simulated failure"):
+    """Make one backend operation fail (without touching the host) for the rest of the test."""
+    def fail(*args, **kwargs):
+        backend.calls[operation] += 1
+        return backend._result([operation, *map(str, args)], 1, stderr=stderr)
+    setattr(backend, operation, fail)
+
+
+@pytest.fixture
+def host(tmp_path, monkeypatch):
+    """A simulated host plus writable cache/log locations for main()."""
+    import main
+    monkeypatch.setattr(main, "CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setenv("HARDENING_BACKEND", "simulated")
+    monkeypatch.setenv("HARDENING_SIM_ROOT", str(tmp_path / "host"))
+    monkeypatch.setenv("HARDENING_JSONL_PATH", str(tmp_path / "events.jsonl"))
+    return SimulatedBackend(tmp_path / "host")
+
+
+def write_config(tmp_path, controls, **general):
+    """config.yaml enforcing `controls` (catalog ids), with extra `general` keys."""
+    import yaml
+    path = tmp_path / "config.yaml"
+    config = {"general": {"dry_run": False, **general}, **{cis_id: {"enabled": True} for cis_id in controls}}
+    path.write_text(yaml.safe_dump(config), encoding="utf-8")
+    return str(path)
+
+
+def read_events(tmp_path):
+    path = tmp_path / "events.jsonl"
+    return [json.loads(line)["hardening"] for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def results_by_id(events):
+    """{cis id: result} of the catalog controls' events."""
+    return {ev["cis_id"]: ev["result"] for ev in events if ev.get("cis_id", "").count(".") == 2}
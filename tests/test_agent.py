@@ -0,0 +1,108 @@
+import threading
+
+import pytest
+
+import main
+from conftest import read_events, results_by_id, write_config
+from core.agent import AgentSchedule, WarmState, file_signature
+from core.base_module import BaseModule
+
+pytest.importorskip("yaml")
+
+
+class Closing:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_delay_adds_bounded_jitter():
+    schedule = AgentSchedule(seed=1)
+    delays = [schedule.delay(10, 5) for _ in range(50)]
+    assert all(10 <= d <= 15 for d in delays) and len(set(delays)) > 1
+    assert schedule.delay(10, 0) == 10.0
+    assert schedule.delay(-1) == 0.0
+
+
+def test_wake_ends_the_wait_and_stop_ends_the_agent():
+    schedule = AgentSchedule()
+    threading.Timer(0.05, schedule.wake).start()
+    assert schedule.wait(5) is True
+    threading.Timer(0.05, schedule.stop).start()
+    assert schedule.wait(5) is False
+    assert schedule.stopped
+
+
+def test_file_signature_tracks_changes(tmp_path):
+    path = tmp_path / "config.yaml"
+    assert file_signature([path]) == ((str(path), None, None),)
+    path.write_text("a", encoding="utf-8")
+    before = file_signature([path])
+    path.write_text("ab", encoding="utf-8")
+    assert file_signature([path]) != before
+
+
+def test_warm_state_keeps_backend_and_controls_per_generation():
+    warm = WarmState()
+    first = Closing()
+    assert warm.begin("g1", lambda: first)
+    assert not warm.begin("g1", lambda: pytest.fail("backend rebuilt"))
+
+    task = warm.control("a#1", None, lambda: BaseModule("a", {"general": {}}))
+    task.log_ok("seen")
+    task.count(commands=2)
+    assert warm.control("a#1", None, lambda: pytest.fail("rebuilt")) is task
+    assert task.get_events() == [] and task.metrics["commands"] == 0
+
+    assert warm.begin("g2", Closing)
+    assert first.closed
+    assert warm.control("a#1", None, lambda: BaseModule("a", {"general": {}})) is not task
+    backend = warm.backend
+    warm.close()
+    assert backend.closed and warm.backend is None
+
+
+def test_warm_state_reimports_only_changed_modules():
+    warm = WarmState()
+    imports = []
+    load = lambda: imports.append(1) or BaseModule
+    assert warm.module_class("m.py", "h1", load) is BaseModule
+    warm.module_class("m.py", "h1", load)
+    warm.module_class("m.py", "h2", load)
+    assert len(imports) == 2
+
+    warm.control("m.py", "h2", lambda: BaseModule("m", {"general": {}}))
+    warm.prune([])
+    warm.module_class("m.py", "h2", load)
+    assert len(imports) == 3
+
+
+@pytest.fixture
+def agent_host(host, monkeypatch):
+    # The test process keeps its own signal handlers
+    monkeypatch.setattr(AgentSchedule, "install_signal_handlers", lambda self: None)
+    return host
+
+
+def test_agent_runs_incremental_passes_into_one_sink(tmp_path, agent_host):
+    config = write_config(tmp_path, ["1.1.1"], agent={"interval": 0.01})
+    assert main.agent(config, passes=2) == 0
+
+    events = read_events(tmp_path)
+    runs = list(dict.fromkeys(ev["run_id"] for ev in events))
+    assert len(runs) == 2
+    by_run = [results_by_id([ev for ev in events if ev["run_id"] == run]) for run in runs]
+    assert by_run == [{"1.1.1": "CHANGED"}, {"1.1.1": "UNCHANGED"}]
+    assert (tmp_path / "cache" / "config.snapshot.json").exists()
+
+
+def test_agent_audit_writes_no_caches(tmp_path, agent_host):
+    assert main.agent(write_config(tmp_path, ["1.1.1"], agent={"interval": 0.01}), audit=True, passes=2) == 0
+    assert not (tmp_path / "cache").exists()
+    assert {ev["mode"] for ev in read_events(tmp_path)} == {"audit"}
+
+
+def test_agent_stops_on_an_invalid_first_config(tmp_path, agent_host):
+    assert main.agent(write_config(tmp_path, ["1.1.1"], agent={"interval": 0}), passes=1) == 1
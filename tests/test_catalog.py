@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+from conftest import CATALOG
+from core.catalog import CatalogError, ControlSpec, build_control, load_catalog
+from core.run_context import RunContext
+
+yaml = pytest.importorskip("yaml")
+
+
+def test_catalog_keeps_file_order_and_string_ids(specs):
+    with open(CATALOG, encoding="utf-8") as f:
+        raw = yaml.safe_load(f)["controls"]
+    assert [spec.id for spec in specs] == [str(entry["id"]) for entry in raw]
+    assert all(isinstance(spec.id, str) for spec in specs)
+
+
+def test_json_cache_is_written_and_reused(tmp_path, specs):
+    cache = tmp_path / "catalog.json"
+    assert [s.id for s in load_catalog(CATALOG, cache)] == [s.id for s in specs]
+    stored = json.loads(cache.read_text(encoding="utf-8"))
+
+    # A hit never parses YAML: a doctored cache with the same stamp is what comes back
+    stored["controls"] = stored["controls"][:1]
+    cache.write_text(json.dumps(stored), encoding="utf-8")
+    assert [s.id for s in load_catalog(CATALOG, cache)] == [specs[0].id]
+
+
+def test_pending_defers_the_cache_write(tmp_path, specs):
+    cache = tmp_path / "catalog.json"
+    pending = []
+    load_catalog(CATALOG, cache, pending)
+    assert not cache.exists() and len(pending) == 1
+    pending[0]()
+    assert cache.exists()
+
+
+def test_stale_or_corrupt_cache_is_a_miss(tmp_path, specs):
+    cache = tmp_path / "catalog.json"
+    cache.write_text("{not json", encoding="utf-8")
+    assert len(load_catalog(CATALOG, cache)) == len(specs)
+    cache.write_text(json.dumps({"stamp": ["elsewhere", 0, 0], "controls": []}), encoding="utf-8")
+    assert len(load_catalog(CATALOG, cache)) == len(specs)
+
+
+def test_missing_catalog_is_a_catalog_error(tmp_path):
+    with pytest.raises(CatalogError, match="not found"):
+        load_catalog(tmp_path / "nope.yaml")
+
+
+@pytest.mark.parametrize("entry, message", [
+    ({"id": "9.9", "title": "x", "backend": "secedit"}, "missing: key"),
+    ({"id": "9.9", "title": "x", "backend": "nope", "key": "K"}, "unknown backend"),
+    ({"id": "9.9", "title": "x", "backend": "registry", "key": "HKLM\\X"}, "need a 'value' name"),
+    ({"id": "9.9", "title": "x", "backend": "secedit", "key": "K", "colour": 1}, "unknown fields: colour"),
+    (["not", "a", "mapping"], "must be a mapping"),
+])
+def test_invalid_entries_are_rejected(entry, message):
+    with pytest.raises(CatalogError, match=message):
+        ControlSpec.from_dict(entry, 1)
+
+
+def test_duplicate_ids_are_rejected(tmp_path):
+    path = tmp_path / "catalog.yaml"
+    entry = {"id": "1.1", "title": "x", "backend": "secedit", "key": "K"}
+    path.write_text(yaml.safe_dump({"controls": [entry, entry]}), encoding="utf-8")
+    with pytest.raises(CatalogError, match="Duplicate control id"):
+        load_catalog(path)
+
+
+def test_every_spec_builds_a_control(specs):
+    for spec in specs:
+        control = build_control(spec, {"general": {}})
+        assert control.id == spec.id and control.spec is spec
+        assert control.name == f"CIS {spec.id} ({spec.title})"
+
+
+def test_settings_override_catalog_defaults(specs):
+    spec = next(s for s in specs if s.setting)
+    control = build_control(spec, {spec.id: {"enabled": True, spec.setting: "override"}})
+    assert control.setting_value() == "override"
+    assert build_control(spec, {}).setting_value() == spec.default
+
+
+def test_disabled_controls_do_nothing(specs, context, backend):
+    for spec in specs:
+        control = build_control(spec, {"general": {}})
+        control.context = context
+        control.apply()
+        assert control.get_events() == []
+    assert sum(backend.calls.values()) == 0
+
+
+def test_whole_catalog_is_one_export_one_configure_one_import(specs, backend):
+    config = {"general": {}, **{spec.id: {"enabled": True} for spec in specs}}
+    context = RunContext(config, backend=backend)
+    controls = [build_control(spec, config) for spec in specs]
+    for control in controls:
+        control.context = context
+        control.apply()
+    context.commit()
+
+    assert backend.calls["export_policy"] == 1
+    assert backend.calls["configure_policy"] == 1
+    assert backend.calls["import_registry"] <= 1
+    for control in controls:
+        events = control.get_events()
+        assert len(events) == 1 and events[0]["result"] in ("OK", "CHANGED"), control.name
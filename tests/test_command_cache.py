@@ -0,0 +1,136 @@
+import threading
+
+import pytest
+
+from core.command_cache import ALL, CommandMemo, affects, classify
+from core.executor import CommandResult
+from core.run_context import RunContext
+
+LSA = r"HKLM\SYSTEM\CurrentControlSet\Control\Lsa"
+
+
+@pytest.mark.parametrize("written, resource, expected", [
+    ("registry:hklm\\a", "registry:hklm\\a", True),
+    ("registry:hklm\\a", "registry:hklm\\a\\b", True),      # child key
+    ("registry:hklm\\a\\b", "registry:hklm\\a", True),      # parent key (reg query /s)
+    ("registry:hklm\\a", "registry:hklm\\ab", False),       # sibling with a common prefix
+    ("registry:" + ALL, "registry:hklm\\a", True),
+    ("registry:" + ALL, "policy", False),
+    ("policy", "accounts", False),
+    (ALL, "accounts", True),
+])
+def test_affects(written, resource, expected):
+    assert affects(written, resource) is expected
+
+
+def test_raw_commands_are_classified():
+    assert classify("run", [f'reg query "{LSA}" /v NoLmHash'])[0] == "read"
+    assert classify("run", [f'reg add "{LSA}" /v NoLmHash /d 1 /f'])[0] == "write"
+    assert classify("run", ["auditpol /get /category:*"]) == ("read", "auditpol")
+    assert classify("run", ["net accounts /maxpwage:60"]) == ("write", "accounts")
+    assert classify("run", ["some-tool --frob"]) == ("write", ALL)
+
+
+class Counter:
+    def __init__(self, result=None):
+        self.calls = 0
+        self.result = result
+
+    def __call__(self):
+        self.calls += 1
+        return self.result or CommandResult("cmd", 0, f"answer {self.calls}", "")
+
+
+def test_reads_are_memoized_across_spellings():
+    memo, run = CommandMemo(), Counter()
+    first = memo.call("run", [f'reg query "{LSA}" /v NoLmHash'], run)
+    again = memo.call("run", [f"REG QUERY HKEY_LOCAL_MACHINE\\SYSTEM\\CurrentControlSet\\Control\\Lsa /v nolmhash"],
+                      run)
+    assert run.calls == 1 and first is again
+
+    whole = memo.call("run", [f'reg query "{LSA}"'], run)
+    typed = memo.call("query_registry", [LSA], run)
+    assert run.calls == 2 and whole is typed
+    assert memo.stats()["hits"] == 2
+
+
+@pytest.mark.parametrize("write, invalidated", [
+    (("run", [f'reg add "{LSA}" /v NoLmHash /d 0 /f']), True),
+    (("run", [f'reg add "{LSA}\\MSV1_0" /v X /d 0 /f']), True),
+    (("run", [r'reg add "HKLM\SOFTWARE\Other" /v X /d 0 /f']), False),
+    (("import_registry", ["changes.reg"]), True),
+    (("configure_policy", ["delta.inf"]), False),
+    (("run", ["some-tool --frob"]), True),
+])
+def test_writes_drop_the_reads_they_affect(write, invalidated):
+    memo, run = CommandMemo(), Counter()
+    memo.call("query_registry", [LSA, "NoLmHash"], run)
+    memo.call(*write, Counter())
+    memo.call("query_registry", [LSA, "NoLmHash"], run)
+    assert run.calls == (2 if invalidated else 1)
+
+
+def test_explicit_resources_override_classification():
+    memo, run = CommandMemo(), Counter()
+    memo.call("run", ["Get-Thing"], run, reads="thing")
+    memo.call("run", ["Get-Thing"], run, reads="thing")
+    assert run.calls == 1
+    memo.call("run", ["Set-Other"], Counter(), writes="other")
+    memo.call("run", ["Get-Thing"], run, reads="thing")
+    assert run.calls == 1
+    memo.call("run", ["Set-Thing"], Counter(), writes="thing")
+    memo.call("run", ["Get-Thing"], run, reads="thing")
+    assert run.calls == 2
+
+
+@pytest.mark.parametrize("result", [
+    CommandResult("cmd", 1, "", "Command timed out after 5s and was killed", interrupted=True),
+    CommandResult("cmd", -9, "", ""),
+])
+def test_interrupted_results_are_not_cached(result):
+    memo, run = CommandMemo(), Counter(result)
+    memo.call("query_registry", [LSA, "NoLmHash"], run)
+    memo.call("query_registry", [LSA, "NoLmHash"], run)
+    assert run.calls == 2
+
+
+def test_failed_reads_are_cached():
+    # "value not found" is an answer about the resource, like any other
+    memo, run = CommandMemo(), Counter(CommandResult("cmd", 1, "", "ERROR: not found"))
+    memo.call("query_registry", [LSA, "Missing"], run)
+    memo.call("query_registry", [LSA, "Missing"], run)
+    assert run.calls == 1
+
+
+def test_a_write_during_a_read_keeps_its_result_out_of_the_memo():
+    memo = CommandMemo()
+    reading, written = threading.Event(), threading.Event()
+
+    def slow_read():
+        reading.set()
+        written.wait(5)
+        return CommandResult("cmd", 0, "stale", "")
+
+    reader = threading.Thread(target=memo.call, args=("query_registry", [LSA, "NoLmHash"], slow_read))
+    reader.start()
+    reading.wait(5)
+    memo.call("import_registry", ["changes.reg"], Counter())
+    written.set()
+    reader.join(5)
+
+    run = Counter()
+    assert memo.call("query_registry", [LSA, "NoLmHash"], run).stdout == "answer 1"
+
+
+def test_committed_registry_writes_are_read_back_fresh(backend):
+    context = RunContext({"general": {}}, backend=backend)
+    context.registry.get(LSA, "NoLmHash")
+    queries = backend.calls["query_registry"]
+    context.registry.get(LSA, "NoLmHash")
+    assert backend.calls["query_registry"] == queries
+
+    context.registry_writes.stage(context.registry, LSA, "NoLmHash", "REG_DWORD", 0)
+    assert context.registry_writes.commit()
+    assert context.registry.get(LSA, "NoLmHash").data == 0
+    assert backend.calls["query_registry"] > queries
+    assert context.commands.stats()["invalidations"] >= 1
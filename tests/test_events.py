@@ -0,0 +1,91 @@
+import json
+import time
+
+import pytest
+
+from core.events import JsonlEventSink
+
+
+def lines(path):
+    return [json.loads(l) for l in path.read_text(encoding="utf-8").splitlines()] if path.exists() else []
+
+
+def test_events_are_buffered_until_the_batch_is_full(tmp_path):
+    path = tmp_path / "events.jsonl"
+    sink = JsonlEventSink(path, buffer_events=3, flush_interval=60)
+    sink.emit({"n": 1})
+    sink.emit({"n": 2})
+    assert lines(path) == []
+    sink.emit({"n": 3})
+    assert [e["n"] for e in lines(path)] == [1, 2, 3]
+    sink.close()
+
+
+def test_timer_flushes_a_quiet_buffer(tmp_path):
+    path = tmp_path / "events.jsonl"
+    sink = JsonlEventSink(path, buffer_events=100, flush_interval=0.05)
+    sink.emit({"n": 1})
+    deadline = time.monotonic() + 5
+    while not lines(path) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert lines(path) == [{"n": 1}]
+    sink.close()
+
+
+def test_close_writes_the_rest_and_ignores_later_events(tmp_path):
+    path = tmp_path / "events.jsonl"
+    with JsonlEventSink(path, buffer_events=100, flush_interval=60, durability="run") as sink:
+        sink.emit({"n": 1})
+        sink.emit({"bad": object()})        # not serializable: skipped
+    sink.emit({"n": 2})
+    sink.close()
+    assert lines(path) == [{"n": 1}]
+    assert sink.events_written == 1
+
+
+def test_rotation_renames_old_files(tmp_path):
+    path = tmp_path / "events.jsonl"
+    sink = JsonlEventSink(path, buffer_events=1, max_bytes=40, backups=2)
+    for n in range(6):
+        sink.emit({"n": n, "pad": "x" * 10})
+    sink.close()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["events.jsonl", "events.jsonl.1", "events.jsonl.2"]
+    assert lines(path) == [{"n": 5, "pad": "x" * 10}]
+    assert lines(tmp_path / "events.jsonl.1") == [{"n": 4, "pad": "x" * 10}]
+
+
+def test_failed_rotation_keeps_appending_to_the_current_file(tmp_path, monkeypatch, capsys):
+    path = tmp_path / "events.jsonl"
+    sink = JsonlEventSink(path, buffer_events=1, max_bytes=10)
+    sink.emit({"n": 0})
+
+    def locked(src, dst):
+        raise PermissionError("file is in use")
+    monkeypatch.setattr("core.events.os.replace", locked)
+    sink.emit({"n": 1})
+    sink.close()
+    assert [e["n"] for e in lines(path)] == [0, 1]
+    assert sink.events_written == 2 and sink.events_dropped == 0
+    assert "Could not rotate" in capsys.readouterr().out
+
+
+def test_write_failures_are_counted_not_raised(tmp_path, capsys):
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("")
+    sink = JsonlEventSink(blocker / "events.jsonl", buffer_events=1)
+    sink.emit({"n": 1})
+    sink.close()
+    assert sink.events_dropped == 1
+    assert "Could not write 1 events" in capsys.readouterr().out
+
+
+def test_unknown_durability_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        JsonlEventSink(tmp_path / "e.jsonl", durability="always")
+
+
+def test_from_config_reads_general_events(tmp_path):
+    sink = JsonlEventSink.from_config(tmp_path / "e.jsonl", {"general": {"events": {
+        "buffer_events": 7, "durability": "none", "unknown": 1}}})
+    assert sink.buffer_events == 7 and sink.durability == "none"
+    sink.close()
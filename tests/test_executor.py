@@ -0,0 +1,107 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+from core.backend import LocalBackend
+from core.base_module import BaseModule
+from core.executor import CommandExecutor, CommandResult
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="uses POSIX shell commands")
+
+PY = f'"{sys.executable}"'
+
+
+@pytest.fixture
+def executor():
+    executor = CommandExecutor(max_concurrency=4, timeout=10)
+    yield executor
+    executor.close()
+
+
+def test_run_returns_decoded_output(executor):
+    result = executor.run("printf 'a\\r\\nb'; echo err >&2; exit 3")
+    assert isinstance(result, CommandResult)
+    assert (result.returncode, result.stdout, result.stderr) == (3, "a\nb", "err\n")
+    assert not result.interrupted
+    assert executor.stats()["calls"] == 1
+
+
+def test_timeout_kills_the_command_and_its_children(executor):
+    start = time.perf_counter()
+    # The shell's own child would keep the pipes open if only the shell were killed
+    result = executor.run(f"{PY} -c 'import time; time.sleep(30)'; echo done", timeout=0.3)
+    assert time.perf_counter() - start < 5
+    assert result.interrupted and result.returncode != 0
+    assert "timed out after 0.3s" in result.stderr
+    assert executor.timeouts == 1
+
+
+def test_negative_return_code_counts_as_interrupted():
+    assert CommandResult("x", -9).interrupted
+    assert not CommandResult("x", 1).interrupted
+
+
+def test_concurrency_is_capped():
+    executor = CommandExecutor(max_concurrency=1)
+    try:
+        start = time.perf_counter()
+        executor.call(executor.gather(["sleep 0.2", "sleep 0.2"]))
+        assert time.perf_counter() - start >= 0.4
+    finally:
+        executor.close()
+
+
+def test_gather_overlaps_commands_and_keeps_order(executor):
+    start = time.perf_counter()
+    results = executor.call(executor.gather([f"sleep 0.3; echo {i}" for i in range(4)]))
+    assert time.perf_counter() - start < 1.0
+    assert [r.stdout for r in results] == ["0\n", "1\n", "2\n", "3\n"]
+
+
+def test_blocking_call_from_the_loop_is_refused(executor):
+    async def nested():
+        executor.run("true")
+    with pytest.raises(RuntimeError, match="Blocking call"):
+        executor.call(nested())
+
+
+def test_close_stops_the_loop_thread(executor):
+    executor.run("true")
+    thread = executor._thread
+    executor.close()
+    assert not thread.is_alive()
+    # A closed executor starts a new loop on demand
+    assert executor.run("echo again").stdout == "again\n"
+
+
+def test_backend_close_stops_its_executor():
+    backend = LocalBackend(executor=CommandExecutor())
+    backend.run("true")
+    thread = backend.executor._thread
+    backend.close()
+    assert not thread.is_alive()
+
+
+def test_modules_run_commands_concurrently(executor):
+    module = BaseModule("m", {})
+    module.context = type("Context", (), {"backend": LocalBackend(executor=executor), "commands": None})()
+    assert module.run_commands(["echo a", "echo b"]) == ["a", "b"]     # command_output strips
+    assert module.metrics["commands"] == 2
+
+
+def test_apply_async_is_driven_by_apply(executor):
+    class AsyncControl(BaseModule):
+        async def apply_async(self):
+            outputs = await asyncio.gather(self.run_command_async("echo x"), self.run_command_async("exit 1"))
+            self.outputs = outputs
+
+    control = AsyncControl("async", {})
+    control.context = type("Context", (), {"backend": LocalBackend(executor=executor), "commands": None})()
+    control.apply()
+    assert control.outputs == ["x", None]
+    assert [e["result"] for e in control.get_events()] == ["ERROR"]
+    with pytest.raises(NotImplementedError):
+        BaseModule("plain", {}).apply()
@@ -0,0 +1,87 @@
+import re
+
+import pytest
+
+from core.base_module import BaseModule
+from core.file_editor import TextFile, apply_edits, is_set
+from core.run_context import RunContext
+
+
+def sequential(content, edits):
+    """What one update_file_content write per edit produced before edits were batched."""
+    for pattern, replacement in edits:
+        content, count = re.subn(pattern, replacement, content, flags=re.MULTILINE)
+        if count == 0:
+            content += f"\n{replacement}"
+    return content
+
+
+CASES = [
+    ("A=0\nB=0", [(r"^A=.*$", "B=1"), (r"^B=.*$", "B=2")]),
+    ("A=0\nB=0", [(r"^B=.*$", "B=2"), (r"^A=.*$", "B=1")]),
+    ("Size = 24\nSize = 240\n", [(r"^Size = .*$", "Size = 14")]),
+    ("x=1\n", [(r"^y=.*$", "y=2"), (r"^y=.*$", "y=3")]),
+    ("k=1\nk=2\nk=3", [(r"^k=.*$", "k=0"), (r"^k=0$", "k=9")]),
+    ("", [(r"^a$", "a")]),
+]
+
+
+@pytest.mark.parametrize("content, edits", CASES)
+def test_apply_edits_matches_sequential_application(content, edits):
+    assert apply_edits(content, edits)[0] == sequential(content, edits)
+
+
+def test_later_edits_see_earlier_results():
+    assert apply_edits("A=0\nB=0", [(r"^A=.*$", "B=1"), (r"^B=.*$", "B=2")]) == ("B=2\nB=2", [1, 2])
+
+
+def test_unmatched_edits_are_appended_and_counted():
+    assert apply_edits("x=1", [(r"^y=.*$", "y=2")]) == ("x=1\ny=2", [0])
+
+
+def test_is_set_needs_every_match_to_equal_the_replacement():
+    assert is_set("Size = 14\n", r"^Size = .*$", "Size = 14")
+    assert not is_set("Size = 14\nSize = 140\n", r"^Size = .*$", "Size = 14")
+    assert not is_set("", r"^Size = .*$", "Size = 14")
+
+
+class Editor(BaseModule):
+    def __init__(self, config, path, edits):
+        super().__init__(name="Editor", config=config)
+        self.path, self.edits = path, edits
+
+    def apply(self):
+        for pattern, replacement in self.edits:
+            self.update_file_content(self.path, pattern, replacement)
+
+
+def test_batched_run_writes_what_sequential_edits_would(tmp_path, backend):
+    path = tmp_path / "settings.ini"
+    original = "A=0\nB=0\nC=0"
+    path.write_bytes(TextFile(path, b"\xff\xfe").encode(original))   # UTF-16 with BOM
+    before = path.read_bytes()
+
+    config = {"general": {}}
+    context = RunContext(config, backend=backend)
+    first = Editor(config, str(path), [(r"^A=.*$", "B=1")])
+    second = Editor(config, str(path), [(r"^B=.*$", "B=2"), (r"^D=.*$", "D=4")])
+    for module in (first, second):
+        module.context = context
+        module.apply()
+    assert path.read_bytes() == before      # nothing is written before the commit
+
+    assert context.commit()
+    written = TextFile.load(path)
+    assert written.bom == b"\xff\xfe"
+    assert written.content == sequential(original, [(r"^A=.*$", "B=1"), (r"^B=.*$", "B=2"), (r"^D=.*$", "D=4")])
+    assert context.file_edits.metrics["bytes_written"] == len(written.raw)
+
+
+def test_standalone_edit_writes_at_once_with_a_backup(tmp_path):
+    path = tmp_path / "sshd_config"
+    path.write_text("PermitRootLogin yes\n", encoding="utf-8")
+    module = Editor({"general": {}}, str(path), [(r"^PermitRootLogin .*$", "PermitRootLogin no")])
+    module.apply()
+    assert path.read_text(encoding="utf-8") == "PermitRootLogin no\n"
+    assert (tmp_path / "sshd_config.bak").read_text(encoding="utf-8") == "PermitRootLogin yes\n"
+    assert module.get_events()[-1]["result"] == "CHANGED"
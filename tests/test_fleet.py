@@ -0,0 +1,112 @@
+import json
+import sys
+
+import pytest
+
+from core.events import JsonlEventSink
+from core.fleet import (FleetHost, FleetRunner, LocalProcessTransport, SimulatedTransport, Transport,
+                        load_inventory)
+
+
+class Flaky(Transport):
+    """Fails the first `failures` attempts of every host, then writes one event."""
+    name = "flaky"
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.attempts = []
+
+    def run(self, host, spool_path, timeout, attempt, run_id):
+        self.attempts.append((host.name, attempt))
+        with open(spool_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"hardening": {"result": "CHANGED" if attempt > self.failures else "ERROR"}}) + "\n")
+        if attempt <= self.failures:
+            return "FAILED", f"attempt {attempt} failed"
+        return "OK", None
+
+
+def run_fleet(tmp_path, hosts, transports, **options):
+    path = tmp_path / "merged.jsonl"
+    with JsonlEventSink(path) as sink:
+        results = FleetRunner(hosts, sink, transports, retry_delay=0, run_id="r", **options).run()
+    events = [json.loads(line)["hardening"] for line in path.read_text(encoding="utf-8").splitlines()]
+    return results, events
+
+
+def test_events_are_merged_with_the_host_name(tmp_path):
+    hosts = [FleetHost(f"h{i}", transport="simulated") for i in range(5)]
+    results, events = run_fleet(tmp_path, hosts, {"simulated": SimulatedTransport(events=3)}, max_parallel=2)
+
+    assert [r.name for r in results] == ["h0", "h1", "h2", "h3", "h4"]
+    assert all(r.status == "OK" and sum(r.results.values()) == 3 for r in results)
+    controls = [e for e in events if e.get("cis_id", "").startswith("S.")]
+    assert len(controls) == 15 and {e["host"] for e in controls} == {r.name for r in results}
+    assert sum(e["cis_id"] == "host" for e in events) == 5
+    summary = events[-1]
+    assert summary["result"] == "SUMMARY" and summary["hosts"] == {"OK": 5} and summary["failed_hosts"] == []
+
+
+def test_only_the_final_attempt_is_merged(tmp_path):
+    flaky = Flaky(failures=1)
+    results, events = run_fleet(tmp_path, [FleetHost("web", transport="flaky", retries=2)], {"flaky": flaky})
+    assert results[0].status == "OK" and results[0].attempts == 2
+    assert flaky.attempts == [("web", 1), ("web", 2)]
+    assert [e["result"] for e in events if "cis_id" not in e] == ["CHANGED"]
+
+
+def test_exhausted_retries_are_failed(tmp_path):
+    results, events = run_fleet(tmp_path, [FleetHost("db", transport="flaky", retries=1)], {"flaky": Flaky(5)})
+    assert (results[0].status, results[0].attempts, results[0].detail) == ("FAILED", 2, "attempt 2 failed")
+    assert events[-1]["failed_hosts"] == ["db"]
+
+
+def test_hung_hosts_time_out(tmp_path):
+    hosts = [FleetHost("stuck", transport="simulated", timeout=0.05)]
+    results, _ = run_fleet(tmp_path, hosts, {"simulated": SimulatedTransport(hang_rate=1.0)})
+    assert results[0].status == "TIMEOUT"
+
+
+def test_local_transport_kills_a_child_past_its_timeout(tmp_path):
+    script = tmp_path / "slow.py"
+    script.write_text("import time\ntime.sleep(30)\n", encoding="utf-8")
+    transport = LocalProcessTransport(python=sys.executable, script=script)
+    status, detail = transport.run(FleetHost("slow"), str(tmp_path / "spool.jsonl"), 0.5, 1, "r")
+    assert status == "TIMEOUT" and "0.5s" in detail
+
+
+def test_local_transport_reports_the_exit_code(tmp_path):
+    script = tmp_path / "fail.py"
+    script.write_text("import sys\nsys.exit('config broken')\n", encoding="utf-8")
+    status, detail = LocalProcessTransport(script=script).run(FleetHost("f"), str(tmp_path / "s.jsonl"), 30, 1, "r")
+    assert status == "FAILED" and detail == "Exit code 1: config broken"
+
+
+def test_unknown_transport_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="Unknown transport"):
+        run_fleet(tmp_path, [FleetHost("x", transport="ssh")], {})
+
+
+def test_inventory_merges_defaults(tmp_path):
+    path = tmp_path / "inventory.json"
+    path.write_text(json.dumps({
+        "fleet": {"max_parallel": 4},
+        "defaults": {"transport": "simulated", "timeout": 60, "env": {"A": "1"}},
+        "hosts": ["web01", {"name": "db01", "env": {"B": 2}, "retries": 3}],
+    }), encoding="utf-8")
+    hosts, fleet, _ = load_inventory(path)
+    assert fleet == {"max_parallel": 4}
+    assert [(h.name, h.transport, h.timeout, h.retries) for h in hosts] == [
+        ("web01", "simulated", 60.0, 0), ("db01", "simulated", 60.0, 3)]
+    assert hosts[1].env == {"A": "1", "B": "2"}
+
+
+@pytest.mark.parametrize("hosts, message", [
+    (["a", "a"], "unique"),
+    ([{"transport": "local"}], "need a name"),
+    ([{"name": "a", "colour": 1}], "unknown fields"),
+])
+def test_invalid_inventories(tmp_path, hosts, message):
+    path = tmp_path / "inventory.json"
+    path.write_text(json.dumps({"hosts": hosts}), encoding="utf-8")
+    with pytest.raises(ValueError, match=message):
+        load_inventory(path)
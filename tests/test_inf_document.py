@@ -0,0 +1,102 @@
+import codecs
+
+import pytest
+
+from core.inf_document import InfDocument, sniff_encoding
+
+TEMPLATE = [
+    "[Unicode]",
+    "Unicode=yes",
+    "[System Access]",
+    "; comment = not a key",
+    "MinimumPasswordAge = 0",
+    "MaximumPasswordAge = 42",
+    "",
+    "[Privilege Rights]",
+    "SeBackupPrivilege = *S-1-5-32-544",
+    "[Version]",
+    'signature="$CHICAGO$"',
+]
+
+
+@pytest.mark.parametrize("data, expected", [
+    (codecs.BOM_UTF16_LE + "[a]".encode("utf-16-le"), ("utf-16-le", codecs.BOM_UTF16_LE)),
+    (codecs.BOM_UTF32_LE + "[a]".encode("utf-32-le"), ("utf-32-le", codecs.BOM_UTF32_LE)),
+    (codecs.BOM_UTF8 + b"[a]", ("utf-8", codecs.BOM_UTF8)),
+    ("[a]".encode("utf-16-le"), ("utf-16-le", b"")),
+    (b"[a]", ("utf-8", b"")),
+])
+def test_sniff_encoding(data, expected):
+    assert sniff_encoding(data) == expected
+
+
+def test_lookup_is_case_insensitive_and_skips_comments():
+    doc = InfDocument(TEMPLATE)
+    assert doc.get("system access", "minimumpasswordage") == "0"
+    assert doc.get("System Access", "; comment") is None
+    assert doc.section_dict("Privilege Rights") == {"SeBackupPrivilege": "*S-1-5-32-544"}
+    assert doc.sections() == ["Unicode", "System Access", "Privilege Rights", "Version"]
+
+
+def test_edits_keep_original_lines_and_key_spelling():
+    doc = InfDocument(TEMPLATE)
+    assert doc.set("SYSTEM ACCESS", "minimumpasswordage", 1)
+    assert not doc.set("System Access", "MaximumPasswordAge", "42")
+    lines = doc.to_text().split("\r\n")
+    assert "MinimumPasswordAge = 1" in lines
+    assert [l for l in lines if l] == [l if l != "MinimumPasswordAge = 0" else "MinimumPasswordAge = 1"
+                                       for l in TEMPLATE if l]
+
+
+def test_new_keys_are_spliced_at_the_end_of_their_section():
+    doc = InfDocument(TEMPLATE)
+    doc.set("System Access", "PasswordHistorySize", 24)
+    doc.set("System Access", "PasswordHistorySize", 12)    # a queued key is edited in place
+    doc.set("Event Audit", "AuditLogonEvents", 3)
+    lines = doc.to_text().splitlines()
+    assert lines.index("PasswordHistorySize = 12") == lines.index("MaximumPasswordAge = 42") + 1
+    assert lines.count("PasswordHistorySize = 12") == 1 and "PasswordHistorySize = 24" not in lines
+    assert lines[-2:] == ["[Event Audit]", "AuditLogonEvents = 3"]
+    assert doc.get("System Access", "PasswordHistorySize") == "12"
+    assert ("PasswordHistorySize", "12") in doc.items("System Access")
+
+
+def test_delete_drops_existing_and_queued_keys():
+    doc = InfDocument(TEMPLATE)
+    doc.set("System Access", "PasswordHistorySize", 24)
+    assert doc.delete("privilege rights", "SEBACKUPPRIVILEGE")
+    assert doc.delete("System Access", "PasswordHistorySize")
+    assert not doc.delete("System Access", "Missing")
+    text = doc.to_text()
+    assert "SeBackupPrivilege" not in text and "PasswordHistorySize" not in text
+    assert "[Privilege Rights]" in text
+    assert doc.get("Privilege Rights", "SeBackupPrivilege") is None
+    # A deleted key can be set again
+    doc.set("Privilege Rights", "SeBackupPrivilege", "*S-1-5-32-551")
+    assert doc.get("Privilege Rights", "SeBackupPrivilege") == "*S-1-5-32-551"
+
+
+def test_update_reports_changed_keys():
+    doc = InfDocument(TEMPLATE)
+    changed = doc.update({("System Access", "MinimumPasswordAge"): 0,
+                          ("System Access", "MaximumPasswordAge"): 60,
+                          ("Privilege Rights", "SeDebugPrivilege"): "*S-1-5-32-544"})
+    assert changed == [("System Access", "MaximumPasswordAge"), ("Privilege Rights", "SeDebugPrivilege")]
+    assert doc.dirty
+
+
+@pytest.mark.parametrize("encoding, bom", [("utf-16-le", codecs.BOM_UTF16_LE), ("utf-8", b"")])
+def test_round_trip_keeps_encoding_bom_and_newlines(tmp_path, encoding, bom):
+    path = tmp_path / "template.inf"
+    original = bom + "\n".join(TEMPLATE).encode(encoding) + b"\n" if encoding == "utf-8" else \
+        bom + ("\r\n".join(TEMPLATE) + "\r\n").encode(encoding)
+    path.write_bytes(original)
+
+    doc = InfDocument.load(path)
+    assert doc.serialize() == original
+    doc.set("System Access", "MinimumPasswordAge", 1)
+    doc.save(path)
+    again = InfDocument.load(path)
+    assert (again.encoding, again.bom, again.newline) == (doc.encoding, doc.bom, doc.newline)
+    assert again.get("System Access", "MinimumPasswordAge") == "1"
+    assert not doc.dirty
@@ -0,0 +1,105 @@
+import json
+
+import pytest
+
+import main
+from conftest import read_events, results_by_id, write_config
+from core.inf_document import InfDocument
+
+pytest.importorskip("yaml")
+
+
+def test_audit_reports_and_writes_nothing(tmp_path, host):
+    before = open(host.policy_path, "rb").read()
+    main.main(write_config(tmp_path, ["1.1.1", "1.1.2"]), audit=True)
+
+    assert open(host.policy_path, "rb").read() == before
+    assert not (tmp_path / "cache").exists()
+    events = read_events(tmp_path)
+    assert results_by_id(events) == {"1.1.1": "NON_COMPLIANT", "1.1.2": "NON_COMPLIANT"}
+    assert {ev["mode"] for ev in events} == {"audit"}
+
+
+def test_mode_audit_in_config_is_an_audit(tmp_path, host):
+    main.main(write_config(tmp_path, ["1.1.1"], mode="audit"))
+    assert not (tmp_path / "cache").exists()
+    assert InfDocument.load(host.policy_path).get("System Access", "PasswordHistorySize") == "0"
+
+
+def test_enforce_then_incremental_rerun(tmp_path, host):
+    config = write_config(tmp_path, ["1.1.1", "1.1.2"])
+    main.main(config)
+    assert InfDocument.load(host.policy_path).get("System Access", "PasswordHistorySize") == "24"
+    assert results_by_id(read_events(tmp_path)) == {"1.1.1": "CHANGED", "1.1.2": "CHANGED"}
+    assert (tmp_path / "cache" / "catalog.json").exists()
+
+    (tmp_path / "events.jsonl").unlink()
+    main.main(config)
+    assert results_by_id(read_events(tmp_path)) == {"1.1.1": "UNCHANGED", "1.1.2": "UNCHANGED"}
+
+    (tmp_path / "events.jsonl").unlink()
+    main.main(config, full=True)
+    assert results_by_id(read_events(tmp_path)) == {"1.1.1": "OK", "1.1.2": "OK"}
+
+
+def test_events_carry_metrics_and_the_run_ends_with_a_summary(tmp_path, host):
+    main.main(write_config(tmp_path, ["1.1.1", "1.1.2"], slowest_controls=1))
+    events = read_events(tmp_path)
+
+    summary = events[-1]
+    assert summary["result"] == "SUMMARY" and summary["cis_id"] == "run"
+    assert summary["metrics"]["controls"] == 2
+    # One export, one configure and the verifying re-export, paid by the policy session
+    assert summary["metrics"]["commands"] == 3
+    assert len(summary["slowest"]) == 1
+
+    session = next(ev for ev in events if ev["cis_id"] == "secedit")
+    assert session["metrics"]["commands"] == 3
+    control = next(ev for ev in events if ev["cis_id"] == "1.1.1")
+    assert control["metrics"]["commands"] == 0 and control["metrics"]["duration_ms"] >= 0
+
+
+def test_transactional_run_snapshots_and_rolls_back(tmp_path, host):
+    config = write_config(tmp_path, ["1.1.1"])
+    main.main(config)
+    assert InfDocument.load(host.policy_path).get("System Access", "PasswordHistorySize") == "24"
+    assert list((tmp_path / "cache" / "snapshots").glob("*.json.gz"))
+
+    assert main.rollback(config) == 0
+    assert InfDocument.load(host.policy_path).get("System Access", "PasswordHistorySize") == "0"
+
+
+def test_disabled_transaction_takes_no_snapshot(tmp_path, host):
+    main.main(write_config(tmp_path, ["1.1.1"], transaction={"enabled": False}))
+    assert InfDocument.load(host.policy_path).get("System Access", "PasswordHistorySize") == "24"
+    assert not (tmp_path / "cache" / "snapshots").exists()
+
+
+def test_plan_only_prints_both_phases_and_changes_nothing(tmp_path, host, capsys):
+    before = open(host.policy_path, "rb").read()
+    main.main(write_config(tmp_path, ["1.1.1", "1.1.2"]), plan_only=True)
+    out = capsys.readouterr().out
+    assert "check phase: 2 item(s), 0 conflict edge(s), 1 wave(s)" in out
+    assert "apply phase: 1 item(s)" in out and "secedit commits 2 resource(s) staged by 2 control(s)" in out
+    assert open(host.policy_path, "rb").read() == before
+    assert not (tmp_path / "cache").exists()
+
+
+def test_summary_carries_both_plans(tmp_path, host):
+    main.main(write_config(tmp_path, ["1.1.1"]))
+    plans = read_events(tmp_path)[-1]["plan"]
+    assert plans["check"]["items"] == 1
+    assert plans["commit"]["critical_path"] == ["secedit"]
+    state = json.loads((tmp_path / "cache" / "run_state.json").read_text(encoding="utf-8"))
+    assert "secedit" in state["commits"]
+
+
+def test_select_and_exclude_narrow_the_run(tmp_path, host):
+    config = write_config(tmp_path, ["1.1.1", "1.1.2", "1.2.1"])
+    main.main(config, audit=True, select=["sector:1.1"], exclude=["1.1.2"])
+    assert set(results_by_id(read_events(tmp_path))) == {"1.1.1"}
+
+
+def test_an_unknown_selector_stops_the_run(tmp_path, host):
+    with pytest.raises(SystemExit):
+        main.main(write_config(tmp_path, ["1.1.1"]), select=["owner:me"])
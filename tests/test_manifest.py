@@ -0,0 +1,88 @@
+import os
+
+from core.manifest import ModuleManifest, scan_module_source
+
+MODULE = '''
+from core.windows_secedit import SeceditModule
+
+class Helper:
+    pass
+
+class PasswordHistory(SeceditModule):
+    def __init__(self, config):
+        super().__init__(name="history", config=config)
+        self.id = "1.1.1"
+'''
+
+
+def write_module(path, source=MODULE):
+    path.write_text(source, encoding="utf-8")
+    return path
+
+
+def test_scan_finds_the_control_class_and_literal_id():
+    assert scan_module_source(MODULE) == ("1.1.1", "PasswordHistory", [])
+    assert scan_module_source(MODULE.replace('"1.1.1"', 'compute_id()')) == (None, "PasswordHistory", [])
+    assert scan_module_source("class Broken(:\n") == (None, None, [])
+    assert scan_module_source("x = 1\n") == (None, None, [])
+
+
+def test_scan_reads_literal_tags_from_the_class_or_self():
+    class_tags = MODULE.replace("class PasswordHistory(SeceditModule):\n",
+                                "class PasswordHistory(SeceditModule):\n    tags = ['password', 'L1']\n")
+    assert scan_module_source(class_tags)[2] == ["password", "L1"]
+    assert scan_module_source(MODULE + '        self.tags = ("L2",)\n')[2] == ["L2"]
+    assert scan_module_source(MODULE + "        self.tags = load_tags()\n")[2] == []
+
+
+def test_scan_never_executes_the_module():
+    assert scan_module_source("raise SystemExit(1)\n" + MODULE) == ("1.1.1", "PasswordHistory", [])
+
+
+def test_entries_persist_and_are_reused_while_the_file_is_unchanged(tmp_path, monkeypatch):
+    module = write_module(tmp_path / "1.1.1.py")
+    manifest = ModuleManifest(tmp_path / "cache" / "manifest.json")
+    assert manifest.entry_for(module).cis_id == "1.1.1"
+    manifest.save()
+
+    scans = []
+    monkeypatch.setattr("core.manifest.scan_module_source", lambda source: scans.append(source) or (None, None, []))
+    reloaded = ModuleManifest(tmp_path / "cache" / "manifest.json")
+    assert reloaded.entry_for(module).class_name == "PasswordHistory"
+
+    # A touched but identical file is re-hashed, not re-scanned
+    st = os.stat(module)
+    os.utime(module, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert reloaded.entry_for(module).cis_id == "1.1.1"
+    assert scans == []
+
+    write_module(module, MODULE.replace("1.1.1", "1.1.2"))
+    reloaded.entry_for(module)
+    assert len(scans) == 1
+
+
+def test_prune_forgets_deleted_files(tmp_path):
+    first, second = write_module(tmp_path / "a.py"), write_module(tmp_path / "b.py")
+    path = tmp_path / "manifest.json"
+    manifest = ModuleManifest(path)
+    manifest.entry_for(first)
+    manifest.entry_for(second)
+    manifest.prune([first])
+    manifest.save()
+    assert list(ModuleManifest(path)._entries) == [str(first)]
+
+
+def test_corrupt_or_old_manifest_is_ignored(tmp_path):
+    path = tmp_path / "manifest.json"
+    path.write_text("{not json", encoding="utf-8")
+    assert ModuleManifest(path)._entries == {}
+    path.write_text('{"version": 0, "modules": {"x.py": {}}}', encoding="utf-8")
+    assert ModuleManifest(path)._entries == {}
+
+
+def test_every_shipped_module_is_readable_without_import():
+    from conftest import ROOT
+    for path in sorted((ROOT / "modules").rglob("*.py")):
+        cis_id, class_name, _ = scan_module_source(path.read_bytes())
+        # ids are taken verbatim: the runner must see the same key the module looks up
+        assert cis_id and cis_id.strip() == path.stem and class_name, path
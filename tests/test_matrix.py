@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from core.matrix import DRIFT, FAIL, MISSING, PASS, SKIPPED, ComplianceMatrix, cli  # noqa: E402
+
+
+def record(host, run_id, cis_id, result):
+    return {"host": host, "run_id": run_id, "cis_id": cis_id, "result": result, "title": f"Control {cis_id}"}
+
+
+def build(rows, chunk=4):
+    matrix = ComplianceMatrix(chunk=chunk)
+    for row in rows:
+        matrix.add(record(*row))
+    return matrix
+
+
+FLEET = [
+    ("h1", "r1", "1.1", "OK"), ("h1", "r1", "1.2", "OK"),
+    ("h1", "r2", "1.1", "NON_COMPLIANT"), ("h1", "r2", "1.2", "OK"),
+    ("h1", "r3", "1.1", "CHANGED"), ("h1", "r3", "1.2", "ERROR"),
+    ("h2", "r7", "1.1", "OK"), ("h2", "r7", "run", "SUMMARY"),
+]
+
+
+def test_cells_hold_the_worst_result_per_run():
+    matrix = build([("h1", "r1", "1.1", "OK"), ("h1", "r1", "1.1", "ERROR"), ("h1", "r1", "1.2", "SKIPPED")])
+    assert matrix.data.tolist() == [[[FAIL], [SKIPPED]]]
+
+
+def test_runs_are_numbered_per_host_and_runner_records_are_ignored():
+    matrix = build(FLEET)
+    assert matrix.hosts == ["h1", "h2"] and matrix.controls == ["1.1", "1.2"]
+    assert matrix.run_ids == [["r1", "r2", "r3"], ["r7"]]
+    assert matrix.data.shape == (2, 2, 3)
+    assert matrix.data[1, 1].tolist() == [MISSING] * 3
+
+
+def test_chunking_does_not_change_the_result():
+    assert np.array_equal(build(FLEET, chunk=1).data, build(FLEET, chunk=1000).data)
+
+
+def test_pass_rates_latest_and_drifts():
+    matrix = build(FLEET)
+    assert matrix.control_pass_rates().tolist() == [0.5, pytest.approx(2 / 3)]
+    assert matrix.host_pass_rates().tolist() == [0.5, 1.0]
+    assert matrix.latest().tolist() == [[DRIFT, FAIL], [PASS, MISSING]]
+    assert matrix.drifts().tolist() == [[1, 1], [0, 0]]
+
+
+def test_runs_that_skipped_a_control_are_bridged():
+    matrix = build([("h1", "r1", "1.1", "OK"), ("h1", "r2", "1.2", "OK"), ("h1", "r3", "1.1", "ERROR")])
+    assert matrix.drifts()[0].tolist() == [1, 0]
+    assert matrix.latest()[0].tolist() == [FAIL, PASS]
+
+
+def test_offenders_rank_failing_then_drifts():
+    matrix = build(FLEET + [("h3", "r9", "1.1", "ERROR")])
+    hosts, controls = matrix.offenders(top=5)
+    assert [row["host"] for row in hosts] == ["h1", "h3"]
+    assert hosts[0] == {"host": "h1", "failing": 2, "drifts": 2, "runs": 3}
+    assert [row["cis_id"] for row in controls] == ["1.1", "1.2"]
+    assert matrix.offenders(top=1)[0] == hosts[:1]
+
+
+def test_cli_writes_a_json_summary(tmp_path, capsys):
+    log = tmp_path / "events.jsonl"
+    log.write_text("".join(json.dumps({"timestamp": f"2026-01-01T00:00:0{i}Z", "hardening": record(*row)}) + "\n"
+                           for i, row in enumerate(FLEET)), encoding="utf-8")
+    output = tmp_path / "matrix.json"
+    assert cli([str(log), "--format", "json", "--output", str(output)]) == 0
+    summary = json.loads(output.read_text(encoding="utf-8"))
+    assert summary["shape"]["hosts"] == 2 and summary["events"] == 7
+    assert [row["cis_id"] for row in summary["controls"]] == ["1.1", "1.2"]
+    assert capsys.readouterr().err.startswith("[INFO]")
+    assert cli([str(tmp_path / "missing.jsonl")]) == 1
@@ -0,0 +1,108 @@
+import io
+import json
+
+from core.report import ReportBuilder, RunIndex, cli, iter_events, render_csv
+
+
+def _line(run_id, cis_id, result, ts, host="h1"):
+    return json.dumps({"timestamp": ts, "hardening": {"run_id": run_id, "host": host, "cis_id": cis_id,
+                                                     "result": result, "title": f"Control {cis_id}"}}) + "\n"
+
+
+def _write(path, *lines, mode="a"):
+    with open(path, mode, encoding="utf-8") as f:
+        f.writelines(lines)
+
+
+def test_index_updates_incrementally(tmp_path):
+    log = tmp_path / "events.jsonl"
+    _write(log, _line("r1", "1.1", "OK", "2026-01-01T00:00:00Z"), _line("r1", "1.2", "CHANGED", "2026-01-01T00:00:01Z"))
+    index = RunIndex(log)
+    first = index.update()
+    assert first == log.stat().st_size
+    assert index.latest == "r1"
+    assert index.update() == 0
+
+    appended = _line("r2", "1.1", "OK", "2026-01-02T00:00:00Z")
+    _write(log, appended)
+    again = RunIndex(log)
+    assert again.update() == len(appended.encode())
+    assert again.latest == "r2"
+    assert set(again.runs) == {"r1", "r2"}
+    assert again.runs["r1"]["spans"] == [[0, first]]
+
+
+def test_index_skips_a_partial_last_line(tmp_path):
+    log = tmp_path / "events.jsonl"
+    complete = _line("r1", "1.1", "OK", "2026-01-01T00:00:00Z")
+    _write(log, complete, '{"timestamp": "2026-01-01T00:00:01Z", "hardening": {"run_id": "r2"')
+    index = RunIndex(log)
+    index.update()
+    assert index.size == len(complete.encode())
+    assert set(index.runs) == {"r1"}
+
+
+def test_index_is_rebuilt_after_rotation(tmp_path):
+    log = tmp_path / "events.jsonl"
+    _write(log, _line("r1", "1.1", "OK", "2026-01-01T00:00:00Z"), _line("r1", "1.2", "OK", "2026-01-01T00:00:01Z"))
+    RunIndex(log).update()
+    # The sink rotated: a new, shorter file under the same name
+    _write(log, _line("r9", "1.1", "OK", "2026-02-01T00:00:00Z"), mode="w")
+    index = RunIndex(log)
+    index.update()
+    assert set(index.runs) == {"r9"}
+    assert index.latest == "r9"
+
+
+def test_run_and_time_filters_use_the_index(tmp_path):
+    log = tmp_path / "events.jsonl"
+    _write(log, _line("r1", "1.1", "OK", "2026-01-01T00:00:00Z"), _line("r2", "1.1", "CHANGED", "2026-01-02T00:00:00Z"),
+           _line("r2", "2.1", "OK", "2026-01-02T00:00:01Z"))
+    assert [r["run_id"] for r in iter_events([str(log)], latest=True)] == ["r2", "r2"]
+    assert [r["cis_id"] for r in iter_events([str(log)], run_ids={"r2"}, cis_patterns=["2.*"])] == ["2.1"]
+    assert [r["run_id"] for r in iter_events([str(log)], since="2026-01-01T12:00:00.000000Z")] == ["r2", "r2"]
+
+
+def test_builder_counts_success_as_passing_and_flags_flapping():
+    builder = ReportBuilder(flap_threshold=2)
+    results = ["OK", "NON_COMPLIANT", "SUCCESS", "CHANGED", "UNCHANGED"]
+    for i, result in enumerate(results):
+        builder.add({"run_id": f"r{i}", "host": "h1", "cis_id": "1.1", "result": result,
+                     "timestamp": f"2026-01-0{i + 1}T00:00:00.000000Z"})
+    control = builder.controls["1.1"]
+    assert control.evaluated == 5
+    assert control.results["SUCCESS"] == 1
+    assert control.flaps == 2
+    assert [c.cis_id for c in builder.flapping()] == ["1.1"]
+    assert builder.run_rows()[2]["pass_rate"] == "100.0%"
+
+
+def test_runner_records_are_not_controls():
+    builder = ReportBuilder()
+    builder.add({"run_id": "r1", "host": "h1", "cis_id": "1.1", "result": "OK", "timestamp": "t1"})
+    builder.add({"run_id": "r1", "host": "h1", "cis_id": "run", "result": "SUMMARY", "timestamp": "t2",
+                 "metrics": {"duration_ms": 12}})
+    assert set(builder.controls) == {"1.1"}
+    row = builder.run_rows()[0]
+    assert (row["evaluated"], row["duration_ms"]) == (1, 12)
+
+
+def test_csv_has_both_tables():
+    builder = ReportBuilder()
+    builder.add({"run_id": "r1", "host": "h1", "cis_id": "1.10", "result": "OK", "timestamp": "t1"})
+    builder.add({"run_id": "r1", "host": "h1", "cis_id": "1.9", "result": "ERROR", "timestamp": "t2"})
+    out = io.StringIO()
+    render_csv(builder, out)
+    runs, controls = out.getvalue().split("\n\n")
+    assert runs.splitlines()[1].startswith("r1,h1,")
+    assert [line.split(",")[0] for line in controls.splitlines()[1:]] == ["1.9", "1.10"]
+
+
+def test_cli_writes_the_report(tmp_path, capsys):
+    log = tmp_path / "events.jsonl"
+    _write(log, _line("r1", "1.1", "OK", "2026-01-01T00:00:00Z"), "not json\n")
+    output = tmp_path / "report.html"
+    assert cli([str(log), "--format", "html", "--output", str(output)]) == 0
+    assert "<td>1.1</td>" in output.read_text(encoding="utf-8")
+    assert "1 unreadable lines skipped" in capsys.readouterr().err
+    assert cli([str(tmp_path / "missing.jsonl")]) == 1
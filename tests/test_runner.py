@@ -0,0 +1,106 @@
+import threading
+
+from core.base_module import BaseModule
+from core.windows_registry import RegistryModule
+from main import run_check_phase
+
+LSA = r"HKLM\SYSTEM\CurrentControlSet\Control\Lsa"
+
+
+class Probe(BaseModule):
+    """Records which thread ran it and how many probes were running at once."""
+    parallel_safe = True
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+    barrier = None
+
+    def __init__(self, name, fail=False):
+        super().__init__(name, {})
+        self.fail = fail
+        self.thread = None
+
+    def apply(self):
+        cls = type(self)
+        with cls.lock:
+            cls.running += 1
+            cls.peak = max(cls.peak, cls.running)
+        try:
+            self.thread = threading.current_thread()
+            if cls.barrier is not None:
+                cls.barrier.wait(timeout=5)
+            if self.fail:
+                raise RuntimeError(f"{self.name} broke")
+        finally:
+            with cls.lock:
+                cls.running -= 1
+
+
+class SerialProbe(Probe):
+    parallel_safe = False
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+
+def test_parallel_safe_modules_overlap_and_failures_are_reported():
+    Probe.barrier = threading.Barrier(3)
+    try:
+        probes = [Probe("a"), Probe("b", fail=True), Probe("c")]
+        outcomes = run_check_phase([(p, f"{p.name}.py") for p in probes], max_workers=3)
+    finally:
+        Probe.barrier = None
+    assert Probe.peak == 3
+    assert outcomes == {"a.py": (None, None), "b.py": ("b broke", None), "c.py": (None, None)}
+
+
+def test_legacy_modules_run_one_at_a_time():
+    # Undeclared modules that are not parallel_safe are exclusive
+    probes = [SerialProbe(name) for name in "abc"]
+    outcomes = run_check_phase([(p, p.name) for p in probes], max_workers=8)
+    assert set(outcomes.values()) == {(None, None)}
+    assert SerialProbe.peak == 1
+
+
+def test_concurrent_checks_query_each_registry_key_once(context, backend):
+    controls = []
+    for i in range(8):
+        control = RegistryModule(f"c{i}", context.config)
+        control.context = context
+        control.apply = lambda c=control: c.apply_registry_value(LSA, "NoLmHash", 1)
+        control.parallel_safe = True
+        controls.append((control, control.name))
+    run_check_phase(controls, max_workers=8)
+    assert backend.calls["query_registry"] == 1
+
+
+def test_invalidate_during_a_read_is_not_overwritten_by_stale_state(context, backend):
+    reader = context.registry
+    query = backend.query_registry
+
+    def racing_query(key, value_name=None):
+        result = query(key, value_name)
+        # A commit landed while this query was in flight
+        context.commands.invalidate()
+        reader.invalidate(key)
+        return result
+    backend.query_registry = racing_query
+
+    reader.read_key(LSA)
+    backend.query_registry = query
+    reader.read_key(LSA)
+    assert backend.calls["query_registry"] == 2
+
+
+def test_backend_calls_are_counted_on_the_calling_module(context, backend):
+    module = BaseModule("m", {})
+    module.context = context
+    module.run_command('reg query "HKLM\\SOFTWARE\\Nope"', log_errors=False)
+    module.run_backend("query_registry", LSA)
+    assert module.metrics["commands"] == 2 and module.metrics["child_ms"] >= 0
+
+
+def test_check_phase_records_each_control_duration():
+    probe = SerialProbe("timed")
+    run_check_phase([(probe, "timed")], max_workers=1)
+    assert probe.metrics["duration_ms"] > 0
@@ -0,0 +1,146 @@
+import threading
+
+from core.base_module import BaseModule
+from core.catalog import build_control
+from core.scheduler import (ALL, build_commit_plan, build_plan, claims_of, commit_unit, conflicts, execute,
+                            preview_commit_plan, staged_writes)
+from core.settings import compile_settings
+
+
+class Declared(BaseModule):
+    def __init__(self, name, reads=(), writes=(), parallel_safe=False):
+        super().__init__(name=name, config={"general": {}})
+        self.declared = (list(reads), list(writes))
+        self.parallel_safe = parallel_safe
+
+    def resources(self):
+        return self.declared
+
+
+class Undeclared(BaseModule):
+    def __init__(self, name, parallel_safe=False):
+        super().__init__(name=name, config={"general": {}})
+        self.parallel_safe = parallel_safe
+
+
+def label(task, path):
+    return path
+
+
+def plan_of(*tasks, estimates=None):
+    return build_plan([(task, task.name) for task in tasks], label, estimates)
+
+
+def test_undeclared_modules_keep_their_old_scheduling():
+    assert claims_of(Undeclared("a", parallel_safe=True)) == (frozenset((ALL,)), frozenset())
+    assert claims_of(Undeclared("b")) == (frozenset(), frozenset((ALL,)))
+
+
+def test_parallel_safe_writes_are_staged_not_check_phase_writes():
+    staged = Declared("a", reads=["policy\\System Access"], writes=["policy\\System Access\\X"], parallel_safe=True)
+    direct = Declared("b", reads=["policy\\System Access"], writes=["policy\\System Access\\X"])
+    assert claims_of(staged) == (frozenset({"policy\\System Access"}), frozenset())
+    assert staged_writes(staged) == {"policy\\System Access\\X"}
+    assert claims_of(direct)[1] == {"policy\\System Access\\X"}
+    assert staged_writes(direct) == frozenset()
+
+
+def test_conflicts_follow_resource_nesting():
+    reader = (frozenset({"policy\\System Access"}), frozenset())
+    writer = (frozenset(), frozenset({"policy"}))
+    other = (frozenset(), frozenset({"registry:hklm\\software\\x"}))
+    assert conflicts(reader, writer) and conflicts(writer, reader)
+    assert not conflicts(reader, other)
+    assert not conflicts(reader, reader)
+
+
+def test_readers_run_first_and_writers_wait_only_for_conflicts():
+    plan = plan_of(Declared("w1", writes=["registry:hklm\\a"]), Declared("r1", reads=["registry:hklm\\a"]),
+                   Declared("r2", reads=["file:/etc/x"]), Declared("w2", writes=["file:/etc/y"]))
+    assert plan.labels == ["r1", "r2", "w1", "w2"]
+    assert plan.waves() == [["r1", "r2", "w2"], ["w1"]]
+    assert plan.edges == 1
+
+
+def test_critical_path_follows_the_estimates():
+    plan = plan_of(Declared("a", writes=["x"]), Declared("b", writes=["x"]), Declared("c", writes=["y"]),
+                   estimates={"a": 5, "b": 7, "c": 20})
+    assert plan.critical_path() == (["c"], 20.0)
+    assert plan_of(Declared("a", writes=["x"]), Declared("b", writes=["x"]),
+                   estimates={"a": 5, "b": 7}).critical_path() == (["a", "b"], 12.0)
+
+
+def test_execute_never_overlaps_conflicting_items():
+    running, peak, lock = set(), {}, threading.Lock()
+    barrier = threading.Barrier(2, timeout=5)
+
+    def run(task, path):
+        with lock:
+            running.add(path)
+            peak[path] = set(running)
+        if path in ("r", "other"):
+            barrier.wait()      # the two independent items must overlap
+        with lock:
+            running.discard(path)
+        return path.upper()
+
+    plan = plan_of(Declared("w", writes=["x"]), Declared("r", reads=["x"]), Declared("other", reads=["y"]))
+    assert execute(plan, 4, run) == {"w": "W", "r": "R", "other": "OTHER"}
+    assert "r" not in peak["w"]
+
+
+def test_catalog_controls_stage_one_unit_per_session(specs):
+    compiled = compile_settings(dict({"general": {}}, **{spec.id: {"enabled": True} for spec in specs}), specs)
+    loaded = [(build_control(spec, compiled.raw, compiled.controls[spec.id]), spec.id) for spec in specs]
+
+    check = build_plan(loaded, label)
+    assert check.edges == 0 and len(check.waves()) == 1
+
+    commit = preview_commit_plan(loaded, label, {"secedit": 900.0, "registry": 40.0})
+    assert sorted(commit.labels) == ["registry", "secedit"]
+    assert commit.edges == 0
+    assert commit.critical_path() == (["secedit"], 900.0)
+    registry = [spec.id for spec in specs if spec.backend == "registry"]
+    assert sorted(label for labels in commit.staged_by["registry"].values() for label in labels) == sorted(registry)
+    assert "secedit commits" in commit.describe("apply phase")
+
+
+def test_shared_staged_resources_are_reported():
+    a = Declared("a", writes=["policy\\System Access\\X"], parallel_safe=True)
+    b = Declared("b", writes=["policy\\System Access\\X"], parallel_safe=True)
+    plan = preview_commit_plan([(a, "a"), (b, "b")], label)
+    assert plan.shared() == [("policy\\System Access\\X", ["a", "b"])]
+    assert "the last one staged wins" in plan.describe()
+
+
+def test_commit_units_that_overlap_run_in_order():
+    assert commit_unit("policy\\Privilege Rights\\SeX") == "secedit"
+    assert commit_unit("registry:hklm\\a") == "registry"
+    assert commit_unit("file:/etc/x") == "file:/etc/x"
+
+    order = []
+    units = [(lambda: order.append("import") or True, "registry", {"registry:*"}),
+             (lambda: order.append("tool") or True, "tool", {"registry:hklm\\a"}),
+             (lambda: True, "file:/etc/x", {"file:/etc/x"})]
+    plan = build_commit_plan(units)
+    assert plan.waves() == [["registry", "file:/etc/x"], ["tool"]]
+    assert execute(plan, 4, lambda commit, name: commit()) == {"registry": True, "tool": True, "file:/etc/x": True}
+    assert order == ["import", "tool"]
+
+
+def test_run_context_commits_every_session(context, specs, tmp_path):
+    compiled = compile_settings(dict({"general": {}}, **{spec.id: {"enabled": True} for spec in specs}), specs)
+    for spec in specs:
+        control = build_control(spec, compiled.raw, compiled.controls[spec.id])
+        control.context = context
+        control.apply()
+    path = tmp_path / "sshd_config"
+    path.write_text("PermitRootLogin yes\n", encoding="utf-8")
+    context.file_edits.read(path)
+    context.file_edits.stage(context.policy, path, r"^PermitRootLogin .*$", "PermitRootLogin no")
+
+    assert context.commit(max_workers=4)
+    assert sorted(context.commit_plan.labels) == sorted(["secedit", "registry", f"file:{path}"])
+    assert set(context.commit_ms) == set(context.commit_plan.labels)
+    assert path.read_text(encoding="utf-8") == "PermitRootLogin no\n"
+    assert not context.policy.pending() and not context.registry_writes.pending()
@@ -0,0 +1,53 @@
+import pytest
+
+from core.manifest import ManifestEntry, cis_id_from_filename
+from core.selection import ControlSelector, SelectorError, module_sector
+
+
+def entry(path, cis_id=None, tags=()):
+    return ManifestEntry(path, 0, 0, "", cis_id, "Control", list(tags))
+
+
+def test_id_globs_and_comma_separated_terms():
+    selector = ControlSelector(["1.1.*,2.2.1"])
+    assert selector.matches("1.1.3") and selector.matches("2.2.1")
+    assert not selector.matches("2.2.10") and not selector.matches(None)
+    assert str(selector) == "1.1.*, 2.2.1"
+
+
+def test_sector_and_tag_terms():
+    assert ControlSelector("sector:1.2").matches("1.2.1", sector="Sector 1.2")
+    assert ControlSelector("sector:Sector 1.*").matches("1.1.1", sector="1.1")
+    assert not ControlSelector("sector:1.2").matches("1.1.1", sector="Sector 1.1")
+    assert ControlSelector("tag:L*").matches("x", tags=["password", "L1"])
+    assert not ControlSelector("tag:L*").matches("x")
+
+
+def test_exclude_wins_and_no_terms_select_everything():
+    selector = ControlSelector(["1.1.*"], exclude=["tag:slow"])
+    assert selector.matches("1.1.1") and not selector.matches("1.1.2", tags=["slow"])
+    assert ControlSelector(exclude="1.1.1").matches("2.2.1")
+    assert not ControlSelector()
+    assert str(ControlSelector()) == "all"
+
+
+@pytest.mark.parametrize("term", ["owner:me", "sector:", " : "])
+def test_bad_terms_are_rejected(term):
+    with pytest.raises(SelectorError):
+        ControlSelector([term])
+
+
+def test_modules_are_selected_by_file_name_and_directory(specs):
+    entries = [entry("modules/Sector 2.2/2_2_1.py"), entry("modules/Sector 2.3/custom.py", cis_id="2.3.7", tags=["L2"])]
+    assert module_sector(entries[0].path) == "Sector 2.2"
+    assert module_sector("modules/x.py") is None
+
+    kept_specs, kept_entries = ControlSelector(["sector:2.2", "tag:L2"]).select(specs, entries)
+    assert {spec.sector for spec in kept_specs} == {"Sector 2.2"} and kept_entries == entries
+    kept_specs, kept_entries = ControlSelector(["1.1.1", "2.2.1"]).select(specs, entries)
+    assert [spec.id for spec in kept_specs] == ["1.1.1", "2.2.1"] and kept_entries == entries[:1]
+
+
+def test_cis_id_from_filename():
+    assert cis_id_from_filename("modules/Sector 1.1/1_1_1.py") == "1.1.1"
+    assert cis_id_from_filename("modules/helper_module.py") == "helper_module"
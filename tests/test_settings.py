@@ -0,0 +1,132 @@
+import json
+
+import pytest
+
+from core.catalog import ControlSpec
+from core.settings import ConfigError, compile_settings, load_settings
+from core.windows_registry import RegistryValue
+
+yaml = pytest.importorskip("yaml")
+
+
+def _registry_spec(specs):
+    return next(spec for spec in specs if spec.backend == "registry")
+
+
+def test_defaults_and_overrides(specs):
+    secedit = next(spec for spec in specs if spec.backend == "secedit" and spec.setting)
+    compiled = compile_settings({"general": {}, secedit.id: {"enabled": True, secedit.setting: 7}}, specs)
+    assert compiled.enabled(secedit.id)
+    assert compiled.controls[secedit.id].value == 7
+    other = next(spec for spec in specs if spec.id != secedit.id and spec.backend == "secedit")
+    assert not compiled.enabled(other.id)
+    assert compiled.controls[other.id].value == other.default
+
+
+@pytest.mark.parametrize("raw, message", [
+    ([], "must be a mapping"),
+    ({}, "Missing 'general' section"),
+    ({"general": {"mode": "sometimes"}}, "mode"),
+    ({"general": {"nonsense": 1}}, "unknown keys: nonsense"),
+    ({"general": {"max_workers": 0}}, "'max_workers' must be a positive int"),
+    ({"general": {"max_workers": -2}}, "'max_workers' must be a positive int"),
+    ({"general": {"max_workers": True}}, "'max_workers' must be a positive int"),
+    ({"general": {"max_workers": 1.5}}, "'max_workers' must be a positive int"),
+    ({"general": {"commands": {"timeout": 0}}}, "'timeout' must be a positive number"),
+    ({"general": {"agent": {"interval": 0}}}, "'interval' must be a positive number"),
+    ({"general": {"agent": {"jitter": -1}}}, "'jitter' must be a non-negative number"),
+])
+def test_general_section_errors(specs, raw, message):
+    with pytest.raises(ConfigError, match=message):
+        compile_settings(raw, specs)
+
+
+def test_control_section_errors_are_all_reported(specs):
+    secedit = next(spec for spec in specs if spec.backend == "secedit" and spec.setting)
+    rights = next(spec for spec in specs if spec.backend == "user_rights")
+    raw = {"general": {},
+           secedit.id: {"enabled": "yes", secedit.setting: True},
+           rights.id: {"users": "Administrators", "colour": "red"}}
+    with pytest.raises(ConfigError) as excinfo:
+        compile_settings(raw, specs)
+    errors = excinfo.value.errors
+    assert any(f"In '{secedit.id}': 'enabled' must be bool" in e for e in errors)
+    assert any(f"In '{secedit.id}': '{secedit.setting}' must be a number" in e for e in errors)
+    assert any(f"In '{rights.id}': unknown keys: colour" in e for e in errors)
+    assert any(f"In '{rights.id}': 'users' must be a list" in e for e in errors)
+
+
+def test_registry_values_are_converted(specs):
+    spec = _registry_spec(specs)
+    compiled = compile_settings({"general": {}, spec.id: {"enabled": True}}, specs)
+    assert compiled.controls[spec.id].value == RegistryValue.convert(spec.type or "REG_DWORD", spec.default)
+
+
+def _write_config(path, raw):
+    path.write_text(yaml.safe_dump(raw), encoding="utf-8")
+    return path
+
+
+def _parse(path):
+    with open(path, encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+def test_snapshot_hit_equals_fresh_compile(tmp_path, specs):
+    spec = _registry_spec(specs)
+    config = _write_config(tmp_path / "config.yaml", {"general": {}, spec.id: {"enabled": True}})
+    snapshot = tmp_path / "config.snapshot.json"
+
+    fresh = load_settings(config, specs, snapshot_path=snapshot, parse=_parse)
+    assert json.loads(snapshot.read_text(encoding="utf-8"))["raw"] == fresh.raw
+
+    cached = load_settings(config, specs, snapshot_path=snapshot, parse=lambda path: pytest.fail("parsed again"))
+    assert cached.raw == fresh.raw
+    assert {k: (c.enabled, c.value) for k, c in cached.controls.items()} == \
+           {k: (c.enabled, c.value) for k, c in fresh.controls.items()}
+
+
+def test_snapshot_keeps_binary_values(tmp_path):
+    spec = ControlSpec("9.1", "Binary", "registry", r"HKLM\SOFTWARE\Test", value="Blob",
+                       type="REG_BINARY", setting="data", default="00ff")
+    config = _write_config(tmp_path / "config.yaml", {"general": {}, "9.1": {"enabled": True, "data": "0a0b"}})
+    snapshot = tmp_path / "config.snapshot.json"
+
+    fresh = load_settings(config, [spec], snapshot_path=snapshot, parse=_parse)
+    cached = load_settings(config, [spec], snapshot_path=snapshot, parse=lambda path: pytest.fail("parsed again"))
+    assert fresh.controls["9.1"].value == cached.controls["9.1"].value == bytes.fromhex("0a0b")
+
+
+@pytest.mark.parametrize("mangle", [
+    lambda data: "not json",
+    lambda data: json.dumps([data]),
+    lambda data: json.dumps(dict(data, controls={})),
+    lambda data: json.dumps(dict(data, controls={k: "on" for k in data["controls"]})),
+])
+def test_malformed_snapshot_is_a_miss(tmp_path, specs, mangle):
+    config = _write_config(tmp_path / "config.yaml", {"general": {}})
+    snapshot = tmp_path / "config.snapshot.json"
+    load_settings(config, specs, snapshot_path=snapshot, parse=_parse)
+    snapshot.write_text(mangle(json.loads(snapshot.read_text(encoding="utf-8"))), encoding="utf-8")
+
+    parsed = []
+    load_settings(config, specs, snapshot_path=snapshot, parse=lambda path: parsed.append(path) or _parse(path))
+    assert parsed
+
+
+def test_invalid_config_raises_and_writes_nothing(tmp_path, specs):
+    config = _write_config(tmp_path / "config.yaml", {"general": {"dry_run": "no"}})
+    snapshot = tmp_path / "config.snapshot.json"
+    with pytest.raises(ConfigError, match="dry_run"):
+        load_settings(config, specs, snapshot_path=snapshot, parse=_parse)
+    assert not snapshot.exists()
+
+
+def test_pending_defers_the_snapshot_write(tmp_path, specs):
+    config = _write_config(tmp_path / "config.yaml", {"general": {}})
+    snapshot = tmp_path / "config.snapshot.json"
+    pending = []
+    load_settings(config, specs, snapshot_path=snapshot, parse=_parse, pending=pending)
+    assert len(pending) == 1 and not snapshot.exists()
+    pending[0]()
+    assert snapshot.exists()
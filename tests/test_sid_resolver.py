@@ -0,0 +1,59 @@
+import pytest
+
+from core.base_module import BaseModule
+from core.sid_resolver import SidResolver, split_principals
+from core.simulated_backend import DEFAULT_ACCOUNTS
+
+ADMIN_SID = DEFAULT_ACCOUNTS["administrator"]
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, []),
+    ("", []),
+    ("*S-1-5-32-544, Guests ,", ["*S-1-5-32-544", "Guests"]),
+    (["Administrators", " ", "*S-1-1-0"], ["Administrators", "*S-1-1-0"]),
+])
+def test_split_principals(value, expected):
+    assert split_principals(value) == expected
+
+
+def test_well_known_and_builtin_prefixed_names_need_no_lookup(context, backend):
+    sids = context.sids
+    assert sids.resolve(["Administrators", "BUILTIN\\Guests", "NT AUTHORITY\\Local Service", "*S-1-5-32-551"]) == {
+        "Administrators": "S-1-5-32-544", "BUILTIN\\Guests": "S-1-5-32-546",
+        "NT AUTHORITY\\Local Service": "S-1-5-19"}
+    assert backend.calls["lookup_accounts"] == 0
+
+
+def test_unknown_names_are_looked_up_once_in_bulk(context, backend):
+    sids = context.sids
+    assert sids.resolve(["Administrator", "HOST\\Guest", "nobody"]) == {
+        "Administrator": ADMIN_SID, "HOST\\Guest": DEFAULT_ACCOUNTS["guest"], "nobody": None}
+    sids.resolve(["administrator", "NOBODY"])
+    assert backend.calls["lookup_accounts"] == 1 and sids.lookups == 1
+    assert [e["result"] for e in sids.get_events()] == ["WARN"]     # only 'nobody'
+
+
+def test_configured_table_is_used_before_the_backend():
+    sids = SidResolver({"general": {}}, table={"CORP\\Auditors": "*s-1-5-21-1-2-3-1001"})
+    assert sids.sid_for("corp\\auditors") == "S-1-5-21-1-2-3-1001"
+
+
+def test_same_principals_ignores_order_and_spelling(context):
+    sids = context.sids
+    assert sids.same_principals("*S-1-5-32-544,*S-1-5-32-551", "Backup Operators, Administrators")
+    assert sids.same_principals("", [])
+    assert not sids.same_principals("*S-1-5-32-544", "Administrators,Guests")
+    # Unresolvable names still compare, by folded name
+    assert sids.same_principals("nobody", "NOBODY")
+
+
+def test_user_right_compliance_uses_sids(context, backend):
+    module = BaseModule("right", {})
+    # The default host grants SeBackupPrivilege to *S-1-5-32-544,*S-1-5-32-551
+    assert not context.policy.request(module, "Privilege Rights", "SeBackupPrivilege",
+                                      "Backup Operators,BUILTIN\\Administrators")
+    assert module.get_events()[0]["result"] == "OK"
+    assert context.policy.request(module, "Privilege Rights", "SeBackupPrivilege", "Administrators")
+    # Every name in the export was resolved in (at most) one bulk lookup
+    assert backend.calls["lookup_accounts"] <= 1
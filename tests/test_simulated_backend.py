@@ -0,0 +1,120 @@
+import os
+
+import pytest
+
+from core.backend import LocalBackend, create_backend
+from core.base_module import BaseModule
+from core.inf_document import InfDocument
+from core.simulated_backend import SimulatedBackend, parse_reg_file
+from core.windows_registry import RegistryWriteBatch, parse_query_output
+
+LSA = r"HKLM\SYSTEM\CurrentControlSet\Control\Lsa"
+
+
+def write_inf(path, lines):
+    InfDocument(lines).save(str(path))
+    return str(path)
+
+
+def test_export_and_configure_round_trip(backend, tmp_path):
+    export = str(tmp_path / "export.inf")
+    assert backend.export_policy(export).returncode == 0
+    assert InfDocument.load(export).get("System Access", "MinimumPasswordLength") == "0"
+
+    delta = write_inf(tmp_path / "delta.inf", ["[Unicode]", "Unicode=yes", "[System Access]",
+                                               "MinimumPasswordLength = 14", "[Version]", 'signature="$CHICAGO$"'])
+    assert backend.configure_policy(delta).returncode == 0
+    policy = InfDocument.load(backend.policy_path)
+    assert policy.get("System Access", "MinimumPasswordLength") == "14"
+    assert policy.get("System Access", "MaximumPasswordAge") == "42"       # untouched
+    assert backend.calls == {"export_policy": 1, "configure_policy": 1}
+
+
+def test_right_granted_to_no_one_is_removed(backend, tmp_path):
+    delta = write_inf(tmp_path / "delta.inf", ["[Privilege Rights]", "SeDebugPrivilege = "])
+    backend.configure_policy(delta)
+    assert InfDocument.load(backend.policy_path).get("Privilege Rights", "SeDebugPrivilege") is None
+
+
+def test_configure_with_an_unreadable_template_fails(backend, tmp_path):
+    assert backend.configure_policy(str(tmp_path / "missing.inf")).returncode == 1
+
+
+def test_registry_query_renders_reg_exe_output(backend):
+    backend.set_registry_value(LSA, "Blob", "REG_BINARY", "0a0b")
+    values = parse_query_output(backend.query_registry(LSA).stdout)
+    assert values["limitblankpassworduse"].data == 1
+    assert values["authentication packages"].data == ["msv1_0"]
+    assert values["blob"].data == b"\x0a\x0b"
+    assert list(parse_query_output(backend.query_registry(LSA, "NOLMHASH").stdout)) == ["nolmhash"]
+    assert backend.query_registry(LSA, "Missing").returncode == 1
+    assert backend.query_registry(r"HKLM\SOFTWARE\Nope").returncode == 1
+
+
+def test_import_applies_a_generated_reg_file(backend, tmp_path):
+    batch = RegistryWriteBatch({}, None)
+    batch.stage(BaseModule("m", {}), LSA, "RestrictAnonymous", "REG_DWORD", 1)
+    path = tmp_path / "batch.reg"
+    path.write_text(batch.render(), encoding="utf-16")
+    assert backend.import_registry(str(path)).returncode == 0
+    assert parse_query_output(backend.query_registry(LSA).stdout)["restrictanonymous"].data == 1
+
+
+def test_parse_reg_file_handles_types_and_deletes():
+    entries = parse_reg_file("\r\n".join([
+        "Windows Registry Editor Version 5.00", "",
+        r"[HKEY_LOCAL_MACHINE\SOFTWARE\Test]",
+        '"Dword"=dword:0000000a',
+        '"Text"="C:\\\\Path \\"x\\""',
+        '"Multi"=hex(7):61,00,00,00,62,00,00,00,00,00',
+        '"Gone"=-',
+        '@="default"',
+    ]))
+    by_name = {name: (value_type, data) for _, name, value_type, data in entries}
+    assert by_name["Dword"] == ("REG_DWORD", 10)
+    assert by_name["Text"] == ("REG_SZ", 'C:\\Path "x"')
+    assert by_name["Multi"] == ("REG_MULTI_SZ", ["a", "b"])
+    assert by_name["Gone"][0] is None
+    assert by_name[""] == ("REG_SZ", "default")
+
+
+def test_run_emulates_command_lines(backend, tmp_path):
+    export = tmp_path / "e.inf"
+    assert backend.run(f'secedit /export /cfg "{export}"').returncode == 0 and export.exists()
+    assert backend.run(f'reg add "{LSA}" /v RestrictAnonymous /t REG_DWORD /d 1 /f').returncode == 0
+    out = backend.run(f'reg query "{LSA}" /v RestrictAnonymous').stdout
+    assert parse_query_output(out)["restrictanonymous"].data == 1
+    assert backend.run(f'reg add "{LSA}" /v Bad /t REG_DWORD /d nope /f').returncode == 1
+    assert backend.run("auditpol /get /category:*").returncode == 0
+    assert backend.calls["reg_add"] == 2 and backend.calls["run"] == 1
+
+
+def test_seeded_host_survives_a_new_backend_until_reset(tmp_path):
+    root = tmp_path / "host"
+    SimulatedBackend(root).set_registry_value(LSA, "NoLmHash", "REG_DWORD", 0)
+    assert parse_query_output(SimulatedBackend(root).query_registry(LSA).stdout)["nolmhash"].data == 0
+    SimulatedBackend(root).seed(reset=True)
+    assert parse_query_output(SimulatedBackend(root).query_registry(LSA).stdout)["nolmhash"].data == 1
+
+
+def test_latency_is_applied_per_operation(tmp_path, monkeypatch):
+    slept = []
+    monkeypatch.setattr("core.simulated_backend.time.sleep", slept.append)
+    backend = SimulatedBackend(tmp_path, latency=0.5, latencies={"query_registry": 2})
+    backend.query_registry(LSA)
+    backend.export_policy(str(tmp_path / "e.inf"))
+    assert slept == [2, 0.5]
+
+
+def test_create_backend_honours_the_environment(tmp_path, monkeypatch):
+    monkeypatch.delenv("HARDENING_BACKEND", raising=False)
+    assert isinstance(create_backend({"general": {}}), LocalBackend)
+
+    monkeypatch.setenv("HARDENING_BACKEND", "simulated")
+    monkeypatch.setenv("HARDENING_SIM_ROOT", str(tmp_path / "sim"))
+    backend = create_backend({"general": {}})
+    assert isinstance(backend, SimulatedBackend) and backend.root == os.path.abspath(tmp_path / "sim")
+
+    monkeypatch.setenv("HARDENING_BACKEND", "bogus")
+    with pytest.raises(ValueError):
+        create_backend({"general": {}})
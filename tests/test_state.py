@@ -0,0 +1,85 @@
+from core.catalog import build_control
+from core.inf_document import InfDocument
+from core.run_context import RunContext
+from core.state import RunState, fingerprint
+from main import run_check_phase
+
+
+def control_for(specs, backend, key, config=None):
+    spec = next(s for s in specs if s.key == key)
+    config = config or {"general": {}, spec.id: {"enabled": True}}
+    control = build_control(spec, config)
+    control.context = RunContext(config, backend=backend)
+    return control
+
+
+def write_delta(backend, line):
+    path = f"{backend.temp_dir}/delta.inf"
+    InfDocument(["[System Access]", line]).save(path)
+    return path
+
+
+def test_fingerprint_is_order_independent_for_mappings():
+    assert fingerprint({"a": 1, "b": 2}, 3) == fingerprint({"b": 2, "a": 1}, 3)
+    assert fingerprint({"a": 1}, 3) != fingerprint({"a": 1}, 4)
+
+
+def test_state_round_trips_and_only_skips_compliant_controls(tmp_path):
+    path = tmp_path / "run_state.json"
+    state = RunState(path)
+    state.record("1.1", "fp", "OK", "t1")
+    state.record("1.2", "fp", "ERROR", "t1")
+    state.save()
+
+    state = RunState(path)
+    assert state.unchanged("1.1", "fp")["timestamp"] == "t1"
+    assert state.unchanged("1.1", "other") is None
+    assert state.unchanged("1.2", "fp") is None
+    state.forget("1.1")
+    assert state.unchanged("1.1", "fp") is None
+
+
+def test_corrupt_state_is_an_empty_state(tmp_path):
+    path = tmp_path / "run_state.json"
+    path.write_text("[]", encoding="utf-8")
+    assert RunState(path).controls == {}
+
+
+def test_control_fingerprint_follows_observed_value_and_settings(specs, backend):
+    control = control_for(specs, backend, "MinimumPasswordLength")
+    before = control.fingerprint()
+    assert before == control_for(specs, backend, "MinimumPasswordLength").fingerprint()
+
+    control.config[control.id]["min_length"] = 16
+    assert control.fingerprint() != before
+
+    # A host value changed behind the runner's back is a different input
+    backend.configure_policy(write_delta(backend, "MinimumPasswordLength = 8"))
+    assert control_for(specs, backend, "MinimumPasswordLength").fingerprint() != before
+
+
+def test_registry_fingerprint_uses_the_typed_value(specs, backend):
+    spec = next(s for s in specs if s.backend == "registry")
+    before = control_for(specs, backend, spec.key).fingerprint()
+    backend.set_registry_value(spec.key, spec.value, spec.type or "REG_DWORD", 7)
+    assert control_for(specs, backend, spec.key).fingerprint() not in (None, before)
+
+
+def test_unchanged_compliant_control_is_not_applied(specs, backend, tmp_path):
+    state = RunState(tmp_path / "run_state.json")
+    control = control_for(specs, backend, "MaximumPasswordAge")
+    state.record(control.id, control.fingerprint(), "OK", "earlier")
+
+    applied = []
+    control.apply = lambda: applied.append(True)
+    outcomes = run_check_phase([(control, "c")], max_workers=2, state=state)
+    assert outcomes["c"] == (None, state.controls[control.id])
+    assert applied == []
+
+    # Without state (--full) the control is evaluated again
+    run_check_phase([(control, "c")], max_workers=2)
+    assert applied == [True]
+
+
+def test_controls_without_a_context_have_no_fingerprint(specs):
+    assert build_control(specs[0], {"general": {}}).fingerprint() is None
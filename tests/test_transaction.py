@@ -0,0 +1,132 @@
+import json
+
+from core.catalog import build_control
+from core.inf_document import InfDocument
+from core.run_context import RunContext
+from core.settings import compile_settings
+from core.transaction import RunTransaction, SnapshotStore
+
+
+def host_state(backend):
+    policy = InfDocument.load(backend.policy_path)
+    with open(backend.registry_path, encoding="utf-8") as f:
+        registry = json.load(f)
+    return {section: policy.section_dict(section) for section in policy.sections()}, registry
+
+
+def staged_run(tmp_path, backend, specs):
+    """A run context with every catalog control enabled and checked (changes staged, nothing committed)."""
+    compiled = compile_settings(dict({"general": {}}, **{spec.id: {"enabled": True} for spec in specs}), specs)
+    transaction = RunTransaction(compiled.raw, "test-run", SnapshotStore(tmp_path / "snapshots"))
+    context = RunContext(compiled.raw, backend=backend, transaction=transaction)
+    for spec in specs:
+        control = build_control(spec, compiled.raw, compiled.controls[spec.id])
+        control.context = context
+        control.apply()
+    return context, transaction
+
+
+def test_rollback_restores_the_captured_state(tmp_path, backend, specs):
+    policy_before, registry_before = host_state(backend)
+    context, transaction = staged_run(tmp_path, backend, specs)
+
+    snapshot = transaction.capture()
+    assert snapshot.policy and snapshot.registry
+    assert transaction.store.load("test-run").to_dict() == snapshot.to_dict()
+
+    assert context.commit()
+    assert transaction.verify() == []
+    assert host_state(backend) != (policy_before, registry_before)
+
+    transaction.rollback("test")
+    policy_after, registry_after = host_state(backend)
+    assert registry_after == registry_before
+    for section, values in policy_before.items():
+        assert {k: v for k, v in policy_after[section].items() if k in values} == values
+    # A right nobody held is granted to no one again; secedit cannot unset a
+    # System Access value that did not exist, so it stays and a warning says so
+    warnings = [e["message"] for e in transaction.get_events(clear=False) if e["result"] == "WARN"]
+    for section, key, before, _ in snapshot.policy:
+        if before is not None:
+            continue
+        if section == "Privilege Rights":
+            assert not policy_after[section].get(key)
+        else:
+            assert any(key in message for message in warnings)
+    assert transaction.get_events()[-1]["result"] == "CHANGED"
+
+
+def test_rollback_invalidates_run_caches(tmp_path, backend, specs):
+    context, transaction = staged_run(tmp_path, backend, specs)
+    transaction.capture()
+    context.commit()
+    key, name = transaction.snapshot.registry[0][:2]
+    assert context.registry.get(key, name) is not None
+
+    transaction.rollback("test")
+    # The shared reader must not keep serving the committed value
+    before_type = transaction.snapshot.registry[0][3]
+    current = context.registry.get(key, name)
+    assert (current.type if current else None) == before_type
+
+
+def test_abort_commits_nothing(tmp_path, backend, specs):
+    before = host_state(backend)
+    context, transaction = staged_run(tmp_path, backend, specs)
+    transaction.capture()
+    transaction.abort("a control failed")
+
+    assert not context.policy.pending() and not context.registry_writes.pending()
+    assert context.commit()
+    assert host_state(backend) == before
+
+
+def test_restore_from_the_store(tmp_path, backend, specs):
+    before = host_state(backend)
+    context, transaction = staged_run(tmp_path, backend, specs)
+    transaction.capture()
+    context.commit()
+
+    # What `--rollback <run id>` does in a later process
+    later = RunTransaction({"general": {}}, "restore", transaction.store)
+    RunContext({"general": {}}, backend=backend, transaction=later)
+    assert later.restore(transaction.store.load("test-run"))
+    assert host_state(backend)[1] == before[1]
+
+
+
+def test_rollback_restores_committed_files_only(tmp_path, backend, specs):
+    context, transaction = staged_run(tmp_path, backend, specs)
+    edited, unwritable = tmp_path / "sshd_config", tmp_path / "locked.conf"
+    edited.write_text("PermitRootLogin no\n", encoding="utf-8")
+    unwritable.write_text("a=1\n", encoding="utf-8")
+    for path in (edited, unwritable):
+        context.file_edits.read(path)
+        context.file_edits.stage(transaction, path, r"^\w+[ =].*$", "changed")
+
+    transaction.capture()
+    assert {path for path, _ in transaction.snapshot.files} == {str(edited), str(unwritable)}
+    # The second file's write fails; it must not be rewritten on rollback
+    unwritable.unlink()
+    unwritable.mkdir()
+    assert not context.commit()
+    assert edited.read_text(encoding="utf-8") == "changed\n"
+
+    transaction.rollback("test")
+    assert edited.read_text(encoding="utf-8") == "PermitRootLogin no\n"
+    assert unwritable.is_dir()
+
+
+def test_abort_leaves_files_alone(tmp_path, backend, specs):
+    context, transaction = staged_run(tmp_path, backend, specs)
+    path = tmp_path / "sshd_config"
+    path.write_text("PermitRootLogin no\n", encoding="utf-8")
+    context.file_edits.read(path)
+    context.file_edits.stage(transaction, path, r"^PermitRootLogin .*$", "PermitRootLogin yes")
+    transaction.capture()
+    # Edited by someone else after the snapshot; nothing of this run was written
+    path.write_text("PermitRootLogin prohibit-password\n", encoding="utf-8")
+
+    transaction.abort("a control failed")
+    assert not context.file_edits.pending()
+    assert path.read_text(encoding="utf-8") == "PermitRootLogin prohibit-password\n"
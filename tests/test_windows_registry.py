@@ -0,0 +1,156 @@
+import os
+
+import pytest
+from conftest import failing
+
+from core.run_context import RunContext
+from core.windows_registry import (RegistryModule, RegistryReader, RegistryValue, RegistryWriteBatch, format_reg_value,
+                                   normalize_key, parse_query_output)
+
+LSA = r"HKLM\SYSTEM\CurrentControlSet\Control\Lsa"
+
+QUERY = (
+    "\r\n"
+    "HKEY_LOCAL_MACHINE\\SYSTEM\\CurrentControlSet\\Control\\Lsa\r\n"
+    "    auditbaseobjects    REG_DWORD    0x0\r\n"
+    "    Authentication Packages    REG_MULTI_SZ    msv1_0\\0kerberos\r\n"
+    "    LimitBlankPasswordUse    REG_DWORD    0x1\r\n"
+    "    SecureBoot    REG_QWORD    0x100000000\r\n"
+    "    Blob    REG_BINARY    0A0B\r\n"
+    "    Empty    REG_SZ\r\n"
+    "\r\n"
+    "HKEY_LOCAL_MACHINE\\SYSTEM\\CurrentControlSet\\Control\\Lsa\\MSV1_0\r\n"
+)
+
+
+def test_normalize_key_folds_hive_spelling_and_case():
+    assert normalize_key(LSA) == normalize_key('"HKEY_LOCAL_MACHINE\\system\\CurrentControlSet\\Control\\LSA\\"')
+    assert normalize_key("hkcu\\Software").startswith("hkey_current_user\\")
+
+
+def test_query_output_is_parsed_into_typed_values():
+    values = parse_query_output(QUERY)
+    assert values["auditbaseobjects"].data == 0
+    assert values["authentication packages"].data == ["msv1_0", "kerberos"]
+    assert values["secureboot"].data == 2 ** 32
+    assert values["blob"].data == b"\x0a\x0b"
+    assert values["empty"].data == ""
+    assert values["limitblankpassworduse"].name == "LimitBlankPasswordUse"
+    assert parse_query_output(None) == {}
+
+
+@pytest.mark.parametrize("value, expected, value_type, equal", [
+    (RegistryValue("v", "REG_DWORD", 1), 1, None, True),
+    (RegistryValue("v", "REG_DWORD", 1), "1", None, True),
+    (RegistryValue("v", "REG_DWORD", 1), "0x1", "REG_DWORD", True),
+    (RegistryValue("v", "REG_DWORD", 1), 1, "REG_SZ", False),
+    (RegistryValue("v", "REG_DWORD", 10), "0x1", None, False),
+    (RegistryValue("v", "REG_DWORD", 1), "yes", None, False),
+    (RegistryValue("v", "REG_MULTI_SZ", ["a", "b"]), ["a", "b"], None, True),
+    (RegistryValue("v", "REG_MULTI_SZ", ["a", "b"]), ["b", "a"], None, False),
+    (RegistryValue("v", "REG_SZ", "10"), 10, None, True),
+])
+def test_typed_comparison(value, expected, value_type, equal):
+    assert value.equals(expected, value_type) is equal
+
+
+def test_reader_queries_each_key_once_until_invalidated(context, backend):
+    reader = context.registry
+    assert reader.matches(LSA, "LimitBlankPasswordUse", "0x1", "REG_DWORD")
+    assert reader.get("HKEY_LOCAL_MACHINE\\SYSTEM\\CurrentControlSet\\Control\\Lsa", "AUDITBASEOBJECTS").data == 0
+    assert reader.get(LSA, "Missing") is None
+    assert backend.calls["query_registry"] == 1
+
+    # Reads are memoized below the reader too; a write drops both
+    reader.invalidate(LSA)
+    reader.get(LSA, "LimitBlankPasswordUse")
+    assert backend.calls["query_registry"] == 1
+    context.commands.invalidate()
+    reader.invalidate(LSA)
+    reader.get(LSA, "LimitBlankPasswordUse")
+    context.commands.invalidate()
+    reader.invalidate()
+    reader.get(LSA, "LimitBlankPasswordUse")
+    assert backend.calls["query_registry"] == 3
+
+
+def test_missing_key_is_empty_not_an_error(context):
+    assert context.registry.read_key(r"HKLM\SOFTWARE\Nope") == {}
+    assert context.registry.get_events() == []
+
+
+def test_compliant_value_is_ok_without_a_write(context, backend):
+    control = RegistryModule("control", context.config)
+    control.context = context
+    assert not control.apply_registry_value(LSA, "LimitBlankPasswordUse", 1)
+    context.commit()
+    assert backend.calls["import_registry"] == 0
+    assert [e["result"] for e in control.get_events()] == ["OK"]
+
+
+def test_dry_run_logs_the_file_and_imports_nothing(backend):
+    context = RunContext({"general": {"dry_run": True}}, backend=backend)
+    control = RegistryModule("control", context.config)
+    control.context = context
+    assert control.apply_registry_value(LSA, "NoLmHash", 0)
+    context.commit()
+    assert backend.calls["import_registry"] == 0
+    assert "(DRY RUN)" in control.get_events()[0]["message"]
+    assert '"NoLmHash"=dword:00000000' in context.registry_writes.get_events()[0]["message"]
+
+
+def test_staged_values_are_imported_once_and_checked_per_control(context, backend):
+    first, second = RegistryModule("first", context.config), RegistryModule("second", context.config)
+    first.context = second.context = context
+    first.apply_registry_value(LSA, "RestrictAnonymous", 1)
+    second.apply_registry_value(LSA, "auditbaseobjects", 1)
+    context.commit()
+
+    assert backend.calls["import_registry"] == 1
+    assert os.listdir(backend.temp_dir) == []     # the generated .reg file is removed
+    for control in (first, second):
+        assert [e["result"] for e in control.get_events()] == ["CHANGED"]
+    assert context.registry.get(LSA, "RestrictAnonymous").data == 1
+    # The check after the import re-read the key from the host
+    assert backend.calls["query_registry"] == 2
+
+
+def test_failed_import_is_an_error_for_every_staged_value(context, backend):
+    failing(backend, "import_registry")
+    control = RegistryModule("control", context.config)
+    control.context = context
+    control.apply_registry_value(LSA, "NoLmHash", 0)
+    context.commit()
+    assert control.get_events()[0]["message"] == "Failed to set NoLmHash: reg import failed"
+
+
+@pytest.mark.parametrize("value_type, data, line", [
+    ("REG_DWORD", 1, '"V"=dword:00000001'),
+    ("REG_DWORD", "0xffffffff", '"V"=dword:ffffffff'),
+    ("REG_QWORD", 2 ** 32, '"V"=hex(b):00,00,00,00,01,00,00,00'),
+    ("REG_SZ", 'C:\\Path "x"', '"V"="C:\\\\Path \\"x\\""'),
+    ("REG_EXPAND_SZ", "%A%", '"V"=hex(2):25,00,41,00,25,00,00,00'),
+    ("REG_MULTI_SZ", ["a", "b"], '"V"=hex(7):61,00,00,00,62,00,00,00,00,00'),
+    ("REG_BINARY", "0a0b", '"V"=hex:0a,0b'),
+])
+def test_reg_file_encodings(value_type, data, line):
+    assert format_reg_value("V", value_type, data) == line
+
+
+def test_default_value_and_unknown_types():
+    assert format_reg_value("(Default)", "REG_SZ", "x") == '@="x"'
+    with pytest.raises(ValueError):
+        format_reg_value("V", "REG_NONE", "x")
+
+
+def test_render_groups_values_by_key():
+    batch = RegistryWriteBatch({}, RegistryReader({}))
+    module = RegistryModule("m", {})
+    batch.stage(module, LSA, "A", "REG_DWORD", 1)
+    batch.stage(module, r"HKLM\SOFTWARE\Other", "B", "REG_SZ", "x")
+    batch.stage(module, "HKEY_LOCAL_MACHINE\\SYSTEM\\CurrentControlSet\\Control\\Lsa", "C", "REG_DWORD", 2)
+    # Sorted, so the file does not depend on which concurrent check staged first
+    assert batch.render().split("\r\n") == [
+        "Windows Registry Editor Version 5.00", "",
+        "[HKEY_LOCAL_MACHINE\\SOFTWARE\\Other]", '"B"="x"', "",
+        "[HKEY_LOCAL_MACHINE\\SYSTEM\\CurrentControlSet\\Control\\Lsa]", '"A"=dword:00000001', '"C"=dword:00000002', ""]
@@ -0,0 +1,121 @@
+import os
+
+from conftest import failing
+from core.base_module import BaseModule
+from core.inf_document import InfDocument
+from core.run_context import RunContext
+from core.windows_secedit import SeceditModule
+
+
+class Control(SeceditModule):
+    def __init__(self, name, key, value, section="System Access", config=None):
+        super().__init__(name=name, config=config or {"general": {}})
+        self.key, self.value, self.section = key, value, section
+
+    def apply(self):
+        self.apply_secedit_policy(self.key, self.value, self.section)
+
+
+def host_policy(backend):
+    return InfDocument.load(backend.policy_path)
+
+
+def record_deltas(backend):
+    deltas = []
+    configure = backend.configure_policy
+
+    def spy(path, db="secedit.sdb"):
+        deltas.append(InfDocument.load(path))
+        return configure(path, db)
+    backend.configure_policy = spy
+    return deltas
+
+
+def test_one_export_and_one_configure_for_many_controls(context, backend):
+    controls = [Control("length", "MinimumPasswordLength", 14),
+                Control("lockout", "LockoutBadCount", 0),
+                Control("history", "PasswordHistorySize", 24),
+                Control("backup", "SeBackupPrivilege", "*S-1-5-32-544", "Privilege Rights")]
+    for control in controls:
+        control.context = context
+        control.apply()
+    context.commit()
+
+    assert backend.calls["export_policy"] == 1 and backend.calls["configure_policy"] == 1
+    assert os.listdir(backend.temp_dir) == []     # temporary INFs are removed
+    results = {c.name: [e["result"] for e in c.get_events()] for c in controls}
+    assert results == {"length": ["CHANGED"], "lockout": ["OK"], "history": ["CHANGED"], "backup": ["CHANGED"]}
+    policy = host_policy(backend)
+    assert policy.get("System Access", "MinimumPasswordLength") == "14"
+    assert policy.get("Privilege Rights", "SeBackupPrivilege") == "*S-1-5-32-544"
+
+
+def test_delta_holds_only_the_differing_keys(context, backend):
+    deltas = record_deltas(backend)
+    module = BaseModule("m", {})
+    assert context.policy.request(module, "System Access", "MinimumPasswordLength", 14)
+    assert not context.policy.request(module, "System Access", "MaximumPasswordAge", "42")
+    assert context.commit() is not False
+
+    (delta,) = deltas
+    assert delta.section_dict("System Access") == {"MinimumPasswordLength": "14"}
+    # The committed values are what later requests compare against
+    assert context.policy.current_value("System Access", "MinimumPasswordLength") == "14"
+
+
+def test_nothing_staged_means_no_configure(context, backend):
+    context.policy.request(BaseModule("m", {}), "System Access", "MaximumPasswordAge", 42)
+    assert context.policy.commit()
+    assert backend.calls["configure_policy"] == 0
+
+
+def test_dry_run_stages_nothing(backend):
+    context = RunContext({"general": {"dry_run": True}}, backend=backend)
+    module = BaseModule("m", {})
+    assert context.policy.request(module, "System Access", "MinimumPasswordLength", 14)
+    assert context.policy.commit()
+    assert backend.calls["configure_policy"] == 0
+    assert "(DRY RUN)" in module.get_events()[0]["message"]
+
+
+def test_failed_configure_is_reported_on_every_staging_control(context, backend):
+    failing(backend, "configure_policy")
+    modules = [BaseModule("a", {}), BaseModule("b", {})]
+    context.policy.request(modules[0], "System Access", "MinimumPasswordLength", 14)
+    context.policy.request(modules[1], "System Access", "PasswordHistorySize", 24)
+    assert not context.policy.commit()
+    for module in modules:
+        assert [e["result"] for e in module.get_events()] == ["ERROR"]
+    assert context.policy.current_value("System Access", "MinimumPasswordLength") == "0"
+
+
+def test_failed_export_is_an_error_and_stages_nothing(context, backend):
+    failing(backend, "export_policy")
+    module = BaseModule("m", {})
+    assert not context.policy.request(module, "System Access", "MinimumPasswordLength", 14)
+    assert not context.policy.request(module, "System Access", "PasswordHistorySize", 24)
+    assert backend.calls["export_policy"] == 1     # not retried for every control
+    assert module.get_events()[0]["result"] == "ERROR"
+
+
+def test_unlisted_right_counts_as_granted_to_no_one(context):
+    module = BaseModule("m", {})
+    assert not context.policy.request(module, "Privilege Rights", "SeTcbPrivilege", "")
+    assert module.get_events()[0]["result"] == "OK"
+
+
+def test_second_control_overriding_a_key_is_warned(context):
+    first, second = BaseModule("first", {}), BaseModule("second", {})
+    context.policy.request(first, "System Access", "MinimumPasswordLength", 12)
+    context.policy.request(second, "System Access", "MinimumPasswordLength", 14)
+    assert second.get_events()[0]["result"] == "WARN"
+    assert context.policy.build_delta().get("System Access", "MinimumPasswordLength") == "14"
+
+
+def test_standalone_module_commits_immediately(backend, monkeypatch):
+    # Outside a run the module falls back to the default backend
+    monkeypatch.setattr("core.backend._default_backend", backend)
+    control = Control("length", "MinimumPasswordLength", 14)
+    control.apply()
+    assert backend.calls["configure_policy"] == 1
+    assert host_policy(backend).get("System Access", "MinimumPasswordLength") == "14"